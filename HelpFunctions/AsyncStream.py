@@ -0,0 +1,137 @@
+import asyncio
+from openapi.openapi_fast import parse_frame, parse_buffer
+from.FrameReader import HEADER_LENGTH, HEADER_MAGIC, CONTENT_LENGTH_OFFSET, content_length_struct
+
+class StreamClient:
+    def __init__(self, ip, port, limit=2**20, capture=None, selector=None):
+        """
+        Asyncio client for the OpenAPI stream of a module. Several clients, REST polling etc. can share one event loop.
+        Usage:
+            async with StreamClient(ip, port) as client:
+                async for package in client:
+                    ...
+        Args:
+            ip: IP of the module
+            port: streaming port from /rest/rec/destination/socket
+            limit: size of the StreamReader buffer in bytes
+            capture: optional FrameCapture which every frame is written to as received
+            selector: optional FrameSelector, packages which are not selected are skipped without being parsed
+        """
+        self.ip = ip
+        self.port = port
+        self.limit = limit
+        self.capture = capture
+        self.selector = selector
+        self.reader = None
+        self.writer = None
+        self.frames = 0
+        self.bytes = 0
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.ip, self.port, limit=self.limit)
+
+    def close(self):
+        """
+        Closes the connection, a running iteration then ends. Use loop.call_soon_threadsafe to call it from another thread.
+        """
+        if self.writer is not None:
+            self.writer.close()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    async def read_frame(self):
+        """
+        Returns the next whole frame (header and content) as bytes, or None when the stream has ended.
+        """
+        try:
+            header = await self.reader.readexactly(HEADER_LENGTH)
+            if header[:2] != HEADER_MAGIC:
+                raise ValueError("Stream is out of sync, frame does not start with the OpenAPI magic")
+            content_length, = content_length_struct.unpack_from(header, CONTENT_LENGTH_OFFSET)
+            content = await self.reader.readexactly(content_length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        self.frames += 1
+        self.bytes += HEADER_LENGTH + content_length
+        frame = header + content
+        if self.capture is not None:
+            self.capture.write(frame)
+        return frame
+
+    async def raw_frames(self):
+        """
+        Yields whole frames as bytes until the stream ends
+        """
+        frame = await self.read_frame()
+        while frame is not None:
+            yield frame
+            frame = await self.read_frame()
+
+    async def packages(self):
+        """
+        Yields parsed packages until the stream ends
+        """
+        async for frame in self.raw_frames():
+            if self.selector is None:
+                yield parse_frame(frame)
+            else:
+                package = self.selector.parse(frame)
+                if package is not None:
+                    yield package
+
+    async def batches(self, signal_ids=None, size=2**20):
+        """
+        Yields a BatchResult for everything received by each read, until the stream ends.
+        Samples of all frames in a read are concatenated per signal, which keeps the per frame overhead low at high channel counts.
+        Frames are not written to capture in this mode.
+        The reads are copied into one reused buffer and parsed from a memoryview of it. Only the partial frame at the end
+        is moved to the front, when the buffer is full. The StreamReader returns each read as a new bytes object,
+        so that single copy can not be avoided with asyncio streams.
+        Args:
+            signal_ids: signal ids to decode. None decodes all.
+            size: largest number of bytes taken from the StreamReader in one read
+        """
+        buffer = bytearray(2 * size)
+        view = memoryview(buffer)
+        start = end = 0
+        while True:
+            try:
+                data = await self.reader.read(size)
+            except ConnectionError:
+                return
+            if not data:
+                return
+            if end + len(data) > len(buffer):
+                tail = end - start
+                if tail + len(data) > len(buffer):
+                    # A frame larger than the buffer, grow it
+                    buffer = bytearray(2 * (tail + len(data)))
+                    buffer[:tail] = view[start:end]
+                    view = memoryview(buffer)
+                else:
+                    view[:tail] = view[start:end]
+                start, end = 0, tail
+            view[end:end + len(data)] = data
+            end += len(data)
+            # The decoded samples are copies, so the buffer can be reused as soon as the batch is parsed
+            result = parse_buffer(view[start:end], signal_ids)
+            # The partial frame at the end stays for the next read
+            start += result.consumed
+            if start == end:
+                start = end = 0
+            self.frames += result.frames
+            self.bytes += result.consumed
+            if result.frames:
+                yield result
+
+    def __aiter__(self):
+        return self.packages()
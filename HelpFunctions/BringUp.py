@@ -0,0 +1,86 @@
+import threading
+import time
+
+class BringUp:
+    def __init__(self, modules, barriers=("start",)):
+        """
+        Sets up the stream of many modules at once. Each module runs the phases of LanXI.setup_stream in its own thread,
+        so a slow TEDS detection on one module does not hold up the others. Before a barrier phase every module waits
+        until all modules have finished the phases before it. By default this is the measurement start, so all modules
+        are configured before any of them streams, and the streams start close together.
+        If a module fails, the others stop at the next barrier. The recorders which were opened are then closed again,
+        and run() raises a RuntimeError listing the errors of all modules.
+        Args:
+            modules: list of LanXI
+            barriers: names of the phases in LanXI.phases which wait for all modules
+        """
+        self.modules = modules
+        self.barriers = set(barriers)
+        self.barrier = threading.Barrier(len(modules))
+        # Seconds each module spent in each phase, and seconds from the start of run() until all modules passed each phase
+        self.timings = {module.ip: {} for module in modules}
+        self.phase_times = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def _run(self, module, start):
+        try:
+            for name, method in module.phases:
+                if name in self.barriers:
+                    self.barrier.wait()
+                t = time.perf_counter()
+                getattr(module, method)()
+                self.timings[module.ip][name] = time.perf_counter() - t
+                with self.lock:
+                    self.phase_times[name] = max(self.phase_times.get(name, 0), time.perf_counter() - start)
+        except threading.BrokenBarrierError:
+            pass
+        except (Exception, SystemExit) as error:
+            # SystemExit is raised by LanXI when a module has no channels
+            self.errors[module.ip] = error
+            self.barrier.abort()
+
+    def _cleanup(self, module):
+        """
+        Undoes the phases a module got through, so it can be set up again
+        """
+        done = self.timings[module.ip]
+        try:
+            if "start" in done:
+                module.rest.put("/rest/rec/measurements/stop")
+            if "create" in done:
+                module.rest.put("/rest/rec/finish")
+            module.rest.put("/rest/rec/close")
+        except Exception:
+            # The module may be the one which failed, e.g. because it can not be reached
+            pass
+
+    def run(self):
+        """
+        Runs all phases on all modules, and returns the timings
+        """
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self._run, args=(module, start)) for module in self.modules]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.total = time.perf_counter() - start
+        if self.errors:
+            for module in self.modules:
+                if "open" in self.timings[module.ip]:
+                    self._cleanup(module)
+            errors = "; ".join(ip + ": " + repr(error) for ip, error in self.errors.items())
+            raise RuntimeError("Setup failed on " + str(len(self.errors)) + " module(s): " + errors) from next(iter(self.errors.values()))
+        return self.timings
+
+    def report(self):
+        """
+        Returns a table of the seconds each module spent in each phase
+        """
+        names = [name for name, method in self.modules[0].phases]
+        lines = ["module".ljust(16) + "".join(name.rjust(10) for name in names)]
+        for ip, timing in self.timings.items():
+            lines.append(ip.ljust(16) + "".join(("%.3f" % timing[name] if name in timing else "-").rjust(10) for name in names))
+        lines.append("all done at".ljust(16) + "".join(("%.3f" % self.phase_times[name] if name in self.phase_times else "-").rjust(10) for name in names))
+        return "\n".join(lines)
@@ -1,27 +1,135 @@
+import threading
 import numpy as np
 
 class buffer:
-    def __init__(self, size):
+    def __init__(self, size, threadsafe=False, dtype=np.float64, data=None):
+        """
+        Fixed size circular buffer. Writes only copy the new data, the stored data is never moved.
+        Args:
+            size: number of points the buffer holds
+            threadsafe: set to True when one thread appends while another thread reads.
+                        Reads then always return a copy, so they can not be torn by a following write.
+            dtype: data type of the stored points
+            data: existing array of length size to use as storage instead of allocating one
+        """
         self.size = size
-        self.data = np.zeros(self.size)
+        self.data = np.zeros(self.size, dtype=dtype) if data is None else data
+        # Position where the next point is written, the newest point is just before it
+        self.cursor = 0
+        # Total number of points appended since the buffer was created
+        self.written = 0
+        self.lock = threading.Lock() if threadsafe else None
 
     def append(self, x):
         """
         Adds data in the front of the buffer. Discard the oldest data if buffer is full
         """
-        self.data =  np.append(self.data[-(self.size - len(x)) :: ] , x)
+        x = np.asarray(x)
+        if self.lock is None:
+            self._write(x)
+        else:
+            with self.lock:
+                self._write(x)
+
+    def _write(self, x):
+        n = len(x)
+        self.written += n
+        if n >= self.size:
+            # Only the newest points fit
+            self.data[:] = x[-self.size:]
+            self.cursor = 0
+            return
+        end = self.cursor + n
+        if end <= self.size:
+            self.data[self.cursor:end] = x
+        else:
+            first = self.size - self.cursor
+            self.data[self.cursor:] = x[:first]
+            self.data[:n - first] = x[first:]
+        self.cursor = end % self.size
 
     def get(self):
         """
         Returns the whole buffer
         """
-        return self.data
+        return self.getPart(self.size)
 
     def getPart(self, start = 2**16):
         """
         Returns X points of the newest data.
+        A view into the buffer is returned when the points do not wrap around the end of the buffer, otherwise a copy.
+        """
+        if self.lock is None:
+            return self._read(min(start, self.size))
+        with self.lock:
+            return np.array(self._read(min(start, self.size)))
+
+    def _read(self, n):
+        end = self.cursor if self.cursor > 0 else self.size
+        begin = end - n
+        if begin >= 0:
+            return self.data[begin:end]
+        return np.concatenate((self.data[begin:], self.data[:end]))
+
+class channelBuffer:
+    def __init__(self, channels, size, threadsafe=False, dtype=np.float64):
+        """
+        One circular buffer per channel, stored as rows of a single (channels, size) array.
+        Args:
+            channels: number of channels
+            size: number of points each channel holds
+            threadsafe: set to True when one thread appends while another thread reads
+            dtype: data type of the stored points
+        """
+        self.channels = channels
+        self.size = size
+        self.data = np.zeros((channels, size), dtype=dtype)
+        self.buffers = [buffer(size, data=self.data[channel]) for channel in range(channels)]
+        self.lock = threading.Lock() if threadsafe else None
+
+    def append(self, channel, x):
+        """
+        Adds data in the front of the buffer of one channel
+        """
+        x = np.asarray(x)
+        if self.lock is None:
+            self.buffers[channel]._write(x)
+        else:
+            with self.lock:
+                self.buffers[channel]._write(x)
+
+    def get(self):
+        """
+        Returns the whole buffer as a (channels, size) array
+        """
+        return self.getPart(self.size)
+
+    def getPart(self, start = 2**16):
+        """
+        Returns X points of the newest data of all channels as a (channels, X) array.
+        When all channels are at the same position and the points do not wrap, this is a view into the buffer.
+        """
+        if self.lock is None:
+            return self._read(min(start, self.size))
+        with self.lock:
+            return np.array(self._read(min(start, self.size)))
+
+    def getChannel(self, channel, start = 2**16):
+        """
+        Returns X points of the newest data of one channel
         """
-        return self.data[-start :: ]
+        if self.lock is None:
+            return self.buffers[channel]._read(min(start, self.size))
+        with self.lock:
+            return np.array(self.buffers[channel]._read(min(start, self.size)))
 
-# Create databuffer to store the converted package data
-DataBuffer = buffer(2**16)
\ No newline at end of file
+    def _read(self, n):
+        cursor = self.buffers[0].cursor
+        if any(channel.cursor != cursor for channel in self.buffers):
+            # Channels have received a different number of points, read them one by one
+            return np.stack([channel._read(n) for channel in self.buffers])
+        end = cursor if cursor > 0 else self.size
+        begin = end - n
+        if begin >= 0:
+            return self.data[:, begin:end]
+        return np.concatenate((self.data[:, begin:], self.data[:, :end]), axis=1)
\ No newline at end of file
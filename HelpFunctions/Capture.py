@@ -0,0 +1,140 @@
+import mmap
+import os
+import struct
+import time
+import numpy as np
+from.FrameReader import HEADER_LENGTH, HEADER_MAGIC, CONTENT_LENGTH_OFFSET, content_length_struct
+
+# Message type, time family and time count, starting at byte 4 of the header
+header_fields_struct = struct.Struct("<H6xBBBBQ")
+HEADER_FIELDS_OFFSET = 4
+
+# One record per frame in the sidecar index
+index_dtype = np.dtype([
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("message_type", "<u2"),
+    ("time_count", "<u8"),
+    ("time", "<f8"),
+])
+
+def index_path(path):
+    return path + ".idx"
+
+def index_record(frame, offset):
+    """
+    Returns the index record of a frame found at the given offset in the capture
+    """
+    message_type, k, l, m, n, time_count = header_fields_struct.unpack_from(frame, HEADER_FIELDS_OFFSET)
+    seconds = 2.0**-k * 3.0**-l * 5.0**-m * 7.0**-n * time_count
+    return (offset, len(frame), message_type, time_count, seconds)
+
+class FrameCapture:
+    def __init__(self, path):
+        """
+        Writes frames to a file exactly as they were received, together with a sidecar index (path + ".idx")
+        holding offset, length, message type and time of each frame.
+        Pass it to FrameReader(sock, capture=...) to capture a live stream.
+        """
+        self.path = path
+        self.file = open(path, "wb")
+        self.index = open(index_path(path), "wb")
+        self.offset = 0
+        self.frames = 0
+
+    def write(self, frame):
+        self.file.write(frame)
+        self.index.write(np.array([index_record(frame, self.offset)], dtype=index_dtype).tobytes())
+        self.offset += len(frame)
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def build_index(path):
+    """
+    Scans a capture and writes its index again, e.g. if the capture was not closed properly.
+    A partial frame at the end of the file is left out of the index.
+    """
+    records = []
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + HEADER_LENGTH <= len(data):
+        if data[offset:offset + 2] != HEADER_MAGIC:
+            raise ValueError("Capture is corrupt at offset " + str(offset))
+        content_length, = content_length_struct.unpack_from(data, offset + CONTENT_LENGTH_OFFSET)
+        length = HEADER_LENGTH + content_length
+        if offset + length > len(data):
+            break
+        records.append(index_record(data[offset:offset + length], offset))
+        offset += length
+    index = np.array(records, dtype=index_dtype)
+    index.tofile(index_path(path))
+    return index
+
+class FrameReplay:
+    def __init__(self, path, realtime=False, speed=1.0):
+        """
+        Replays a capture made with FrameCapture. It has the same read_frame() and iteration interface as FrameReader,
+        so it can replace it in a reader loop.
+        Args:
+            path: capture file
+            realtime: if True, frames are handed out at the pace given by their time stamps, otherwise as fast as possible
+            speed: replay speed relative to real time
+        """
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        if not os.path.exists(index_path(path)):
+            build_index(path)
+        self.index = np.fromfile(index_path(path), dtype=index_dtype)
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if len(self.index) else b""
+        self.view = memoryview(self.map)
+        self.position = 0
+        self.frames = 0
+        self._start = None
+
+    def seek(self, seconds):
+        """
+        Continues the replay from the first frame at or after the given time, without scanning the file
+        """
+        self.position = int(np.searchsorted(self.index["time"], seconds))
+        self._start = None
+
+    def read_frame(self):
+        """
+        Returns the next frame as a memoryview into the capture, or None at the end of the capture
+        """
+        if self.position >= len(self.index):
+            return None
+        record = self.index[self.position]
+        if self.realtime and record["time"] > 0:
+            if self._start is None:
+                self._start = (time.monotonic(), record["time"])
+            delay = (record["time"] - self._start[1]) / self.speed - (time.monotonic() - self._start[0])
+            if delay > 0:
+                time.sleep(delay)
+        self.position += 1
+        self.frames += 1
+        return self.view[record["offset"]:record["offset"] + record["length"]]
+
+    def __iter__(self):
+        frame = self.read_frame()
+        while frame is not None:
+            yield frame
+            frame = self.read_frame()
+
+    def close(self):
+        self.view.release()
+        if len(self.index):
+            self.map.close()
+        self.file.close()
@@ -0,0 +1,73 @@
+import numpy as np
+from scipy.signal import butter, sosfilt
+
+def stage_factors(factor):
+    """
+    Splits a decimation factor into its prime factors, largest first, so the later stages run on as few samples as possible
+    """
+    factors = []
+    prime = 2
+    while factor > 1:
+        while factor % prime == 0:
+            factors.append(prime)
+            factor //= prime
+        prime += 1
+    return sorted(factors, reverse=True)
+
+class Decimator:
+    def __init__(self, factor, channels=1, sample_rate=None, order=8, cutoff=0.8):
+        """
+        Reduces the sample rate of a stream by an integer factor. Each stage low pass filters and keeps every q-th sample,
+        with the filter state and the position of the kept samples carried over between blocks, so the output does not depend
+        on the block size. All channels are filtered at once.
+        Can be attached to a streamHandler, and passes the decimated blocks on to its own consumers:
+            decimator = Decimator(4, channels, handler.lanxi.sample_rate)
+            handler.addConsumer(decimator.append)
+            decimator.addConsumer(recorder.append)
+        Args:
+            factor: decimation factor
+            channels: number of channels in each block
+            sample_rate: input sample rate in Hz, only used to report the output sample_rate
+            order: Butterworth order of the anti alias filter of each stage
+            cutoff: cutoff of the anti alias filters relative to the Nyquist frequency after decimation
+        """
+        self.factor = factor
+        self.channels = channels
+        self.sample_rate = None if sample_rate is None else sample_rate / factor
+        self.factors = stage_factors(factor)
+        self.sos = [butter(order, cutoff / q, output='sos') for q in self.factors]
+        self.zi = [np.zeros((sos.shape[0], channels, 2)) for sos in self.sos]
+        # Index of the next sample to keep in the block entering each stage
+        self.phase = [0] * len(self.factors)
+        self.consumers = []
+
+    def addConsumer(self, consumer):
+        """
+        Registers a function which is called with every decimated (channels, samples) block
+        """
+        self.consumers.append(consumer)
+
+    def process(self, block):
+        """
+        Returns the decimated block, (channels, samples) or 1-D like the input. It may be empty for short blocks.
+        """
+        data = np.reshape(block, (self.channels, -1))
+        for stage, q in enumerate(self.factors):
+            if data.shape[1] == 0:
+                break
+            data, self.zi[stage] = sosfilt(self.sos[stage], data, axis=-1, zi=self.zi[stage])
+            phase = self.phase[stage]
+            self.phase[stage] = (phase - data.shape[1]) % q
+            data = data[:, phase::q]
+        if np.ndim(block) == 1:
+            return data[0]
+        return data
+
+    def append(self, block):
+        """
+        Decimates a block and hands the result to the consumers
+        """
+        data = self.process(block)
+        if np.shape(data)[-1]:
+            for consumer in self.consumers:
+                consumer(data)
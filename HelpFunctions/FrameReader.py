@@ -0,0 +1,105 @@
+import struct
+
+# Every OpenAPI frame starts with a 28 byte header, the content length is the last field of it
+HEADER_LENGTH = 28
+HEADER_MAGIC = b"BK"
+content_length_struct = struct.Struct("<I")
+CONTENT_LENGTH_OFFSET = 24
+
+class FrameReader:
+    def __init__(self, sock, size=2**20, capture=None):
+        """
+        Reads whole OpenAPI frames from a connected socket.
+        Data is received with recv_into into a preallocated buffer, so no new objects are created per chunk.
+        Args:
+            sock: connected stream socket
+            size: initial size of the receive buffer in bytes. It grows if a frame does not fit.
+            capture: optional FrameCapture which every frame is written to as received
+        """
+        self.sock = sock
+        self.capture = capture
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        # Unread data is located in buffer[start:end]
+        self.start = 0
+        self.end = 0
+        self.frames = 0
+        self.bytes = 0
+        self.recv_calls = 0
+
+    def _receive(self, needed):
+        """
+        Receives until at least "needed" unread bytes are in the buffer. Returns False if the socket was closed.
+        """
+        if self.start + needed > len(self.buffer):
+            unread = self.end - self.start
+            if needed > len(self.buffer):
+                # Frame is larger than the buffer. Frames handed out earlier may still reference the old buffer, so allocate a new one.
+                buffer = bytearray(max(needed, 2 * len(self.buffer)))
+                buffer[:unread] = self.view[self.start:self.end]
+                self.buffer = buffer
+                self.view = memoryview(self.buffer)
+            else:
+                # Move the unread data to the front to make room
+                self.view[:unread] = self.view[self.start:self.end]
+            self.start = 0
+            self.end = unread
+        while self.end - self.start < needed:
+            received = self.sock.recv_into(self.view[self.end:])
+            self.recv_calls += 1
+            if received == 0:
+                return False
+            self.end += received
+            self.bytes += received
+        return True
+
+    def read_frame(self):
+        """
+        Returns the next whole frame (header and content) as a memoryview into the receive buffer, or None when the stream has ended.
+        The view is only valid until the next call, copy it with bytes() if it must be kept.
+        """
+        # Header may arrive in more than one piece, so wait until all of it is there
+        if not self._receive(HEADER_LENGTH):
+            return None
+        if self.view[self.start:self.start + 2] != HEADER_MAGIC:
+            raise ValueError("Stream is out of sync, frame does not start with the OpenAPI magic")
+        content_length, = content_length_struct.unpack_from(self.buffer, self.start + CONTENT_LENGTH_OFFSET)
+        frame_length = HEADER_LENGTH + content_length
+        if not self._receive(frame_length):
+            return None
+        frame = self.view[self.start:self.start + frame_length]
+        self.start += frame_length
+        self.frames += 1
+        if self.capture is not None:
+            self.capture.write(frame)
+        return frame
+
+    def read_frames(self):
+        """
+        Returns all whole frames which are already received, at least one, as one memoryview into the receive buffer,
+        or None when the stream has ended. Use with openapi_fast.parse_buffer to parse a batch of frames at once.
+        The view is only valid until the next call, copy it with bytes() if it must be kept.
+        """
+        frame = self.read_frame()
+        if frame is None:
+            return None
+        start = self.start - len(frame)
+        # Hand out the following frames too, as long as they are complete in the buffer
+        while self.end - self.start >= HEADER_LENGTH:
+            if self.view[self.start:self.start + 2] != HEADER_MAGIC:
+                raise ValueError("Stream is out of sync, frame does not start with the OpenAPI magic")
+            content_length, = content_length_struct.unpack_from(self.buffer, self.start + CONTENT_LENGTH_OFFSET)
+            frame_length = HEADER_LENGTH + content_length
+            if self.end - self.start < frame_length:
+                break
+            if self.capture is not None:
+                self.capture.write(self.view[self.start:self.start + frame_length])
+            self.start += frame_length
+            self.frames += 1
+        return self.view[start:self.start]
+
+    def __iter__(self):
+        frame = self.read_frame()
+        while frame is not None:
+            yield frame
+            frame = self.read_frame()
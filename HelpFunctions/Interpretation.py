@@ -0,0 +1,123 @@
+import numpy as np
+from openapi.openapi_fast import EDescriptorType
+from.import utility as utility
+
+# Full scale of each data type. Integer samples are divided by it, so a scale factor of 1 maps full scale to 1.
+full_scales = {1: 2**7, 2: 2**15, 3: 2**23, 4: 2**31, 5: 2**63, 6: 1, 7: 1}
+# Modules stream 24 bit integers, which is assumed until the data type is received
+DEFAULT_DATA_TYPE = 3
+
+def to_units(samples, gain, offset=None, out=None):
+    """
+    Converts a (signals, samples) block of raw values with one multiply-add over the whole block: samples * gain + offset
+    Args:
+        samples: (signals, samples) array
+        gain: scale factor divided by the full scale of each signal
+        offset: offset of each signal, None if all are zero
+        out: float array to write the result to, may be samples itself
+    """
+    out = np.multiply(samples, gain[:, None], out=out)
+    if offset is not None:
+        out += offset[:, None]
+    return out
+
+class InterpretationRegistry:
+    def __init__(self, signals=0):
+        """
+        Interpretations of a stream, kept as one array per descriptor with row signal_id - 1, so a whole block of signals
+        is converted at once. The arrays grow when a signal_id beyond them is interpreted, and interpretations received
+        during the stream replace the earlier ones.
+        Args:
+            signals: number of signals to make room for from the start
+        """
+        self.scale_factor = np.ones(0)
+        self.offset = np.zeros(0)
+        self.data_type = np.zeros(0, dtype=int)
+        self.full_scale = np.zeros(0)
+        # Sample period in seconds, NaN until received
+        self.period = np.zeros(0)
+        self.unit = np.zeros(0, dtype=object)
+        self.vector_length = np.zeros(0, dtype=int)
+        self.channel_type = np.zeros(0, dtype=int)
+        self.gain = np.zeros(0)
+        self.has_offset = False
+        self.resize(signals)
+
+    def __len__(self):
+        return len(self.gain)
+
+    def resize(self, signals):
+        """
+        Makes room for signal_id 1 to signals, new signals get the defaults
+        """
+        extra = signals - len(self)
+        if extra <= 0:
+            return
+        self.scale_factor = np.concatenate((self.scale_factor, np.ones(extra)))
+        self.offset = np.concatenate((self.offset, np.zeros(extra)))
+        self.data_type = np.concatenate((self.data_type, np.full(extra, DEFAULT_DATA_TYPE)))
+        self.full_scale = np.concatenate((self.full_scale, np.full(extra, float(full_scales[DEFAULT_DATA_TYPE]))))
+        self.period = np.concatenate((self.period, np.full(extra, np.nan)))
+        self.unit = np.concatenate((self.unit, np.full(extra, "", dtype=object)))
+        self.vector_length = np.concatenate((self.vector_length, np.ones(extra, dtype=int)))
+        self.channel_type = np.concatenate((self.channel_type, np.zeros(extra, dtype=int)))
+        self.gain = self.scale_factor / self.full_scale
+
+    def update(self, interpretations):
+        """
+        Stores the interpretations of an interpretation package, from either parser
+        """
+        for interpretation in interpretations:
+            index = interpretation.signal_id - 1
+            if index >= len(self):
+                self.resize(index + 1)
+            descriptor_type, value = interpretation.descriptor_type, interpretation.value
+            if descriptor_type == EDescriptorType.scale_factor:
+                self.scale_factor[index] = value
+            elif descriptor_type == EDescriptorType.offset:
+                self.offset[index] = value
+            elif descriptor_type == EDescriptorType.data_type:
+                self.data_type[index] = value
+                self.full_scale[index] = full_scales.get(value, 1)
+            elif descriptor_type == EDescriptorType.period_time:
+                self.period[index] = utility.time_format_to_utc(value.stamp, value.time_family)
+            elif descriptor_type == EDescriptorType.unit:
+                # Strings are padded to an even length
+                self.unit[index] = value.data.rstrip("\x00")
+            elif descriptor_type == EDescriptorType.vector_length:
+                self.vector_length[index] = value
+            elif descriptor_type == EDescriptorType.channel_type:
+                self.channel_type[index] = value
+        self.gain = self.scale_factor / self.full_scale
+        self.has_offset = bool(np.any(self.offset))
+
+    def coefficients(self, signal_ids=None):
+        """
+        Returns copies of the gain and offset of the given signals, all if not given, for to_units. The offset is None if it is zero.
+        """
+        index = slice(None) if signal_ids is None else np.asarray(signal_ids) - 1
+        return self.gain[index].copy(), self.offset[index].copy() if self.has_offset else None
+
+    def convert(self, samples, signal_ids=None, out=None):
+        """
+        Converts a (signals, samples) block of raw values to engineering units in one operation
+        Args:
+            samples: (signals, samples) array
+            signal_ids: signal_id of each row, 1, 2, 3 ... if not given
+            out: float array to write the result to
+        """
+        if signal_ids is None:
+            self.resize(len(samples))
+            index = slice(0, len(samples))
+        else:
+            index = np.asarray(signal_ids) - 1
+            self.resize(int(np.max(index)) + 1)
+        return to_units(samples, self.gain[index], self.offset[index] if self.has_offset else None, out)
+
+    def convert_signal(self, signal_id, samples):
+        """
+        Converts the raw values of one signal to engineering units
+        """
+        self.resize(signal_id)
+        index = signal_id - 1
+        return samples * self.gain[index] + self.offset[index]
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from.BringUp import BringUp
+from.lanxi import LanXI
+from.Stream import streamHandler
+
+class MultiModuleAcquisition:
+    def __init__(self, ips, cache=None, trust_cache=False):
+        """
+        Sets up and streams several LAN-XI modules at once, and merges their data on a common timeline.
+        The timeline comes from the time stamps in the stream, so the modules must be time synchronized (PTP).
+        Args:
+            ips: list with the IP of each module
+            cache: SetupCache shared by all modules, see LanXI
+            trust_cache: set up the modules from the cache without asking them, see LanXI
+        """
+        self.modules = [LanXI(ip, cache, trust_cache) for ip in ips]
+        self.handlers = []
+        self.thread = None
+
+    def setup(self):
+        """
+        Sets up the stream on all modules in parallel, the time of each phase is in self.bringup.report()
+        """
+        self.bringup = BringUp(self.modules)
+        self.bringup.run()
+        self.handlers = [streamHandler(module) for module in self.modules]
+        self.channels = sum(handler.buffer.channels for handler in self.handlers)
+
+    async def run(self):
+        """
+        Streams all modules concurrently on the running event loop
+        """
+        await asyncio.gather(*(handler.runStream() for handler in self.handlers))
+
+    def start(self):
+        """
+        Starts streaming all modules on one event loop in a background thread
+        """
+        self.thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the stream on all modules
+        """
+        with ThreadPoolExecutor(max_workers=len(self.handlers)) as pool:
+            list(pool.map(lambda handler: handler.stopStream(), self.handlers))
+        if self.thread is not None:
+            self.thread.join()
+
+    def common_end_time(self):
+        """
+        Returns the newest time which all channels of all modules have data for
+        """
+        return min(np.min(handler.end_time) for handler in self.handlers)
+
+    def getAligned(self, n):
+        """
+        Returns the newest n points of all channels of all modules as a (channels, n) array, where each column is the same instant on all modules.
+        Modules which are ahead of the slowest one are read from further back in their buffers.
+        """
+        end_time = self.common_end_time()
+        merged = np.zeros((self.channels, n))
+        row = 0
+        for handler in self.handlers:
+            for channel in range(handler.buffer.channels):
+                # Number of points this channel is ahead of the common timeline
+                ahead = int(round((handler.end_time[channel] - end_time) * handler.lanxi.sample_rate))
+                if ahead + n > handler.buffer.size:
+                    raise ValueError("Module " + handler.ip + " is too far ahead to align " + str(n) + " points")
+                merged[row] = handler.buffer.getChannel(channel, ahead + n)[:n]
+                row += 1
+        return merged
+
+    def report(self):
+        """
+        Returns a dict per module with the throughput in samples per second and the lag in seconds behind the most advanced module
+        """
+        newest = max(np.max(handler.end_time) for handler in self.handlers)
+        now = time.monotonic()
+        report = {}
+        for handler in self.handlers:
+            elapsed = now - handler.start_time if handler.start_time is not None else 0
+            report[handler.ip] = {
+                "throughput": handler.samples_received / elapsed if elapsed > 0 else 0.0,
+                "lag": float(newest - np.min(handler.end_time)),
+            }
+        return report
@@ -0,0 +1,106 @@
+import numpy as np
+from scipy.signal import butter, sosfilt
+from.Decimator import Decimator
+
+# Octave ratio of base 10 bands, IEC 61260
+G = 10**(3 / 10)
+# Highest band edge relative to the sample rate of the stage it is filtered at. The full rate stage can go closer to Nyquist.
+FULL_RATE_LIMIT = 0.45
+DECIMATED_LIMIT = 0.35
+
+def band_centers(fraction, fmin, fmax):
+    """
+    Returns the exact mid band frequencies of the 1/fraction octave bands between fmin and fmax
+    """
+    def center(x):
+        if fraction % 2:
+            return 1000 * G**(x / fraction)
+        return 1000 * G**((2 * x + 1) / (2 * fraction))
+    x = int(np.floor(fraction * np.log(fmin / 1000) / np.log(G))) - 1
+    centers = []
+    while center(x) <= fmax:
+        if center(x) >= fmin:
+            centers.append(center(x))
+        x += 1
+    return np.array(centers)
+
+class OctaveAnalyzer:
+    def __init__(self, sample_rate, channels=1, fraction=3, fmin=20, fmax=None, order=3, integration=1.0, ref=1.0):
+        """
+        Real time 1/1 or 1/3 octave (CPB) analyzer. The filter state is kept between blocks, so blocks of any size can be
+        appended, e.g. as a streamHandler consumer: handler.addConsumer(analyzer.append).
+        Each octave lower runs at half the sample rate: the signal is low pass filtered and decimated by 2 per octave,
+        and a band is filtered at the lowest rate that still holds it. Every band filter runs on all channels at once.
+        Args:
+            sample_rate: sample rate in Hz
+            channels: number of channels in each block
+            fraction: 1 for octaves, 3 for third octaves
+            fmin: lowest band center frequency in Hz
+            fmax: highest band center frequency in Hz, as high as the sample rate allows if not given
+            order: Butterworth order of the band filters, the band pass filters have twice this order
+            integration: seconds of linear averaging for each level
+            ref: reference of the levels, e.g. 20e-6 for dB SPL
+        """
+        if fmax is None:
+            fmax = sample_rate / 2
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.fraction = fraction
+        self.integration = integration
+        self.ref = ref
+        centers = band_centers(fraction, fmin, fmax)
+        upper = centers * G**(1 / (2 * fraction))
+        lower = centers * G**(-1 / (2 * fraction))
+        keep = upper < FULL_RATE_LIMIT * sample_rate
+        self.centers, upper, lower = centers[keep], upper[keep], lower[keep]
+        # Stage k runs at sample_rate / 2**k and holds the bands which do not fit the next stage
+        band_stages = []
+        for f2 in upper:
+            stage = 0
+            while f2 <= DECIMATED_LIMIT * sample_rate / 2**(stage + 1):
+                stage += 1
+            band_stages.append(stage)
+        self.band_stages = np.array(band_stages)
+        self.stages = max(band_stages) + 1 if band_stages else 1
+        self.rates = [sample_rate / 2**stage for stage in range(self.stages)]
+        self.band_sos = [butter(order, [f1, f2], btype='bandpass', fs=self.rates[stage], output='sos')
+                         for f1, f2, stage in zip(lower, upper, band_stages)]
+        self.band_zi = [np.zeros((sos.shape[0], channels, 2)) for sos in self.band_sos]
+        # Decimation by 2 into each lower stage, the anti alias filter passes up to the highest band of the next stage
+        self.decimators = [Decimator(2, channels) for stage in range(1, self.stages)]
+        self.sum_squares = np.zeros((channels, len(self.centers)))
+        self.counts = np.zeros(len(self.centers))
+        self.samples = 0
+        self.latest = np.full((channels, len(self.centers)), -np.inf)
+
+    def append(self, block):
+        """
+        Filters a (channels, samples) block, or a 1-D block with 1 channel
+        """
+        data = np.reshape(block, (self.channels, -1))
+        for stage in range(self.stages):
+            if stage > 0:
+                data = self.decimators[stage - 1].process(data)
+            if data.shape[1] == 0:
+                # Too few samples to reach the lower stages this time
+                break
+            for band in np.flatnonzero(self.band_stages == stage):
+                filtered, self.band_zi[band] = sosfilt(self.band_sos[band], data, axis=-1, zi=self.band_zi[band])
+                self.sum_squares[:, band] += np.einsum('ij,ij->i', filtered, filtered)
+                self.counts[band] += filtered.shape[1]
+        self.samples += np.shape(block)[-1]
+        if self.samples >= self.integration * self.sample_rate:
+            self.latest = self._levels()
+            self.sum_squares = np.zeros_like(self.sum_squares)
+            self.counts = np.zeros_like(self.counts)
+            self.samples = 0
+
+    def _levels(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 10 * np.log10(self.sum_squares / self.counts / self.ref**2)
+
+    def levels(self):
+        """
+        Returns the band center frequencies and the levels in dB of the last completed integration as a (channels, bands) array
+        """
+        return self.centers, self.latest
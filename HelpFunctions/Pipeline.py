@@ -0,0 +1,275 @@
+import multiprocessing as mp
+import queue
+import socket
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from openapi.openapi_fast import parse_buffer, parse_interpretations, frame_struct, HEADER_LENGTH, EMessageType
+from.FrameReader import FrameReader
+from.Buffer import channelBuffer
+from.Rest import RestClient
+from.Interpretation import InterpretationRegistry, to_units
+from.import utility as utility
+
+# Multi process decode pipeline.
+# A reader process only receives bytes and cuts them into batches of whole frames, which it copies into a shared memory
+# ring of frame slots. Decoder processes take batches from the ring, decode and scale them with parse_buffer and write
+# (channels, samples) blocks into a second shared memory ring, which the consumers in the main process read without copying.
+# Slot indexes are passed through queues, the data itself never goes through a pipe.
+
+def _reader(ip, port, channels, frames_name, slot_size, free_frames, work, stop, counters, decoders):
+    """
+    Reader process. Interpretations are parsed here, so every batch is sent with the gains and offsets valid for it.
+    """
+    frames_memory = shared_memory.SharedMemory(name=frames_name)
+    interpretations = InterpretationRegistry(channels)
+    coefficients = interpretations.coefficients(range(1, channels + 1))
+    sequence = 0
+    sock = None
+    try:
+        sock = socket.create_connection((ip, port))
+        # Time out now and then to see the stop event
+        sock.settimeout(0.5)
+        reader = FrameReader(sock, slot_size)
+        while not stop.is_set():
+            try:
+                batch = reader.read_frames()
+            except socket.timeout:
+                continue
+            if batch is None:
+                break
+            length = len(batch)
+            # Only the headers are looked at, to pick out the interpretations
+            offset = 0
+            while offset < length:
+                magic, message_type, content_length = frame_struct.unpack_from(batch, offset)
+                end = offset + HEADER_LENGTH + content_length
+                if message_type == EMessageType.e_interpretation.value:
+                    interpretations.update(parse_interpretations(batch, offset + HEADER_LENGTH, end).interpretations)
+                    coefficients = interpretations.coefficients(range(1, channels + 1))
+                offset = end
+            counters[0] = reader.frames
+            try:
+                # A single frame larger than a slot can not be handed over either
+                slot = free_frames.get_nowait() if length <= slot_size else None
+            except queue.Empty:
+                slot = None
+            if slot is None:
+                # Decoders are behind, drop the batch instead of stalling the socket
+                with counters.get_lock():
+                    counters[1] += 1
+                continue
+            frames_memory.buf[slot * slot_size:slot * slot_size + length] = batch
+            work.put((sequence, slot, length, coefficients))
+            sequence += 1
+    except OSError:
+        pass
+    finally:
+        if sock is not None:
+            sock.close()
+        frames_memory.close()
+        for _ in range(decoders):
+            work.put(None)
+
+def _decoder(channels, frames_name, blocks_name, slot_size, block_size, free_frames, free_blocks, work, done, counters):
+    """
+    Decoder process
+    """
+    frames_memory = shared_memory.SharedMemory(name=frames_name)
+    blocks_memory = shared_memory.SharedMemory(name=blocks_name)
+    blocks = np.ndarray((len(blocks_memory.buf) // (channels * block_size * 8), channels, block_size), np.float64, blocks_memory.buf)
+    signal_ids = range(1, channels + 1)
+    item = work.get()
+    while item is not None:
+        sequence, slot, length, (gain, offset) = item
+        batch = frames_memory.buf[slot * slot_size:slot * slot_size + length]
+        result = parse_buffer(batch, signal_ids)
+        batch.release()
+        free_frames.put(slot)
+        samples = [len(result.signals[signal_id]) if signal_id in result.signals else 0 for signal_id in signal_ids]
+        if result.time_count is None:
+            # No signal data in the batch
+            done.put((sequence, None, 0, None))
+        elif len(set(samples)) != 1:
+            # Not all channels got the same samples, the block can not be aligned
+            with counters.get_lock():
+                counters[3] += 1
+            done.put((sequence, None, 0, None))
+        else:
+            try:
+                block = free_blocks.get_nowait()
+            except queue.Empty:
+                # Consumers are behind
+                with counters.get_lock():
+                    counters[2] += 1
+                done.put((sequence, None, 0, None))
+            else:
+                # The samples are cast while they are stacked into the output block, and then converted in place
+                n = samples[0]
+                out = blocks[block, :, :n]
+                np.stack([result.signals[signal_id] for signal_id in signal_ids], out=out)
+                to_units(out, gain, offset, out)
+                del out
+                done.put((sequence, block, n, utility.time_format_to_utc(result.time_count, result.time_family)))
+        item = work.get()
+    del blocks
+    frames_memory.close()
+    blocks_memory.close()
+    done.put(None)
+
+class Pipeline:
+    def __init__(self, LanXI, decoders=2, slots=16, slot_size=2**20, timeout=1.0):
+        """
+        Streams a module through a reader process and a pool of decoder processes.
+        Has the same buffer, end_time, samples_received, addConsumer, startStream and stopStream as streamHandler,
+        so it can replace it when a single process can not keep up. Consumers get read only views of the shared output ring,
+        which are only valid during the call, copy them if they must be kept.
+        On Windows and macOS the processes are spawned, so the script creating the pipeline must use an if __name__ == "__main__": guard.
+        Args:
+            LanXI: LanXI with the stream set up
+            decoders: number of decoder processes
+            slots: number of slots in each shared memory ring
+            slot_size: size of a frame slot in bytes, the largest batch the reader hands over at once
+            timeout: seconds without a decoded batch after which the processes are checked for having died
+        """
+        self.lanxi = LanXI
+        self.ip = LanXI.ip
+        self.inputport = LanXI.inputport
+        self.host = "http://" + self.ip
+        # REST calls share the connection of the LanXI when it has one
+        self.rest = getattr(LanXI, "rest", None) or RestClient(self.ip)
+        self.channels = len(LanXI.channels)
+        self.decoders = decoders
+        self.slots = slots
+        self.slot_size = slot_size
+        self.timeout = timeout
+        # A batch of int24 frames holds at most slot_size / 3 samples
+        self.block_size = slot_size // 3 // self.channels + 1
+        self.buffer = channelBuffer(self.channels, 2**16, threadsafe=True)
+        self.end_time = np.zeros(self.channels)
+        self.samples_received = 0
+        self.start_time = None
+        self.consumers = []
+        self.processes = []
+        # Frames received, batches dropped by the reader, blocks dropped by the decoders, batches missing channels
+        self.counters = mp.Array('q', 4)
+        self.stop = mp.Event()
+
+    def addConsumer(self, consumer):
+        """
+        Registers a function which is called with a (channels, samples) array of scaled data for every decoded batch
+        """
+        self.consumers.append(consumer)
+
+    def startStream(self):
+        """
+        Starts the processes and hands the decoded blocks to the buffer and the consumers in order, until the stream is stopped.
+        Raises RuntimeError if one of the processes dies, after stopping the others.
+        """
+        self.frames_memory = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_size)
+        self.blocks_memory = shared_memory.SharedMemory(create=True, size=self.slots * self.channels * self.block_size * 8)
+        blocks = np.ndarray((self.slots, self.channels, self.block_size), np.float64, self.blocks_memory.buf)
+        self.free_frames = mp.Queue()
+        self.free_blocks = mp.Queue()
+        for slot in range(self.slots):
+            self.free_frames.put(slot)
+            self.free_blocks.put(slot)
+        self.work = mp.Queue()
+        self.done = mp.Queue()
+        self.processes = [mp.Process(target=_reader, daemon=True,
+                                     args=(self.ip, self.inputport, self.channels, self.frames_memory.name,
+                                           self.slot_size, self.free_frames, self.work, self.stop, self.counters, self.decoders))]
+        self.processes += [mp.Process(target=_decoder, daemon=True,
+                                      args=(self.channels, self.frames_memory.name, self.blocks_memory.name, self.slot_size,
+                                            self.block_size, self.free_frames, self.free_blocks, self.work, self.done, self.counters))
+                           for _ in range(self.decoders)]
+        for process in self.processes:
+            process.start()
+        self.start_time = time.monotonic()
+        # Decoders finish batches out of order, so they are put back in sequence before they are handed on
+        pending = {}
+        next_sequence = 0
+        running = self.decoders
+        checked = time.monotonic()
+        try:
+            while running:
+                try:
+                    item = self.done.get(timeout=self.timeout)
+                except queue.Empty:
+                    self._check_processes()
+                    checked = time.monotonic()
+                    continue
+                # The other decoders keep the queue busy when one has died, so check now and then as well
+                if time.monotonic() - checked >= self.timeout:
+                    self._check_processes()
+                    checked = time.monotonic()
+                if item is None:
+                    running -= 1
+                    continue
+                pending[item[0]] = item
+                while next_sequence in pending:
+                    sequence, block, n, block_time = pending.pop(next_sequence)
+                    next_sequence += 1
+                    if block is None:
+                        continue
+                    data = blocks[block, :, :n]
+                    data.flags.writeable = False
+                    for channel in range(self.channels):
+                        self.buffer.append(channel, data[channel])
+                    self.end_time[:] = block_time + n / self.lanxi.sample_rate
+                    self.samples_received += n * self.channels
+                    for consumer in self.consumers:
+                        consumer(data)
+                    del data
+                    self.free_blocks.put(block)
+        except BaseException:
+            # Stop the other processes, they could otherwise wait for work or free slots forever
+            self.stop.set()
+            for process in self.processes:
+                process.terminate()
+            raise
+        finally:
+            for process in self.processes:
+                process.join()
+            del blocks
+            self.frames_memory.close()
+            self.frames_memory.unlink()
+            self.blocks_memory.close()
+            self.blocks_memory.unlink()
+
+    def _check_processes(self):
+        """
+        Raises RuntimeError if a process died. It never sends its end marker, and its batch never arrives.
+        """
+        failed = [process for process in self.processes if process.exitcode not in (None, 0)]
+        if failed:
+            raise RuntimeError("Pipeline process " + failed[0].name + " exited with code " + str(failed[0].exitcode))
+
+    def stopStream(self):
+        self.rest.put("/rest/rec/measurements/stop")
+        self.rest.put("/rest/rec/finish")
+        self.rest.put("/rest/rec/close")
+        self.stop.set()
+
+    def stats(self):
+        """
+        Returns a dict with the number of received frames, dropped batches and blocks, batches dropped because channels
+        were missing, and the depth of the queues
+        """
+        def depth(q):
+            try:
+                return q.qsize()
+            except (NotImplementedError, AttributeError):
+                # qsize is not available on macOS
+                return None
+        with self.counters.get_lock():
+            frames, reader_drops, decoder_drops, partial_drops = self.counters[:]
+        return {
+            "frames": frames,
+            "samples": self.samples_received,
+            "reader drops": reader_drops,
+            "decoder drops": decoder_drops,
+            "partial drops": partial_drops,
+            "work depth": depth(self.work) if self.processes else 0,
+            "done depth": depth(self.done) if self.processes else 0,
+        }
@@ -0,0 +1,86 @@
+import os
+import time
+import numpy as np
+
+# Fixed header size, so the header can be rewritten in place when the recording grows
+HEADER_SIZE = 128
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+class Recorder:
+    def __init__(self, path, channels, dtype=np.float64, fsync_interval=1.0):
+        """
+        Appends blocks of data to a .npy file on disk as they arrive, so memory use does not depend on the length of the recording.
+        The file holds a (samples, channels) array. The header is updated on every fsync, so the file can be opened
+        with np.load(path, mmap_mode='r') while it is still being written.
+        Args:
+            path: file to write
+            channels: number of channels in each block, None for a 1-D file of single values such as timestamps
+            dtype: data type stored in the file
+            fsync_interval: seconds between flushing the data to disk. None only flushes on close.
+        """
+        self.path = path
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.fsync_interval = fsync_interval
+        self.samples = 0
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.file = open(path, "wb")
+        self._write_header()
+        self.last_sync = time.monotonic()
+
+    def _write_header(self):
+        shape = (self.samples,) if self.channels is None else (self.samples, self.channels)
+        header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (self.dtype.str, shape)
+        header = header.ljust(HEADER_SIZE - len(NPY_MAGIC) - 3) + "\n"
+        self.file.write(NPY_MAGIC + len(header).to_bytes(2, "little") + header.encode("latin1"))
+
+    def append(self, block):
+        """
+        Appends a (channels, samples) block to the recording, or a 1-D block to a 1-D recording
+        """
+        block = np.asarray(block, dtype=self.dtype).reshape(1 if self.channels is None else self.channels, -1)
+        # Samples are stored row by row, so the block is written transposed
+        self.file.write(np.ascontiguousarray(block.T).data)
+        self.samples += block.shape[1]
+        if self.fsync_interval is not None and time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """
+        Updates the header with the current length and forces the data to disk
+        """
+        self.file.seek(0)
+        self._write_header()
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_blocks(path, block_size=2**16, channel=None):
+    """
+    Yields a recording in blocks, reading it through a memory map so it never has to fit in memory
+    Args:
+        path: .npy file written by Recorder
+        block_size: samples per block
+        channel: index of the channel to read as 1-D blocks. None yields (channels, samples) blocks of all channels.
+    """
+    data = np.load(path, mmap_mode='r')
+    for start in range(0, data.shape[0], block_size):
+        block = data[start:start + block_size]
+        if channel is None:
+            yield np.array(block.T)
+        else:
+            yield np.array(block[:, channel])
@@ -0,0 +1,44 @@
+import numpy as np
+
+# Reduction of plot data to what the screen can show. Matplotlib draws every point it is given, so a trace of 2**16 samples
+# costs far more than the few hundred pixels it ends up on. The edges are computed once per plot, the reductions per frame.
+
+def pixel_width(ax):
+    """
+    Returns the width of an axes in pixels
+    """
+    return max(1, int(ax.get_window_extent().width))
+
+def linear_edges(n, points):
+    """
+    Returns the start index of points equally wide bins over n values
+    """
+    return np.unique(np.linspace(0, n, min(points, n), endpoint=False).astype(int))
+
+def log_edges(n, points, start=1):
+    """
+    Returns the start index of points logarithmically spaced bins over n values, for a log frequency axis.
+    Values before start, e.g. DC, are left out. Low bins holding less than one value are merged.
+    """
+    return np.unique(np.geomspace(start, n, min(points, n - start), endpoint=False).astype(int))
+
+def minmax_envelope(values, edges):
+    """
+    Returns the minimum and maximum of each bin interleaved, so the reduced trace covers the same range as the full one
+    """
+    envelope = np.empty(2 * len(edges))
+    envelope[0::2] = np.minimum.reduceat(values, edges)
+    envelope[1::2] = np.maximum.reduceat(values, edges)
+    return envelope
+
+def envelope_x(x, edges):
+    """
+    Returns the x values matching minmax_envelope
+    """
+    return np.repeat(x[edges], 2)
+
+def reduce_max(values, edges):
+    """
+    Returns the maximum of each bin, which keeps the peaks of a spectrum
+    """
+    return np.maximum.reduceat(values, edges)
@@ -0,0 +1,64 @@
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class RestClient:
+    def __init__(self, ip, timeout=5.0, retries=3, backoff=0.1):
+        """
+        REST client for one module. All requests share one keep-alive connection, instead of opening a new one for each call.
+        Requests which could not connect are retried for all methods. Failed reads and 502/503/504 responses are only
+        retried for GET, because PUT and POST change the state of the module.
+        Args:
+            ip: IP of the module
+            timeout: seconds to wait for a connection and for a response
+            retries: number of retries of a failed request
+            backoff: seconds before the first retry, doubled for each further retry
+        """
+        self.ip = ip
+        self.host = "http://" + ip
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff,
+                      status_forcelist=(502, 503, 504), allowed_methods=frozenset({"GET"}), raise_on_status=False)
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+
+    def request(self, method, path, json=None):
+        """
+        Sends a request to a path such as "/rest/rec/open" and returns the response
+        """
+        return self.session.request(method, self.host + path, json=json, timeout=self.timeout)
+
+    def get(self, path):
+        return self.request("GET", path)
+
+    def put(self, path, json=None):
+        return self.request("PUT", path, json)
+
+    def post(self, path, json=None):
+        return self.request("POST", path, json)
+
+    def wait_onchange(self, key, value=False, timeout=30.0, interval=0.01, max_interval=0.5):
+        """
+        Polls /rest/rec/onchange until key has the given value, e.g. until "transducerDetectionActive" is False.
+        The poll interval starts short and doubles up to max_interval, so fast changes are seen quickly without
+        keeping the module busy during long ones. Returns the last onchange JSON.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            onchange = self.get("/rest/rec/onchange").json()
+            if onchange[key] == value:
+                return onchange
+            if time.monotonic() + interval > deadline:
+                raise TimeoutError(f"{key} did not become {value} within {timeout} seconds")
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
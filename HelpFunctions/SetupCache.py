@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+import time
+
+class SetupCache:
+    def __init__(self, directory=None, max_age=7 * 24 * 3600):
+        """
+        On-disk cache of what a module reports during setup: module info, default channel setup and TEDS of the transducers.
+        Entries are keyed by serial number and firmware version, so a firmware update or another module invalidates them.
+        Used by LanXI(ip, cache=SetupCache()). The TEDS detection is skipped when the module still reports the same
+        transducers (type and serial number per channel) as when the entry was stored. The module reports the transducers
+        of its last detection, so this relies on the transducers not having been changed since then; call invalidate(ip)
+        after changing transducers on a module. With trust_cache the module is not asked at all, which is only right for
+        a rig known not to have changed.
+        Args:
+            directory: folder of the cache files, ~/.lanxi_cache if not given
+            max_age: seconds after an entry was stored after which it is no longer used, None to keep entries forever
+        """
+        self.directory = directory or os.path.join(os.path.expanduser("~"), ".lanxi_cache")
+        self.max_age = max_age
+        # Modules are set up in parallel threads, the index is shared between them
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(module_info):
+        return "%s_%s" % (module_info["serialNumber"], module_info["firmwareVersion"])
+
+    @staticmethod
+    def identities(transducers):
+        """
+        Returns what identifies the transducer on each channel, None for channels without TEDS
+        """
+        return [None if transducer is None else [transducer["type"]["number"], transducer["serialNumber"]]
+                for transducer in transducers]
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + ".json")
+
+    def _read(self, name):
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name, data):
+        # Written to a temporary file first, so a reader never sees half a file
+        temporary = self._path(name) + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(temporary, self._path(name))
+
+    def load(self, key):
+        """
+        Returns the entry of a module, or None if there is none or it has expired
+        """
+        entry = self._read(key)
+        if entry is None or (self.max_age is not None and time.time() - entry["saved"] > self.max_age):
+            return None
+        return entry
+
+    def lookup(self, ip):
+        """
+        Returns the entry of the module last set up at this IP, without asking the module
+        """
+        with self.lock:
+            index = self._read("index") or {}
+        key = index.get(ip)
+        return None if key is None else self.load(key)
+
+    def store(self, ip, module_info, default_setup, transducers):
+        key = self.key(module_info)
+        self._write(key, {"saved": time.time(), "module_info": module_info, "default_setup": default_setup,
+                          "transducers": transducers})
+        with self.lock:
+            index = self._read("index") or {}
+            index[ip] = key
+            self._write("index", index)
+
+    def invalidate(self, ip):
+        """
+        Removes the entry of the module at this IP
+        """
+        with self.lock:
+            index = self._read("index") or {}
+            key = index.pop(ip, None)
+            self._write("index", index)
+        if key is not None and os.path.exists(self._path(key)):
+            os.remove(self._path(key))
@@ -1,59 +1,142 @@
 from openapi.openapi_header import *
 from openapi.openapi_stream import *
-import socket
-import requests
 import asyncio
 import numpy as np
-from.Buffer import DataBuffer
+import time
+from.import utility as utility
+from.Buffer import channelBuffer
+from.AsyncStream import StreamClient
+from.Rest import RestClient
+from.Interpretation import InterpretationRegistry
+from openapi.openapi_fast import FrameSelector
 
 class streamHandler:
-    def __init__(self, LanXI):
+    def __init__(self, LanXI, batched=False):
+        """
+        Args:
+            LanXI: LanXI with the stream set up
+            batched: parse everything received in one read as a batch instead of frame by frame. Recommended for high channel counts.
+        """
         self.lanxi = LanXI
+        self.batched = batched
         self.ip = LanXI.ip
         self.inputport = LanXI.inputport
         self.host = "http://" + self.ip
+        # REST calls share the connection of the LanXI when it has one
+        self.rest = getattr(LanXI, "rest", None) or RestClient(self.ip)
+        # One buffer per enabled channel, the stream and the consumers run in separate threads
+        self.buffer = channelBuffer(len(LanXI.channels), 2**16, threadsafe=True)
+        # Module time in seconds just after the newest sample of each channel, taken from the package headers
+        self.end_time = np.zeros(len(LanXI.channels))
+        self.samples_received = 0
+        self.start_time = None
+        # Scale factor, offset, unit etc. of each signal
+        self.interpretations = InterpretationRegistry(len(LanXI.channels))
+        self.consumers = []
+        self.loop = None
+
+    def addConsumer(self, consumer):
+        """
+        Registers a function which is called with a (channels, samples) array of scaled data for every signal package,
+        e.g. Recorder.append to record the stream to disk
+        """
+        self.consumers.append(consumer)
 
     def startStream(self):
-        self.StreamRun = True
+        """
+        Runs the stream on its own event loop until it is stopped. To run several streams on one loop, await runStream() instead.
+        """
         asyncio.run(self.runStream())
-        self.loop = asyncio.get_event_loop()
-        self.loop.close()
 
     def stopStream(self):
-        requests.put(self.host + "/rest/rec/measurements/stop")
-        requests.put(self.host + "/rest/rec/finish")
-        requests.put(self.host + "/rest/rec/close")
+        self.rest.put("/rest/rec/measurements/stop")
+        self.rest.put("/rest/rec/finish")
+        self.rest.put("/rest/rec/close")
         self.StreamRun = False
-        self.s.close()
- 
+        # The client belongs to the stream's event loop, which may run in another thread
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.client.close)
+
     async def runStream(self):
+        self.StreamRun = True
+        self.interpretations = InterpretationRegistry(self.buffer.channels)
+        # Stream and parse data. Waiting for data does not block the event loop.
+        # Only signal data of the enabled channels and their interpretations are decoded
+        selector = FrameSelector({OpenapiStream.Header.EMessageType.e_signal_data, OpenapiStream.Header.EMessageType.e_interpretation},
+                                 range(1, self.buffer.channels + 1))
+        self.client = StreamClient(self.ip, self.inputport, selector=selector)
         self.loop = asyncio.get_running_loop()
-        self.interpretations = [{},{},{},{},{},{}]
-        # Stream and parse data
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as self.s:
-            self.s.connect((self.ip, self.inputport))
-            while True and self.runStream:
-            # First get the header of the data
-                data = self.s.recv(28)
-                wstream = OpenapiHeader.from_bytes(data)
-                content_length = wstream.content_length + 28
-                # We use the header's content_length to collect the rest of a package
-                while len(data) < content_length:
-                    packet = self.s.recv(content_length - len(data))
-                    data += packet  
-                # Here we parse the data
-                package = OpenapiStream.from_bytes(data)
-                self.PackageHandler(package)
-
-    
+        self.start_time = time.monotonic()
+        async with self.client:
+            if self.batched:
+                async for batch in self.client.batches(selector.signal_ids):
+                    if not self.StreamRun:
+                        break
+                    self.BatchHandler(batch)
+            else:
+                async for package in self.client:
+                    if not self.StreamRun:
+                        break
+                    self.PackageHandler(package)
+
+    def Interpret(self, interpretations):
+        self.interpretations.update(interpretations)
+
+    def Scale(self, raw):
+        """
+        Converts the raw samples of each channel to engineering units. When every channel got the same number of samples
+        they are converted as one (channels, samples) block, otherwise channel by channel, with None for channels without samples.
+        """
+        if not any(samples is None for samples in raw) and len(set(map(len, raw))) == 1:
+            # The samples are cast while they are stacked, and then converted in place
+            block = np.stack(raw, out=np.empty((len(raw), len(raw[0]))))
+            return self.interpretations.convert(block, out=block)
+        return [None if samples is None else self.interpretations.convert_signal(channel + 1, samples)
+                for channel, samples in enumerate(raw)]
+
+    def Append(self, block, start_time):
+        """
+        Adds the scaled samples of each channel to its buffer, start_time is the module time of the first sample
+        """
+        for channel, samples in enumerate(block):
+            if samples is not None:
+                self.buffer.append(channel, samples)
+                self.end_time[channel] = start_time + len(samples) / self.lanxi.sample_rate
+                self.samples_received += len(samples)
+
+    def Deliver(self, block):
+        """
+        Calls the consumers with all channels as one block, if every channel got the same number of samples
+        """
+        if self.consumers and isinstance(block, np.ndarray):
+            for consumer in self.consumers:
+                consumer(block)
+
+    def BatchHandler(self, batch):
+        """
+        Handles a BatchResult from openapi_fast.parse_buffer. Interpretations in the batch are applied before its samples are scaled.
+        """
+        self.Interpret(batch.interpretations)
+        if batch.time_count is None:
+            return
+        # The batch starts at the time of its first signal package
+        batch_time = utility.time_format_to_utc(batch.time_count, batch.time_family)
+        block = self.Scale([batch.signals.get(signal_id) for signal_id in range(1, self.buffer.channels + 1)])
+        self.Append(block, batch_time)
+        self.Deliver(block)
+
     def PackageHandler(self, package):
           if(package.header.message_type == OpenapiStream.Header.EMessageType.e_interpretation):
-                    for interpretation in package.content.interpretations:
-                        self.interpretations[interpretation.signal_id - 1][interpretation.descriptor_type] = interpretation.value
+                    self.Interpret(package.content.interpretations)
           if(package.header.message_type == OpenapiStream.Header.EMessageType.e_signal_data): # If the data contains signal data
+                    # The header holds the time of the first sample in the package
+                    package_time = utility.time_format_to_utc(package.header.time_count, package.header.time_family)
+                    raw = [None] * self.buffer.channels
                     for signal in package.content.signals: # For each signal in the package
-                        if signal != None:
-                            if self.lanxi.channels[signal.signal_id - 1] != None:
-                                scale_factor = self.interpretations[signal.signal_id - 1][OpenapiStream.Interpretation.EDescriptorType.scale_factor]
-                                scale_factor = self.interpretations[0][OpenapiStream.Interpretation.EDescriptorType.scale_factor]
-                                DataBuffer.append(((np.array(list(map(lambda x: x.calc_value, signal.values)))) * scale_factor) / 2 ** 23)
+                        if signal != None and signal.signal_id <= self.buffer.channels:
+                            raw[signal.signal_id - 1] = signal.samples
+                    # Each channel is scaled with its own scale factor and offset, and kept in its own buffer
+                    block = self.Scale(raw)
+                    self.Append(block, package_time)
+                    # Consumers get all channels of the package as one block
+                    self.Deliver(block)
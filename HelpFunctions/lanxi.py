@@ -1,42 +1,104 @@
-import requests
+import copy
 from.import utility as utility
+from.Rest import RestClient
+from.SetupCache import SetupCache
 
 class LanXI:
-    def __init__(self, ip):
+    # The steps of setup_stream in order, as (name, method). BringUp runs each step on many modules at once.
+    phases = [("open", "Open"), ("info", "GetModuleInfo"), ("teds", "GetTeds"), ("create", "CreateRecording"),
+              ("configure", "ConfigureChannels"), ("start", "StartMeasurement")]
+
+    def __init__(self, ip, cache=None, trust_cache=False):
+        """
+        Args:
+            ip: IP of the module
+            cache: SetupCache of module info, default setup and TEDS, None to ask the module every time
+            trust_cache: use the cached entry of this IP without asking the module, for a rig known not to have changed
+        """
         self.ip = ip
         self.host = "http://" + self.ip
+        # One keep-alive connection for all REST calls to the module
+        self.rest = RestClient(ip)
+        self.cache = cache
+        self.trust_cache = trust_cache
+        self.cached = None
+        # Whether anything was asked from the module which the cache entry could have answered
+        self.fetched = False
         
     def setup_stream(self):
         """
         Setup of channel 1 with a microphone
         """
         # This setup is indentical to the one found in "Streaming.py", refer to this for more info.
+        # Open the recorder, get information about the device and configure 
+        for name, method in self.phases:
+            getattr(self, method)()
+
+
+    def Open(self):
         # Open recorder application
-        requests.put(self.host + "/rest/rec/open")
-        # Get information about the device and configure 
-        self.GetTeds()
-        self.ConfigureStream()
-        self.GetFs()
+        self.response = self.rest.put("/rest/rec/open")
+
+
+    def GetModuleInfo(self):
+        # The module info identifies the module, and with it the cache entry to use
+        self.fetched = False
+        if self.cache is not None and self.trust_cache:
+            self.cached = self.cache.lookup(self.ip)
+        if self.cached is not None:
+            self.module_info = self.cached["module_info"]
+            return
+        self.response = self.rest.get("/rest/rec/module/info")
+        self.module_info = self.response.json()
+        if self.cache is not None:
+            self.cached = self.cache.load(SetupCache.key(self.module_info))
 
 
     def GetTeds(self):
+        if self.cached is not None:
+            if self.trust_cache:
+                self.channels = copy.deepcopy(self.cached["transducers"])
+                self.transducers = list(self.channels)
+                return
+            # Skip the detection if the module still reports the transducers which were detected when the entry was stored.
+            # The module reports the result of its last detection, so a transducer changed since then is not noticed here.
+            self.response = self.rest.get("/rest/rec/channels/input/all/transducers")
+            self.channels = self.response.json()
+            if SetupCache.identities(self.channels) == SetupCache.identities(self.cached["transducers"]):
+                self.transducers = list(self.channels)
+                return
+        self.fetched = True
         # Start TEDS detection, we then check when it is done and read it out as JSON
         # Detect TEDS
-        self.response = requests.post(self.host + "/rest/rec/channels/input/all/transducers/detect")
-        while requests.get(self.host + "/rest/rec/onchange").json()["transducerDetectionActive"]:
-            pass
+        self.response = self.rest.post("/rest/rec/channels/input/all/transducers/detect")
+        self.rest.wait_onchange("transducerDetectionActive")
         # Get TEDS information
-        self.response = requests.get(self.host + "/rest/rec/channels/input/all/transducers")
+        self.response = self.rest.get("/rest/rec/channels/input/all/transducers")
         self.channels = self.response.json()
+        self.transducers = list(self.channels)
 
 
     def ConfigureStream(self):
-        # To start a stream we first need to set a configuration. In this example we create a configuration by requesting a default channel setup. We use a tiny utility function to update all values with a given key.
+        self.CreateRecording()
+        self.ConfigureChannels()
+        self.StartMeasurement()
+
+
+    def CreateRecording(self):
         # Create a new recording
-        self.response = requests.put(self.host + "/rest/rec/create")
-        # Get Default setup for channels
-        self.response = requests.get(self.host + "/rest/rec/channels/input/default")
-        self.setup = self.response.json()
+        self.response = self.rest.put("/rest/rec/create")
+
+
+    def ConfigureChannels(self):
+        # To start a stream we first need to set a configuration. In this example we create a configuration by requesting a default channel setup. We use a tiny utility function to update all values with a given key.
+        # Get Default setup for channels, it only depends on the module and its firmware
+        if self.cached is not None:
+            self.default_setup = self.cached["default_setup"]
+        else:
+            self.response = self.rest.get("/rest/rec/channels/input/default")
+            self.default_setup = self.response.json()
+            self.fetched = True
+        self.setup = copy.deepcopy(self.default_setup)
         # Replace stream destination from default SD card to socket
         utility.update_value("destinations", ["socket"], self.setup)
         # Set enabled to false for all channels
@@ -55,11 +117,18 @@ class LanXI:
         # Next we setup the input channels for streaming. We use the input setup we got previosly.
         # Create input channels with the setup
 
-        self.response = requests.put(self.host + "/rest/rec/channels/input", json = self.setup)
+        self.response = self.rest.put("/rest/rec/channels/input", json = self.setup)
+        self.GetFs()
+        # Only a new entry is stored, so an entry expires max_age after it was fetched and not after it was last used
+        if self.cache is not None and self.fetched:
+            self.cache.store(self.ip, self.module_info, self.default_setup, self.transducers)
+
+
+    def StartMeasurement(self):
         # Get streaming socket
-        self.response = requests.get(self.host + "/rest/rec/destination/socket")
+        self.response = self.rest.get("/rest/rec/destination/socket")
         self.inputport = self.response.json()["tcpPort"]
-        self.response = requests.post(self.host + "/rest/rec/measurements")
+        self.response = self.rest.post("/rest/rec/measurements")
 
 
     def GetFs(self):
@@ -68,8 +137,6 @@ class LanXI:
         bandwidth = self.setup["channels"][0]["bandwidth"]
         bandwidth = bandwidth.replace('kHz', '*1000')
         bandwidth = eval(bandwidth)
-        self.response = requests.get(self.host + "/rest/rec/module/info")
-        module_info = self.response.json()
-        supported_sample_rates = module_info["supportedSampleRates"]
+        supported_sample_rates = self.module_info["supportedSampleRates"]
         # Find the sample rate with the minimum difference to bandwidth * 2
         self.sample_rate = min(supported_sample_rates, key = lambda x:abs(x - bandwidth * 2))
\ No newline at end of file
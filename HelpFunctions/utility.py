@@ -19,7 +19,7 @@ def dbfft(x, fs, win=None, ref=32768):
     """
     Calculate spectrum in dB scale
     Args:
-        x: input signal
+        x: input signal, or a (channels, N) array to transform each channel
         fs: sampling frequency
         win: vector containing window samples (same length as x).
              If not provided, then rectangular window is used by default.
@@ -30,16 +30,16 @@ def dbfft(x, fs, win=None, ref=32768):
         s_db: spectrum in dB scale
     """
 
-    N = len(x)  # Length of input sequence
+    N = np.shape(x)[-1]  # Length of input sequence
 
     if win is None:
-        win = np.ones(1, N)
-    if len(x) != len(win):
+        win = np.ones(N)
+    if N != len(win):
             raise ValueError('Signal and window must be of the same length')
     x = x * win
 
     # Calculate real FFT and frequency vector
-    sp = np.fft.rfft(x)
+    sp = np.fft.rfft(x, axis=-1)
     freq = np.arange((N / 2) + 1) / (float(N) / fs)
 
     # Scale the magnitude of FFT by window and factor of 2,
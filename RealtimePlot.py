@@ -1,7 +1,9 @@
 from HelpFunctions.lanxi import LanXI
 from HelpFunctions.Stream import streamHandler
-from HelpFunctions.Buffer import DataBuffer
-import HelpFunctions.utility as utility
+from fft_utils import WelchAccumulator
+from HelpFunctions.Decimator import Decimator
+from HelpFunctions.Buffer import buffer
+from HelpFunctions.Rendering import pixel_width, linear_edges, minmax_envelope, envelope_x, reduce_max
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import numpy as np
@@ -17,18 +19,27 @@ class FigHandler:
     def __init__(self):
         self.ChunkToShow = 2**12
         self.fftSize = self.ChunkToShow
-
-        # Used to store "old" spectrums for fft averaging 
-        self.old  = 0
-        self.oldold = 0
+        # The time plot does not need every sample, it shows channel 1 at a quarter of the sample rate
+        self.decimation = 4
+        self.timePoints = self.ChunkToShow // self.decimation
+        self.timeBuffer = buffer(self.timePoints, threadsafe=True)
+        self.decimator = Decimator(self.decimation, sample_rate=Lanxi.sample_rate)
+        self.decimator.addConsumer(self.timeBuffer.append)
+        streamer.addConsumer(lambda block: self.decimator.append(block[0]))
+
+        # Averaged spectrum of channel 1, updated by the stream with every package
+        self.spectrum = WelchAccumulator(Lanxi.sample_rate, nperseg=self.fftSize, noverlap=self.fftSize // 2,
+                                         window='hamming', scaling='spectrum', averaging='exponential', averages=3)
+        streamer.addConsumer(lambda block: self.spectrum.append(block[0]))
 
         ## Figures        
         self.fig, (self.ax1, self.ax2) = plt.subplots(2,1)
-        axis = np.arange(self.ChunkToShow)
-        axis = np.flip(axis * -1/Lanxi.sample_rate)
+        axis = np.arange(self.timePoints)
+        axis = np.flip(axis * -1/self.decimator.sample_rate)
+        self.timeAxis = axis
 
         # Subplot1 Time data
-        self.line1, = self.ax1.plot(axis, np.arange(self.ChunkToShow))
+        self.line1, = self.ax1.plot(axis, np.arange(self.timePoints))
         self.ax1.set_xlim(left=np.min(axis), right=np.max(axis))
         self.ax1.set_ylim(bottom=-2, top=2)
         self.ax1.grid()
@@ -38,33 +49,45 @@ class FigHandler:
         # Subplot 2 (FFT) 
         # Calculate the frequency vector 
         freq = np.arange((self.fftSize / 2) + 1) / (float(self.fftSize) / Lanxi.sample_rate)
+        self.freq = freq
         self.line2, = self.ax2.plot(freq, np.arange(len(freq)))
         self.ax2.set_xlim(left = 0, right=np.max(freq))
         self.ax2.set_ylim(bottom=-20, top=130)
         self.ax2.grid()
         self.ax2.set_xlabel("Frequency [Hz]")
         self.ax2.set_ylabel("Amplitude [dB SPL]")
-        # Window for the fft
-        self.win = np.hamming(self.fftSize)
 
         # Ensures we can see all labels etc.
         self.fig.tight_layout()
+        self.setEdges()
         # Call StopStream() method when figure is closed
         self.fig.canvas.mpl_connect('close_event', on_close)
+        self.fig.canvas.mpl_connect('resize_event', self.onResize)
+
+    def setEdges(self):
+        # Only as many points as there are pixels are drawn, the time trace as a min/max envelope and the spectrum as the peak per pixel
+        self.timeEdges = linear_edges(self.timePoints, pixel_width(self.ax1))
+        self.line1.set_data(envelope_x(self.timeAxis, self.timeEdges), np.zeros(2 * len(self.timeEdges)))
+        self.freqEdges = linear_edges(len(self.freq), pixel_width(self.ax2))
+        self.line2.set_data(self.freq[self.freqEdges], np.zeros(len(self.freqEdges)))
+
+    def onResize(self, event):
+        # The axes have a new width in pixels. The animation grabs a new blit background on the full redraw which follows.
+        self.setEdges()
+        self.fig.canvas.draw_idle()
 
     def _update(self, i):
         # Update the time domain subplot1
-        self.line1.set_ydata(DataBuffer.getPart(self.ChunkToShow))
+        self.line1.set_ydata(minmax_envelope(self.timeBuffer.get(), self.timeEdges))
         # Update the frequency domain subplot2
-        freq, s_dbfs = utility.dbfft(DataBuffer.getPart(self.fftSize), Lanxi.sample_rate, self.win, ref = 20 * 10**(-6)) #Reference = 20uPa
-        # Avearege the fft for a smoother plot 
-        self.line2.set_ydata(s_dbfs/3 + self.old/3 + self.oldold/3)
-        self.oldold = self.old
-        self.old = s_dbfs
+        freq, s_dbfs = self.spectrum.psd_db(ref = 20 * 10**(-6)) #Reference = 20uPa
+        self.line2.set_ydata(reduce_max(s_dbfs, self.freqEdges))
+        # Only the lines are redrawn
+        return self.line1, self.line2
 
 
     def startAnimation(self):
-        self.ani = FuncAnimation(self.fig, self._update, interval=100)
+        self.ani = FuncAnimation(self.fig, self._update, interval=100, blit=True, cache_frame_data=False)
 
 # Create the stream and Rx data
 streamer = streamHandler(Lanxi)
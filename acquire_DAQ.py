@@ -1,26 +1,27 @@
 def acquire_loopback_5seconds():
-    import requests
+    from HelpFunctions.Rest import RestClient
     import socket
-    import numpy as np
-    from openapi.openapi_header import *
-    from openapi.openapi_stream import *
+    from openapi.openapi_stream import OpenapiStream
+    from openapi.openapi_fast import parse_frame
+    from HelpFunctions.FrameReader import FrameReader
+    from HelpFunctions.Interpretation import InterpretationRegistry
     import HelpFunctions.utility as utility
     
     # Hardcoded parameters (like in loopback.py)
     ip = "169.254.230.53"  # Default LAN-XI IP
     sample_rate = 51200     # Default sample rate
-    host = f"http://{ip}"
+    rest = RestClient(ip)
     
     # Close recorder application if already open
-    requests.put(host + "/rest/rec/close")
+    rest.put("/rest/rec/close")
     # Open recorder application
-    requests.put(host + "/rest/rec/open")
+    rest.put("/rest/rec/open")
     # Get module info
-    requests.get(host + "/rest/rec/module/info")
+    rest.get("/rest/rec/module/info")
     # Create a new recording
-    requests.put(host + "/rest/rec/create")
+    rest.put("/rest/rec/create")
     # Get Default setup for channels
-    response = requests.get(host + "/rest/rec/channels/input/default")
+    response = rest.get("/rest/rec/channels/input/default")
     setup = response.json()
     # Replace stream destination from default SD card to socket
     utility.update_value("destinations", ["socket"], setup)
@@ -30,50 +31,121 @@ def acquire_loopback_5seconds():
     setup["channels"][0]["enabled"] = True
     
     # Create input channels with the setup
-    response = requests.put(host + "/rest/rec/channels/input", json=setup)
+    response = rest.put("/rest/rec/channels/input", json=setup)
     
     # Get streaming socket port
-    response = requests.get(host + "/rest/rec/destination/socket")
+    response = rest.get("/rest/rec/destination/socket")
     inputport = response.json()["tcpPort"]
     
     # Start measurement
-    response = requests.post(host + "/rest/rec/measurements")
+    response = rest.post("/rest/rec/measurements")
     
     # Hardcoded to collect 5 seconds of data
     N = sample_rate * 5  # Collect 5 seconds of samples
-    array = np.array([])
-    interpretations = [{}]
+    blocks = []
+    collected = 0
+    interpretations = InterpretationRegistry()
     
     # Stream and parse data
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.connect((ip, inputport))
-        while array.size <= N:
-            # First get the header of the data
-            data = s.recv(28)
-            wstream = OpenapiHeader.from_bytes(data)
-            content_length = wstream.content_length + 28
-            # We use the header's content_length to collect the rest of a package
-            while len(data) < content_length:
-                packet = s.recv(content_length - len(data))
-                data += packet
-            # Here we parse the data into a StreamPackage
-            package = OpenapiStream.from_bytes(data)
+        reader = FrameReader(s)
+        while collected <= N:
+            # The frame reader uses the header's content_length to collect a whole package
+            data = reader.read_frame()
+            # The module closed the connection
+            if data is None:
+                break
+            # Here we parse the data into a StreamPackage, the fast parser decodes it exactly once
+            package = parse_frame(data)
             if package.header.message_type == OpenapiStream.Header.EMessageType.e_interpretation:
-                for interpretation in package.content.interpretations:
-                    interpretations[interpretation.signal_id - 1][interpretation.descriptor_type] = interpretation.value 
-            # Parse the data again
-            package = OpenapiStream.from_bytes(data)
+                interpretations.update(package.content.interpretations)
             if package.header.message_type == OpenapiStream.Header.EMessageType.e_signal_data:
                 for signal in package.content.signals:
                     if signal != None:
                         sensitivity = 1
-                        array = np.append(array, np.array([x.calc_value * sensitivity for x in signal.values]))
+                        # Keep the blocks instead of growing one array with np.append
+                        blocks.append(signal.samples * sensitivity)
+                        collected += signal.number_of_values
     
     # Stop measurements
-    response = requests.put(host + "/rest/rec/measurements/stop")
+    response = rest.put("/rest/rec/measurements/stop")
     s.close()
     
     # No output, no plot, no print statements
 
 # Simply call the function with no parameters
-# acquire_loopback_5seconds()
\ No newline at end of file
+# acquire_loopback_5seconds()
+
+def acquire_data_loopback(ip, frequency, num_channels, minutes, path="acquired_data/data.npy", decimation=1):
+    """
+    Streams the first num_channels input channels for the given number of minutes to a .npy file on disk.
+    Blocks are written as they arrive, so memory use does not depend on the length of the recording.
+    The result can be opened with np.load(path, mmap_mode='r') and has shape (samples, channels).
+    With decimation above 1 the data is recorded at frequency / decimation, e.g. for long term trends.
+    """
+    from HelpFunctions.Rest import RestClient
+    import socket
+    import numpy as np
+    from openapi.openapi_stream import OpenapiStream
+    from openapi.openapi_fast import parse_frame
+    from HelpFunctions.FrameReader import FrameReader
+    from HelpFunctions.Recorder import Recorder
+    from HelpFunctions.Decimator import Decimator
+    from HelpFunctions.Interpretation import InterpretationRegistry
+    import HelpFunctions.utility as utility
+
+    rest = RestClient(ip)
+
+    # Close recorder application if already open
+    rest.put("/rest/rec/close")
+    # Open recorder application
+    rest.put("/rest/rec/open")
+    # Create a new recording
+    rest.put("/rest/rec/create")
+    # Get Default setup for channels
+    response = rest.get("/rest/rec/channels/input/default")
+    setup = response.json()
+    # Replace stream destination from default SD card to socket
+    utility.update_value("destinations", ["socket"], setup)
+    # Enable the first num_channels channels
+    utility.update_value("enabled", False, setup)
+    for channel in range(num_channels):
+        setup["channels"][channel]["enabled"] = True
+
+    # Create input channels with the setup
+    response = rest.put("/rest/rec/channels/input", json=setup)
+
+    # Get streaming socket port
+    response = rest.get("/rest/rec/destination/socket")
+    inputport = response.json()["tcpPort"]
+
+    # Start measurement
+    response = rest.post("/rest/rec/measurements")
+
+    N = int(frequency * 60 * minutes) // decimation  # Samples to collect per channel
+    interpretations = InterpretationRegistry(num_channels)
+
+    # Stream, parse and record data
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s, Recorder(path, num_channels) as recorder:
+        decimator = Decimator(decimation, num_channels)
+        decimator.addConsumer(recorder.append)
+        s.connect((ip, inputport))
+        reader = FrameReader(s)
+        while recorder.samples < N:
+            data = reader.read_frame()
+            if data is None:
+                break
+            package = parse_frame(data)
+            if package.header.message_type == OpenapiStream.Header.EMessageType.e_interpretation:
+                interpretations.update(package.content.interpretations)
+            if package.header.message_type == OpenapiStream.Header.EMessageType.e_signal_data:
+                # One package holds a block for each enabled channel, they are converted and recorded together
+                signals = package.content.signals
+                block = interpretations.convert(np.stack([signal.samples for signal in signals]), [signal.signal_id for signal in signals])
+                decimator.append(block)
+
+    # Stop measurements
+    rest.put("/rest/rec/measurements/stop")
+    rest.put("/rest/rec/finish")
+    rest.put("/rest/rec/close")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the stream parser and the acquisition pipeline.
+Measures header and package parse rates, decoding to NumPy, buffer appends and end to end samples per second
+through FrameReader and streamHandler, and reports the real time headroom for a given sample rate and channel count.
+Results can be saved with --save and compared against a saved baseline with --baseline to catch regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+from openapi.openapi_header import OpenapiHeader
+from openapi.openapi_stream import OpenapiStream
+from openapi.openapi_fast import parse_frame, parse_header, parse_buffer, FrameSelector
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, build_data_quality,
+                                    build_aux_sequence_data, MESSAGE_SIGNAL_DATA, MESSAGE_INTERPRETATION,
+                                    MESSAGE_DATA_QUALITY, MESSAGE_AUX_SEQUENCE_DATA, DATA_TYPE, SCALE_FACTOR,
+                                    OFFSET, UNIT)
+from HelpFunctions.Buffer import buffer, channelBuffer
+from HelpFunctions.FrameReader import FrameReader
+from HelpFunctions.AsyncStream import StreamClient
+from HelpFunctions.Stream import streamHandler
+
+def measure(function, min_time=0.2, repeat=3):
+    """
+    Returns the best time in seconds of one call of function
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        best = min(best, elapsed / calls)
+    return best
+
+def signal_frame(channels, number_of_values, time_count=0):
+    rng = np.random.default_rng(0)
+    signals = [(signal_id, rng.integers(-2**23, 2**23, number_of_values)) for signal_id in range(1, channels + 1)]
+    return build_frame(MESSAGE_SIGNAL_DATA, build_signal_data(signals), (11, 0, 2, 0), time_count)
+
+def interpretation_frame(channels):
+    interpretations = []
+    for signal_id in range(1, channels + 1):
+        interpretations += [(signal_id, DATA_TYPE, 3), (signal_id, SCALE_FACTOR, 10.0), (signal_id, OFFSET, 0.0),
+                            (signal_id, UNIT, "Pa")]
+    return build_frame(MESSAGE_INTERPRETATION, build_interpretations(interpretations))
+
+def data_quality_frame(channels):
+    return build_frame(MESSAGE_DATA_QUALITY, build_data_quality([(signal_id, 0) for signal_id in range(1, channels + 1)]))
+
+def aux_frame(messages):
+    return build_frame(MESSAGE_AUX_SEQUENCE_DATA, build_aux_sequence_data([(1, [(i, 0, 0, 8, 0x100, i) for i in range(messages)])]))
+
+def handler_for(channels, sample_rate):
+    """
+    Returns a streamHandler for a module which is not connected, with the interpretations already received
+    """
+    lanxi = SimpleNamespace(ip="127.0.0.1", inputport=0, channels=[{}] * channels, sample_rate=sample_rate)
+    handler = streamHandler(lanxi)
+    handler.PackageHandler(parse_frame(interpretation_frame(channels)))
+    return handler
+
+def bench_parsing(results, channels, values_list):
+    frame = signal_frame(channels, values_list[0])
+    results["header parse [frames/s]"] = 1 / measure(lambda: OpenapiHeader.from_bytes(frame[:28]))
+    results["fast header parse [frames/s]"] = 1 / measure(lambda: parse_header(frame))
+    for number_of_values in values_list:
+        frame = signal_frame(channels, number_of_values)
+        def parse_and_decode():
+            # The generated parser reads every sample as a Value object
+            for signal in OpenapiStream.from_bytes(frame).content.signals:
+                np.array([value.calc_value for value in signal.values])
+        seconds = measure(parse_and_decode)
+        results["signal parse and decode %d values [samples/s]" % number_of_values] = channels * number_of_values / seconds
+        # The fast parser always decodes the samples
+        seconds = measure(lambda: parse_frame(frame))
+        results["fast signal parse and decode %d values [samples/s]" % number_of_values] = channels * number_of_values / seconds
+    frame = interpretation_frame(channels)
+    results["interpretation parse [frames/s]"] = 1 / measure(lambda: OpenapiStream.from_bytes(frame))
+    results["fast interpretation parse [frames/s]"] = 1 / measure(lambda: parse_frame(frame))
+    frame = data_quality_frame(channels)
+    results["data quality parse [frames/s]"] = 1 / measure(lambda: OpenapiStream.from_bytes(frame))
+    results["fast data quality parse [frames/s]"] = 1 / measure(lambda: parse_frame(frame))
+    frame = aux_frame(64)
+    results["aux CAN parse 64 messages [frames/s]"] = 1 / measure(lambda: OpenapiStream.from_bytes(frame))
+    results["fast aux CAN parse 64 messages [frames/s]"] = 1 / measure(lambda: parse_frame(frame))
+    # A consumer which only wants signal data skips aux frames, and can pick a single signal
+    selector = FrameSelector({OpenapiStream.Header.EMessageType.e_signal_data})
+    results["selective skip of aux CAN frame [frames/s]"] = 1 / measure(lambda: selector.parse(frame))
+    frame = signal_frame(channels, values_list[-1])
+    selector = FrameSelector({OpenapiStream.Header.EMessageType.e_signal_data}, {1})
+    results["selective 1 of %d signals [frames/s]" % channels] = 1 / measure(lambda: selector.parse(frame))
+    results["fast all %d signals [frames/s]" % channels] = 1 / measure(lambda: parse_frame(frame))
+    # Batches of 64 frames as after one large recv_into
+    frames = b"".join(signal_frame(channels, values_list[0], i * values_list[0]) for i in range(64))
+    results["batch parse 64 frames of %d values [samples/s]" % values_list[0]] = 64 * channels * values_list[0] / measure(lambda: parse_buffer(frames))
+
+def bench_decoding(results, channels, number_of_values):
+    frame = signal_frame(channels, number_of_values)
+    def decode():
+        for signal in parse_frame(frame).content.signals:
+            signal.samples
+    def decode_values():
+        for signal in OpenapiStream.from_bytes(frame).content.signals:
+            np.array([value.calc_value for value in signal.values])
+    results["decode to NumPy [samples/s]"] = channels * number_of_values / measure(decode)
+    results["decode per Value object [samples/s]"] = channels * number_of_values / measure(decode_values)
+
+def bench_buffers(results, channels, number_of_values):
+    block = np.random.standard_normal(number_of_values)
+    ring = buffer(2**16)
+    results["buffer append [samples/s]"] = number_of_values / measure(lambda: ring.append(block))
+    rings = channelBuffer(channels, 2**16, threadsafe=True)
+    results["channelBuffer append [samples/s]"] = number_of_values / measure(lambda: rings.append(0, block))
+    data = np.zeros(2**16)
+    def np_append():
+        nonlocal data
+        data = np.append(data[-(2**16 - number_of_values):], block)
+    results["np.append baseline [samples/s]"] = number_of_values / measure(np_append)
+
+def stream_through(handler, channels, number_of_values, sample_rate, seconds, batched):
+    """
+    Streams frames through a local socket into FrameReader, the parser and the handler. Returns samples per second.
+    """
+    frames = [signal_frame(channels, number_of_values, i * number_of_values) for i in range(64)]
+    frames = b"".join(frames)
+    repeats = max(1, int(seconds * sample_rate / number_of_values / 64))
+    sender, receiver = socket.socketpair()
+    def send():
+        for _ in range(repeats):
+            sender.sendall(frames)
+        sender.close()
+    threading.Thread(target=send, daemon=True).start()
+    reader = FrameReader(receiver)
+    start = time.perf_counter()
+    if batched:
+        batch = reader.read_frames()
+        while batch is not None:
+            handler.BatchHandler(parse_buffer(batch))
+            batch = reader.read_frames()
+    else:
+        for frame in reader:
+            handler.PackageHandler(parse_frame(frame))
+    elapsed = time.perf_counter() - start
+    receiver.close()
+    return handler.samples_received / elapsed
+
+def async_batches(channels, number_of_values, chunk=2**16, size=2**20):
+    """
+    Feeds 64 frames per 64 kB chunks into a StreamReader and parses them with StreamClient.batches. Returns samples per second.
+    Covers the copy of each read into the reused batch buffer, without the socket.
+    """
+    frames = b"".join(signal_frame(channels, number_of_values, i * number_of_values) for i in range(64))
+    async def run():
+        client = StreamClient("127.0.0.1", 0)
+        client.reader = asyncio.StreamReader(limit=2 * len(frames))
+        for offset in range(0, len(frames), chunk):
+            client.reader.feed_data(frames[offset:offset + chunk])
+        client.reader.feed_eof()
+        async for batch in client.batches(size=size):
+            pass
+    return 64 * channels * number_of_values / measure(lambda: asyncio.run(run()))
+
+def bench_end_to_end(results, channels, number_of_values, sample_rate, seconds):
+    """
+    Streams frames through FrameReader and streamHandler, frame by frame and in batches
+    """
+    rate = stream_through(handler_for(channels, sample_rate), channels, number_of_values, sample_rate, seconds, False)
+    results["end to end [samples/s]"] = rate
+    results["real time headroom [x]"] = rate / (sample_rate * channels)
+    rate = stream_through(handler_for(channels, sample_rate), channels, number_of_values, sample_rate, seconds, True)
+    results["batched end to end [samples/s]"] = rate
+    results["batched real time headroom [x]"] = rate / (sample_rate * channels)
+    results["async batches [samples/s]"] = async_batches(channels, number_of_values)
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the results which are more than tolerance slower than the baseline and returns their number
+    """
+    regressions = 0
+    for name, value in results.items():
+        if name in baseline and value < baseline[name] * (1 - tolerance):
+            print(f"REGRESSION {name}: {value:.4g} < baseline {baseline[name]:.4g}")
+            regressions += 1
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Parser and pipeline benchmarks')
+    parser.add_argument('--channels', type=int, default=6, help='Number of channels')
+    parser.add_argument('--sample-rate', type=int, default=51200, help='Sample rate in Hz')
+    parser.add_argument('--values', type=str, default='64,256,1024', help='Comma-separated list of values per signal block')
+    parser.add_argument('--seconds', type=float, default=2.0, help='Seconds of stream data for the end to end test')
+    parser.add_argument('--save', type=str, default=None, help='Save results as JSON to this file')
+    parser.add_argument('--baseline', type=str, default=None, help='Compare against results saved with --save')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown against the baseline')
+    args = parser.parse_args()
+    values_list = [int(value.strip()) for value in args.values.split(',')]
+
+    results = {}
+    bench_parsing(results, args.channels, values_list)
+    bench_decoding(results, args.channels, values_list[-1])
+    bench_buffers(results, args.channels, values_list[-1])
+    bench_end_to_end(results, args.channels, values_list[-1], args.sample_rate, args.seconds)
+    for name, value in results.items():
+        print(f"{name:45s} {value:12.4g}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(results, json.load(f), args.tolerance):
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
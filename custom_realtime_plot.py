@@ -3,11 +3,19 @@ import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import socket
 import time
+import threading
+import queue
 import os
-from fft_utils import compute_pwelch
+from fft_utils import WelchAccumulator
 from openapi.openapi_header import *
 from openapi.openapi_stream import *
-import requests
+from openapi.openapi_fast import FrameSelector
+from HelpFunctions.Rest import RestClient
+from HelpFunctions.FrameReader import FrameReader
+from HelpFunctions.Buffer import buffer
+from HelpFunctions.Recorder import Recorder
+from HelpFunctions.Interpretation import InterpretationRegistry
+from HelpFunctions.Rendering import pixel_width, linear_edges, log_edges, minmax_envelope, envelope_x, reduce_max
 
 class CustomDataAcquisition:
     def __init__(self, ip, channels, frequency):
@@ -16,15 +24,16 @@ class CustomDataAcquisition:
         self.frequency = frequency
         self.sample_rate = frequency  # Placeholder; replace with actual logic
         self.host = f"http://{ip}"
+        self.rest = RestClient(ip)
         self.inputport = None
 
     def initialize_module(self):
         print(f"Initializing data acquisition on {self.ip} for channels {self.channels} at {self.frequency} Hz")
         try:
             # Open recorder application
-            requests.put(self.host + "/rest/rec/open")
+            self.rest.put("/rest/rec/open")
             # Get default channel setup
-            response = requests.get(self.host + "/rest/rec/channels/input/default")
+            response = self.rest.get("/rest/rec/channels/input/default")
             setup = response.json()
             # Disable all channels
             import HelpFunctions.utility as utility
@@ -33,13 +42,13 @@ class CustomDataAcquisition:
             for ch in self.channels:
                 setup["channels"][ch]["enabled"] = True
             # Create input channels with the setup
-            requests.put(self.host + "/rest/rec/channels/input", json=setup)
+            self.rest.put("/rest/rec/channels/input", json=setup)
             # Get streaming socket port
-            response = requests.get(self.host + "/rest/rec/destination/socket")
+            response = self.rest.get("/rest/rec/destination/socket")
             self.inputport = response.json()["tcpPort"]
             print(f"Input port set to {self.inputport}")
             # Start measurement
-            requests.post(self.host + "/rest/rec/measurements")
+            self.rest.post("/rest/rec/measurements")
         except Exception as e:
             print(f"Failed to initialize module: {e}")
             self.inputport = 50000  # fallback or test port
@@ -50,22 +59,35 @@ class CustomDataAcquisition:
         if hasattr(self, 'socket'):
             self.socket.close()
         try:
-            requests.put(self.host + "/rest/rec/measurements/stop")
-            requests.put(self.host + "/rest/rec/finish")
-            requests.put(self.host + "/rest/rec/close")
+            self.rest.put("/rest/rec/measurements/stop")
+            self.rest.put("/rest/rec/finish")
+            self.rest.put("/rest/rec/close")
         except Exception as e:
             print(f"Cleanup error: {e}")
 
 class RealTimePlotter:
-    def __init__(self, data_acquisition, save_data=False, save_path=None, chunk_size=2**12):
+    def __init__(self, data_acquisition, save_data=False, save_path=None, chunk_size=2**12, queue_size=256):
         self.data_acq = data_acquisition
+        # Blocks read by the acquisition thread wait here for the next frame of the plot. If the plot falls behind, blocks are
+        # dropped from the display only, they are still recorded.
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.frames_read = 0
+        self.overruns = 0
+        self.max_queue_depth = 0
+        self.acquisition = None
+        self.running = False
+        # Recorders are started and stopped from the GUI thread while the acquisition thread writes to them
+        self.recorder_lock = threading.Lock()
         self.chunk_size = chunk_size
-        self.buffer = np.zeros(self.chunk_size)
+        self.buffer = buffer(self.chunk_size)
+        # Only segments completed by new data are transformed, older segments fade out of the average
+        self.spectrum = WelchAccumulator(self.data_acq.sample_rate, nperseg=self.chunk_size, averaging='exponential', averages=4)
         self.start_time = None
         self.save_data = save_data
         self.save_path = save_path or "acquired_data"
-        self.collected_data = []
-        self.collected_timestamps = []
+        # Recorders write the collected data to disk while collecting
+        self.data_recorder = None
+        self.timestamp_recorder = None
         self.is_collecting = False
         self.fig, (self.ax1, self.ax2) = plt.subplots(2, 1)
         self.setup_plots()
@@ -74,92 +96,194 @@ class RealTimePlotter:
     def setup_plots(self):
         # Time axis in seconds for the time-domain plot
         self.time_axis = np.arange(self.chunk_size) / self.data_acq.sample_rate
-        self.line1, = self.ax1.plot(self.time_axis, np.zeros(self.chunk_size))
+        self.line1, = self.ax1.plot([], [])
         self.ax1.set_title("Time Domain")
         self.ax1.set_xlabel("Time [s]")
         self.ax1.set_ylabel("Voltage")
         self.ax1.grid(True)
+        # Acquisition counters, drawn with the lines
+        self.stats_text = self.ax1.text(0.01, 0.97, '', transform=self.ax1.transAxes, ha='left', va='top', fontsize=8)
 
-        # Frequency axis for the PSD plot (will be updated in update_plot)
-        freq_init = np.linspace(1, self.data_acq.sample_rate / 2, self.chunk_size // 2 + 1)
-        self.line2, = self.ax2.plot(freq_init, np.ones_like(freq_init))
+        self.line2, = self.ax2.plot([], [])
         self.ax2.set_title("PSD (Welch, dB)")
         self.ax2.set_xlabel("Frequency [Hz]")
         self.ax2.set_ylabel("Amplitude [dB]")
         self.ax2.set_xscale('log')
-        self.ax2.set_yscale('log')
         self.ax2.grid(True)
+        self.set_edges()
+        self.ax1.set_xlim(self.time_axis[0], self.time_axis[-1])
+        self.ax2.set_xlim(self.spectrum.freq[1], self.spectrum.freq[-1])
+
+    def set_edges(self):
+        """
+        Sets the bins the traces are reduced to, one per pixel of the current axes width
+        """
+        # The time trace is drawn as a min/max envelope with one bin per pixel
+        self.time_edges = linear_edges(self.chunk_size, pixel_width(self.ax1))
+        self.line1.set_data(envelope_x(self.time_axis, self.time_edges), np.zeros(2 * len(self.time_edges)))
+        # The PSD is drawn with the peak of logarithmically spaced bins, matching the log frequency axis
+        self.freq_edges = log_edges(len(self.spectrum.freq), pixel_width(self.ax2))
+        self.line2.set_data(self.spectrum.freq[self.freq_edges], np.zeros(len(self.freq_edges)))
+
+    def on_resize(self, event):
+        # The axes have a new width in pixels. The animation grabs a new blit background on the full redraw which follows.
+        self.set_edges()
+        self.fig.canvas.draw_idle()
 
     def setup_keyboard_controls(self):
         self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
+        self.fig.canvas.mpl_connect('resize_event', self.on_resize)
 
     def on_key_press(self, event):
         if event.key == 's':
             if not self.is_collecting:
-                self.is_collecting = True
-                self.collected_data = []
-                self.collected_timestamps = []
+                with self.recorder_lock:
+                    # The data file has a row per block, and is opened when the first block gives the length of the rows
+                    self.data_recorder = None
+                    self.timestamp_recorder = Recorder(os.path.join(self.save_path, "timestamps.npy"), channels=None)
+                    self.is_collecting = True
                 print("\nStarted collecting data...")
             else:
-                self.is_collecting = False
                 self.save_to_file()
                 print("\nStopped collecting data")
+            # The title is not redrawn by blitting, so the whole figure is redrawn
+            self.fig.suptitle('Recording...' if self.is_collecting else 'Press S to start recording',
+                              color='red' if self.is_collecting else 'black')
+            self.fig.canvas.draw_idle()
         elif event.key == 'q':
             plt.close()
 
     def save_to_file(self):
-        if not self.collected_data:
-            print("No data to save")
-            return
-        if not os.path.exists(self.save_path):
-            os.makedirs(self.save_path)
-        np.save(os.path.join(self.save_path, "data.npy"), np.array(self.collected_data))
-        np.save(os.path.join(self.save_path, "timestamps.npy"), np.array(self.collected_timestamps))
+        with self.recorder_lock:
+            self.is_collecting = False
+            if self.data_recorder is None:
+                if self.timestamp_recorder is not None:
+                    self.timestamp_recorder.close()
+                    os.remove(self.timestamp_recorder.path)
+                    self.timestamp_recorder = None
+                print("No data to save")
+                return
+            # The data is already on disk, closing the recorders finishes the files
+            self.data_recorder.close()
+            self.timestamp_recorder.close()
+            self.data_recorder = None
+            self.timestamp_recorder = None
         print(f"Saved data to {self.save_path}")
 
-    def update_plot(self, frame):
-        try:
-            # Acquire data from the socket
-            data = self.socket.recv(28)
-            wstream = OpenapiHeader.from_bytes(data)
-            content_length = wstream.content_length + 28
-            while len(data) < content_length:
-                packet = self.socket.recv(content_length - len(data))
-                data += packet
-            package = OpenapiStream.from_bytes(data)
+    def acquire(self):
+        """
+        Reads the socket in a background thread, independent of the refresh rate of the plot
+        """
+        while self.running:
+            try:
+                data = self.reader.read_frame()
+            except OSError:
+                break
+            if data is None:
+                break
+            self.frames_read += 1
+            # Other packages are skipped without being parsed
+            package = self.selector.parse(data)
+            if package is None:
+                continue
+            if package.header.message_type == OpenapiStream.Header.EMessageType.e_interpretation:
+                self.interpretations.update(package.content.interpretations)
+                continue
             for signal in package.content.signals:
                 if signal is not None:
-                    new_data = np.array(list(map(lambda x: x.calc_value, signal.values)))
-                    self.buffer = np.roll(self.buffer, -len(new_data))
-                    self.buffer[-len(new_data):] = new_data
-                    if self.is_collecting:
-                        self.collected_data.append(new_data.copy())
-                        self.collected_timestamps.append(time.time())
+                    new_data = self.interpretations.convert_signal(signal.signal_id, signal.samples)
+                    with self.recorder_lock:
+                        if self.is_collecting:
+                            if self.data_recorder is None:
+                                self.data_recorder = Recorder(os.path.join(self.save_path, "data.npy"),
+                                                              channels=len(new_data))
+                            # One row per block, as data.npy has always been
+                            self.data_recorder.append(new_data[:, np.newaxis])
+                            self.timestamp_recorder.append([time.time()])
+                    try:
+                        self.queue.put_nowait(new_data)
+                    except queue.Full:
+                        # The plot is the bottleneck, not the acquisition
+                        self.overruns += 1
+                    self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        self.running = False
+
+    def update_plot(self, frame):
+        try:
+            # Take everything which arrived since the last frame
+            while True:
+                try:
+                    new_data = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.buffer.append(new_data)
+                self.spectrum.append(new_data)
+            self.stats_text.set_text(f"frames {self.frames_read}  queue {self.queue.qsize()}/{self.queue.maxsize}  "
+                                     f"overruns {self.overruns}")
             # Update time-domain plot
-            self.line1.set_xdata(self.time_axis)
-            self.line1.set_ydata(self.buffer)
+            envelope = minmax_envelope(self.buffer.get(), self.time_edges)
+            self.line1.set_ydata(envelope)
+            self.rescale(self.ax1, envelope)
             # Update frequency-domain plot (Welch PSD)
-            freq, fft_db = compute_pwelch(self.buffer, self.data_acq.sample_rate, nperseg=self.chunk_size)
-            self.line2.set_xdata(freq)
-            self.line2.set_ydata(fft_db)
-            self.fig.suptitle('Recording...' if self.is_collecting else 'Press S to start recording', 
-                              color='red' if self.is_collecting else 'black')
-            return self.line1, self.line2
+            freq, fft_db = self.spectrum.psd_db()
+            peaks = reduce_max(fft_db, self.freq_edges)
+            self.line2.set_ydata(peaks)
+            self.rescale(self.ax2, peaks)
+            return self.line1, self.line2, self.stats_text
         except Exception as e:
             print(f"Error in update_plot: {e}")
-            return self.line1, self.line2
+            return self.line1, self.line2, self.stats_text
+
+    def rescale(self, ax, values):
+        """
+        Widens the y limits when the data leaves them. Blitting only redraws the lines, so the whole figure is redrawn then.
+        """
+        low, high = ax.get_ylim()
+        value_min, value_max = np.min(values), np.max(values)
+        if value_min < low or value_max > high:
+            low, high = min(value_min, low), max(value_max, high)
+            margin = 0.1 * (high - low)
+            ax.set_ylim(low - margin, high + margin)
+            self.fig.canvas.draw_idle()
 
     def start_plotting(self):
-    # Open socket connection
-    self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    self.socket.connect((self.data_acq.ip, self.data_acq.inputport))
-    # Set refresh interval to match chunk size
-    interval = int((self.chunk_size / self.data_acq.sample_rate) * 1000)
-    self.fig.suptitle('Press S to start recording', color='black')
-    self.fig.text(0.99, 0.01, 'S: Start/Stop Recording | Q: Quit', 
-                  ha='right', va='bottom', fontsize=8)
-    self.ani = FuncAnimation(self.fig, self.update_plot, interval=interval)  # <-- fix here
-    plt.show()
+        # Open socket connection
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.connect((self.data_acq.ip, self.data_acq.inputport))
+        self.reader = FrameReader(self.socket)
+        self.selector = FrameSelector({OpenapiStream.Header.EMessageType.e_signal_data,
+                                       OpenapiStream.Header.EMessageType.e_interpretation})
+        # Scale factor and offset of each signal, the plot shows volts
+        self.interpretations = InterpretationRegistry()
+        self.running = True
+        self.acquisition = threading.Thread(target=self.acquire, daemon=True)
+        self.acquisition.start()
+        # Set refresh interval to match chunk size
+        interval = int((self.chunk_size / self.data_acq.sample_rate) * 1000)
+        self.fig.suptitle('Press S to start recording', color='black')
+        self.fig.text(0.99, 0.01, 'S: Start/Stop Recording | Q: Quit', 
+                      ha='right', va='bottom', fontsize=8)
+        # Blitting redraws only the two lines on each frame
+        self.ani = FuncAnimation(self.fig, self.update_plot, interval=interval, blit=True, cache_frame_data=False)
+        plt.show()
+
+    def stop(self):
+        """
+        Stops the acquisition thread, finishes a running recording and prints the counters
+        """
+        self.running = False
+        # Shutdown wakes the acquisition thread if it is waiting for data
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+        if self.acquisition is not None:
+            self.acquisition.join()
+        if self.is_collecting:
+            self.save_to_file()
+        print(f"Read {self.frames_read} frames, {self.overruns} blocks dropped from the display, "
+              f"largest queue depth {self.max_queue_depth} of {self.queue.maxsize}")
 
 def run_custom_realtime_plot(ip_address, channels, frequency, acq_time,
                              chunk_size=8192, save_path="acquired_data"):
@@ -169,4 +293,7 @@ def run_custom_realtime_plot(ip_address, channels, frequency, acq_time,
     data_acq = CustomDataAcquisition(ip_address, channels, frequency)
     data_acq.initialize_module()
     plotter = RealTimePlotter(data_acq, save_data=True, save_path=save_path, chunk_size=chunk_size)
-    plotter.start_plotting()
\ No newline at end of file
+    plotter.start_plotting()
+    # The window was closed
+    plotter.stop()
+    data_acq.cleanup()
\ No newline at end of file
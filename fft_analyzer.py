@@ -7,30 +7,19 @@ Provides functions for computing and plotting FFT of time-domain signals.
 import numpy as np
 import matplotlib.pyplot as plt
 from custom_realtime_plot import CustomDataAcquisition
-import requests
 import argparse
 from scipy.signal import welch
-from fft_utils import compute_pwelch
+from fft_utils import compute_pwelch, spectral_engine, StreamingSTFT
+from HelpFunctions.Recorder import read_blocks
 
 
 def compute_fft(data, sample_rate, window='hamming'):
     """
-    Compute FFT of time-domain data.
+    Compute FFT of time-domain data. A (channels, N) array is transformed per channel in one call.
     """
-    if window == 'hamming':
-        win = np.hamming(len(data))
-    elif window == 'hanning':
-        win = np.hanning(len(data))
-    elif window == 'blackman':
-        win = np.blackman(len(data))
-    elif window == 'rectangular':
-        win = np.ones(len(data))
-    else:
-        raise ValueError(f"Unsupported window type: {window}")
-    fft_data = np.fft.rfft(data * win)
-    fft_db = 20 * np.log10(np.abs(fft_data))
-    freq = np.fft.rfftfreq(len(data), 1/sample_rate)
-    return freq, fft_db
+    # Symmetric windows as np.hamming etc., which this has always used
+    engine = spectral_engine(sample_rate, np.shape(data)[-1], window, 'none', sym=True)
+    return engine.spectrum_db(data)
 
 def plot_fft(data, sample_rate, window='hamming', ax=None, **plot_kwargs):
     """
@@ -52,14 +41,9 @@ def plot_spectrogram(data, sample_rate, window_size=2**12, overlap=0.5, window='
     Compute and plot spectrogram of time-domain data.
     """
     plt.figure(figsize=(10, 6))
-    if window == 'hamming':
-        win = np.hamming(window_size)
-    elif window == 'hanning':
-        win = np.hanning(window_size)
-    elif window == 'blackman':
-        win = np.blackman(window_size)
-    else:
-        win = np.ones(window_size)
+    if window not in ('hamming', 'hanning', 'blackman'):
+        window = 'rectangular'
+    win = spectral_engine(sample_rate, window_size, window, sym=True).window
     plt.specgram(data, NFFT=window_size, Fs=sample_rate, window=win, 
                 noverlap=int(window_size*overlap), cmap='viridis')
     plt.xlabel('Time [s]')
@@ -67,6 +51,30 @@ def plot_spectrogram(data, sample_rate, window_size=2**12, overlap=0.5, window='
     plt.colorbar(label='Amplitude [dB]')
     plt.title('Spectrogram')
 
+def plot_spectrogram_file(path, sample_rate, channel=0, window_size=2**12, overlap=0.5, window='hamming',
+                          spectrogram_path=None, max_columns=2000):
+    """
+    Compute and plot the spectrogram of a recording made with Recorder, in constant memory.
+    The recording is read in blocks, and the time resolution is reduced so at most max_columns columns are computed.
+    Args:
+        spectrogram_path: .npy file to keep the spectrogram in, next to the recording if not given
+    """
+    samples = np.load(path, mmap_mode='r').shape[0]
+    step = window_size - int(window_size * overlap)
+    columns = max(1, (samples - window_size) // step + 1)
+    reduce = -(-columns // max_columns)
+    stft = StreamingSTFT(sample_rate, window_size, overlap, window, 'power', reduce=reduce)
+    if spectrogram_path is None:
+        spectrogram_path = path.replace('.npy', '') + '_spectrogram.npy'
+    stft.record(read_blocks(path, channel=channel), spectrogram_path)
+    spectrogram = np.load(spectrogram_path, mmap_mode='r')
+    times = stft.times()
+    plt.figure(figsize=(10, 6))
+    plt.pcolormesh(times, stft.freq, 10 * np.log10(np.asarray(spectrogram).T + 1e-20), cmap='viridis', shading='auto')
+    plt.xlabel('Time [s]')
+    plt.ylabel('Frequency [Hz]')
+    plt.colorbar(label='Amplitude [dB]')
+    plt.title('Spectrogram')
 
 def compute_pwelch(data, sample_rate, nperseg=None):
     """
@@ -108,9 +116,9 @@ def run_fft_analyzer(ip, channels, frequency):
         print(f"Error: {e}")
     finally:
         if 'data_acq' in locals():
-            requests.put(data_acq.host + "/rest/rec/measurements/stop")
-            requests.put(data_acq.host + "/rest/rec/finish")
-            requests.put(data_acq.host + "/rest/rec/close")
+            data_acq.rest.put("/rest/rec/measurements/stop")
+            data_acq.rest.put("/rest/rec/finish")
+            data_acq.rest.put("/rest/rec/close")
 
 def main():
     parser = argparse.ArgumentParser(description='FFT Analysis example')
@@ -1,4 +1,5 @@
 import numpy as np
+from functools import lru_cache
 
 def compute_pwelch(data, sample_rate, nperseg=1024, noverlap=None):
     """
@@ -9,4 +10,268 @@ def compute_pwelch(data, sample_rate, nperseg=1024, noverlap=None):
         noverlap = nperseg // 2
     freq, psd = welch(data, fs=sample_rate, nperseg=nperseg, noverlap=noverlap)
     psd_db = 10 * np.log10(psd)
-    return freq, psd_db
\ No newline at end of file
+    return freq, psd_db
+
+class WelchAccumulator:
+    def __init__(self, sample_rate, nperseg=1024, noverlap=None, channels=1, window='hann', scaling='density',
+                 averaging='linear', averages=8):
+        """
+        Welch PSD computed incrementally on a stream. Each append only transforms the overlapped segments completed
+        by the new data, and the averaged spectrum can be read at any time.
+        Linear averaging over the same data gives the same result as scipy.signal.welch.
+        The average is replaced and not changed in place, so it can be read from another thread than the one appending.
+        Args:
+            sample_rate: sample rate in Hz
+            nperseg: length of each segment
+            noverlap: overlap between segments, nperseg // 2 if not given
+            channels: number of channels. With 1 channel blocks and spectra are 1-D, otherwise (channels, n).
+            window: window name or array, as for scipy.signal.welch
+            scaling: 'density' for V**2/Hz or 'spectrum' for V**2
+            averaging: 'linear' averages all segments, 'exponential' weighs newer segments higher
+            averages: number of segments of the exponential time constant
+        """
+        from scipy.signal import get_window
+        if noverlap is None:
+            noverlap = nperseg // 2
+        if averaging not in ('linear', 'exponential'):
+            raise ValueError(f"Unsupported averaging: {averaging}")
+        self.sample_rate = sample_rate
+        self.nperseg = nperseg
+        self.step = nperseg - noverlap
+        self.channels = channels
+        self.averaging = averaging
+        self.alpha = 1.0 / averages
+        self.window = get_window(window, nperseg) if isinstance(window, str) else np.asarray(window, dtype=np.float64)
+        if scaling == 'density':
+            scale = 1.0 / (sample_rate * np.sum(self.window**2))
+        elif scaling == 'spectrum':
+            scale = 1.0 / np.sum(self.window)**2
+        else:
+            raise ValueError(f"Unsupported scaling: {scaling}")
+        # One-sided spectrum, all bins but DC and Nyquist hold the power of the negative frequencies as well
+        self.scale = np.full(nperseg // 2 + 1, 2 * scale)
+        self.scale[0] = scale
+        if nperseg % 2 == 0:
+            self.scale[-1] = scale
+        self.freq = np.fft.rfftfreq(nperseg, 1 / sample_rate)
+        self.reset()
+
+    def reset(self):
+        # Samples not yet part of a complete segment
+        self.tail = np.zeros((self.channels, 0))
+        self.average = np.zeros((self.channels, len(self.freq)))
+        self.segments = 0
+
+    def append(self, block):
+        """
+        Adds new samples, a 1-D array with 1 channel or a (channels, n) array
+        """
+        data = np.concatenate((self.tail, np.reshape(block, (self.channels, -1))), axis=1)
+        if data.shape[1] < self.nperseg:
+            self.tail = data
+            return
+        count = (data.shape[1] - self.nperseg) // self.step + 1
+        segments = np.lib.stride_tricks.sliding_window_view(data, self.nperseg, axis=1)[:, :count * self.step:self.step]
+        self.tail = data[:, count * self.step:]
+        # Same constant detrending as welch, then all segments of all channels in one transform
+        segments = segments - np.mean(segments, axis=2, keepdims=True)
+        power = np.abs(np.fft.rfft(segments * self.window, axis=2))**2 * self.scale
+        if self.averaging == 'linear':
+            self.average = (self.average * self.segments + np.sum(power, axis=1)) / (self.segments + count)
+        else:
+            # The first segments are averaged linearly until the time constant is reached
+            average = self.average
+            for index in range(count):
+                alpha = max(self.alpha, 1.0 / (self.segments + index + 1))
+                average = average + alpha * (power[:, index] - average)
+            self.average = average
+        self.segments += count
+
+    def psd(self):
+        """
+        Returns the frequency vector and the averaged spectrum
+        """
+        if self.channels == 1:
+            return self.freq, self.average[0]
+        return self.freq, self.average
+
+    def psd_db(self, ref=1.0):
+        """
+        Returns the frequency vector and the averaged spectrum in dB relative to ref, e.g. 20e-6 for dB SPL
+        """
+        freq, psd = self.psd()
+        return freq, 10 * np.log10(psd / ref**2 + 1e-20)
+
+
+# Supported window names and their scipy.signal.get_window names. get_window returns the periodic (DFT-even) window,
+# which spectral analysis needs, or with sym the symmetric one which np.hanning etc. return.
+window_functions = {
+    'hamming': 'hamming',
+    'hanning': 'hann',
+    'hann': 'hann',
+    'blackman': 'blackman',
+    'rectangular': 'boxcar',
+}
+
+class SpectralEngine:
+    def __init__(self, sample_rate, nfft, window='hamming', scaling='amplitude', dtype=np.float64, sym=False):
+        """
+        FFT of blocks of a fixed size. The window, its gains, the scaling and the frequency vector are computed once,
+        and a (channels, nfft) block is transformed in one batched rfft call.
+        Args:
+            sample_rate: sample rate in Hz
+            nfft: number of samples in each transform
+            window: window name from window_functions, or an array of nfft samples
+            scaling: 'none' for the raw magnitude, 'amplitude' for the RMS amplitude of a sine as utility.dbfft,
+                     'power' for V**2 or 'density' for V**2/Hz as scipy.signal.welch
+            dtype: np.float32 halves the memory and, with NumPy 2, transforms in single precision
+            sym: use the symmetric window of a named window instead of the periodic one, as np.hamming etc.
+        """
+        if isinstance(window, str):
+            from scipy.signal import get_window
+            if window not in window_functions:
+                raise ValueError(f"Unsupported window type: {window}")
+            window = get_window(window_functions[window], nfft, fftbins=not sym)
+        window = np.asarray(window, dtype=np.float64)
+        if len(window) != nfft:
+            raise ValueError('Window must have nfft samples')
+        self.sample_rate = sample_rate
+        self.nfft = nfft
+        self.scaling = scaling
+        self.dtype = dtype
+        self.window = window.astype(dtype)
+        self.coherent_gain = np.sum(window) / nfft
+        self.energy_gain = np.sum(window**2) / nfft
+        # Equivalent noise bandwidth in bins
+        self.enbw = self.energy_gain / self.coherent_gain**2
+        self.freq = np.fft.rfftfreq(nfft, 1 / sample_rate)
+        if scaling == 'none':
+            self.scale = None
+        elif scaling == 'amplitude':
+            # A float64 scalar would promote single precision spectra to double
+            self.scale = np.asarray(np.sqrt(2) / np.sum(window), dtype=dtype)
+        elif scaling in ('power', 'density'):
+            scale = 1 / np.sum(window)**2 if scaling == 'power' else 1 / (sample_rate * np.sum(window**2))
+            # One-sided, all bins but DC and Nyquist hold the power of the negative frequencies as well
+            self.scale = np.full(len(self.freq), 2 * scale, dtype=dtype)
+            self.scale[0] = scale
+            if nfft % 2 == 0:
+                self.scale[-1] = scale
+        else:
+            raise ValueError(f"Unsupported scaling: {scaling}")
+
+    def transform(self, block):
+        """
+        Returns the rfft of the windowed block, along the last axis of a (nfft,) or (channels, nfft) array
+        """
+        return np.fft.rfft(np.multiply(block, self.window, dtype=self.dtype), axis=-1)
+
+    def spectrum(self, block):
+        """
+        Returns the scaled magnitude, or power with 'power' and 'density' scaling, of the block
+        """
+        magnitude = np.abs(self.transform(block))
+        if self.scaling in ('power', 'density'):
+            return magnitude**2 * self.scale
+        if self.scaling == 'amplitude':
+            return magnitude * self.scale
+        return magnitude
+
+    def spectrum_db(self, block, ref=1.0):
+        """
+        Returns the frequency vector and the spectrum of the block in dB relative to ref
+        """
+        spectrum = self.spectrum(block)
+        if self.scaling in ('power', 'density'):
+            return self.freq, 10 * np.log10(spectrum / ref**2)
+        return self.freq, 20 * np.log10(spectrum / ref)
+
+@lru_cache(maxsize=32)
+def spectral_engine(sample_rate, nfft, window='hamming', scaling='amplitude', dtype=np.float64, sym=False):
+    """
+    Returns a shared SpectralEngine, so functions called for every block do not set one up each time
+    """
+    return SpectralEngine(sample_rate, nfft, window, scaling, dtype, sym)
+
+
+class StreamingSTFT:
+    def __init__(self, sample_rate, nfft=2**12, overlap=0.5, window='hamming', scaling='power', reduce=1,
+                 reduction='mean', dtype=np.float32):
+        """
+        Short time Fourier transform of a stream of blocks, producing spectrogram columns as soon as their segments are complete.
+        Only the samples of one unfinished segment are kept, so a spectrogram of any length runs in constant memory.
+        Args:
+            sample_rate: sample rate in Hz
+            nfft: samples in each segment
+            overlap: overlap between segments as a fraction of nfft
+            window: window name, see window_functions
+            scaling: scaling of the columns, see SpectralEngine
+            reduce: number of consecutive columns combined into one, to reduce the time resolution of long runs
+            reduction: 'mean' or 'max' of the combined columns
+            dtype: data type of the columns
+        """
+        if reduction not in ('mean', 'max'):
+            raise ValueError(f"Unsupported reduction: {reduction}")
+        self.engine = SpectralEngine(sample_rate, nfft, window, scaling, dtype)
+        self.sample_rate = sample_rate
+        self.nfft = nfft
+        self.step = nfft - int(nfft * overlap)
+        self.reduce = reduce
+        self.reduction = reduction
+        self.dtype = dtype
+        self.freq = self.engine.freq
+        self.tail = np.zeros(0, dtype=dtype)
+        # Columns waiting to be combined
+        self.pending = np.zeros((0, len(self.freq)), dtype=dtype)
+        self.columns = 0
+
+    def append(self, block):
+        """
+        Adds a 1-D block of samples and returns the (columns, bins) array of the columns it completed, which may be empty
+        """
+        data = np.concatenate((self.tail, np.asarray(block, dtype=self.dtype)))
+        count = (len(data) - self.nfft) // self.step + 1 if len(data) >= self.nfft else 0
+        if count:
+            segments = np.lib.stride_tricks.sliding_window_view(data, self.nfft)[:count * self.step:self.step]
+            spectra = self.engine.spectrum(segments).astype(self.dtype, copy=False)
+            self.pending = np.concatenate((self.pending, spectra))
+        self.tail = data[count * self.step:].copy()
+        ready = len(self.pending) // self.reduce * self.reduce
+        if self.reduce == 1:
+            columns = self.pending
+        else:
+            groups = self.pending[:ready].reshape(-1, self.reduce, len(self.freq))
+            columns = groups.mean(axis=1) if self.reduction == 'mean' else groups.max(axis=1)
+        self.pending = self.pending[ready:]
+        self.columns += len(columns)
+        return columns
+
+    def times(self, start=0, count=None):
+        """
+        Returns the time in seconds of the center of the columns from start, count columns or up to the newest one
+        """
+        if count is None:
+            count = self.columns - start
+        hop = self.step * self.reduce
+        return ((start + np.arange(count)) * hop + (self.nfft + (self.reduce - 1) * self.step) / 2) / self.sample_rate
+
+    def stream(self, blocks):
+        """
+        Yields the columns one by one for an iterable of blocks, e.g. from Recorder.read_blocks or a live stream
+        """
+        for block in blocks:
+            for column in self.append(block):
+                yield column
+
+    def record(self, blocks, path):
+        """
+        Writes the spectrogram of an iterable of blocks to a (columns, bins) .npy file, which can be read with
+        np.load(path, mmap_mode='r') while it is written. Returns the number of columns.
+        """
+        from HelpFunctions.Recorder import Recorder
+        with Recorder(path, channels=len(self.freq), dtype=self.dtype) as recorder:
+            for block in blocks:
+                columns = self.append(block)
+                if len(columns):
+                    recorder.append(columns.T)
+            return recorder.samples
@@ -0,0 +1,53 @@
+import numpy as np
+
+def int24_to_int32(buffer, count=None, offset=0):
+    """
+    Decodes packed little endian int24 samples into a NumPy int32 array in one vectorized step.
+    Args:
+        buffer: bytes, bytearray or memoryview containing the packed samples
+        count: number of samples to decode. If not provided, all whole samples in the buffer are decoded.
+        offset: byte offset of the first sample in the buffer
+
+    Returns:
+        samples: int32 array with the sign extended sample values
+    """
+    if count is None:
+        count = (len(buffer) - offset) // 3
+    raw = np.frombuffer(buffer, dtype=np.uint8, count=count * 3, offset=offset)
+    # Place each 3 byte sample in the upper bytes of a 4 byte word, the arithmetic shift then sign extends it
+    padded = np.zeros((count, 4), dtype=np.uint8)
+    padded[:, 1:] = raw.reshape(count, 3)
+    return padded.view('<i4').reshape(count) >> 8
+
+def int32_to_int24(samples):
+    """
+    Packs integer samples into little endian int24 bytes, the inverse of int24_to_int32.
+    Values outside the int24 range are clipped.
+    """
+    samples = np.clip(np.asarray(samples), -2**23, 2**23 - 1).astype('<i4')
+    return samples.reshape(-1, 1).view(np.uint8)[:, :3].tobytes()
+
+def int24_blocks_to_int32(buffer, offsets, counts):
+    """
+    Decodes several blocks of packed int24 samples from one buffer into a single int32 array.
+    When all blocks have the same size and spacing, e.g. one channel in a run of equal frames, they are gathered with one strided copy.
+    Args:
+        buffer: bytes, bytearray or memoryview containing the blocks
+        offsets: byte offset of each block
+        counts: number of samples in each block
+    """
+    total = sum(counts)
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    padded = np.zeros((total, 4), dtype=np.uint8)
+    blocks = len(offsets)
+    if blocks > 1 and counts.count(counts[0]) == blocks and len(set(np.diff(offsets))) == 1:
+        count = counts[0]
+        strided = np.lib.stride_tricks.as_strided(raw[offsets[0]:], shape=(blocks, count, 3),
+                                                  strides=(offsets[1] - offsets[0], 3, 1), writeable=False)
+        padded.reshape(blocks, count, 4)[:, :, 1:] = strided
+    else:
+        position = 0
+        for offset, count in zip(offsets, counts):
+            padded[position:position + count, 1:] = raw[offset:offset + count * 3].reshape(count, 3)
+            position += count
+    return padded.view('<i4').reshape(total) >> 8
@@ -0,0 +1,338 @@
+import struct
+from kaitaistruct import KaitaiStream, BytesIO
+from openapi.openapi_stream import OpenapiStream
+from openapi.openapi_decode import int24_to_int32, int24_blocks_to_int32
+
+# Fast parser for OpenAPI frames based on precompiled struct layouts.
+# It returns lightweight records with the same attribute names and enum values as OpenapiStream,
+# so package.header.message_type, package.content.signals, signal.samples etc. work the same way.
+# Signal samples are decoded when the frame is parsed, so the records do not reference the receive buffer.
+
+header_struct = struct.Struct("<2sHHHIBBBBQI")
+HEADER_LENGTH = header_struct.size
+HEADER_MAGIC = b"BK"
+signal_data_struct = struct.Struct("<hH")
+signal_block_struct = struct.Struct("<hh")
+interpretation_struct = struct.Struct("<HHHH")
+quality_struct = struct.Struct("<HHH")
+u2_struct = struct.Struct("<H")
+u4_struct = struct.Struct("<I")
+f8_struct = struct.Struct("<d")
+time_stamp_struct = struct.Struct("<BBBBQ")
+message_type_struct = struct.Struct("<H")
+MESSAGE_TYPE_OFFSET = 4
+# Magic, message type and content length of a header
+frame_struct = struct.Struct("<2s2xH18xI")
+
+EMessageType = OpenapiStream.Header.EMessageType
+EDescriptorType = OpenapiStream.Interpretation.EDescriptorType
+
+# Integer to enum lookup tables, values without a member are kept as integers like KaitaiStream.resolve_enum does
+message_types = {member.value: member for member in EMessageType}
+descriptor_types = {member.value: member for member in EDescriptorType}
+
+class TimeFamily:
+    __slots__ = ("k", "l", "m", "n")
+
+    def __init__(self, k, l, m, n):
+        self.k = k
+        self.l = l
+        self.m = m
+        self.n = n
+
+# Modules use very few time families, so the records are shared
+time_families = {}
+
+def time_family(k, l, m, n):
+    key = (k, l, m, n)
+    family = time_families.get(key)
+    if family is None:
+        family = time_families[key] = TimeFamily(k, l, m, n)
+    return family
+
+class TimeStamp:
+    __slots__ = ("time_family", "stamp")
+
+    def __init__(self, time_family, stamp):
+        self.time_family = time_family
+        self.stamp = stamp
+
+class String:
+    __slots__ = ("count", "data")
+
+    def __init__(self, count, data):
+        self.count = count
+        self.data = data
+
+class Header:
+    __slots__ = ("magic", "header_length", "message_type", "reserved1", "reserved2", "time_family", "time_count", "content_length")
+
+    def __init__(self, magic, header_length, message_type, reserved1, reserved2, time_family, time_count, content_length):
+        self.magic = magic
+        self.header_length = header_length
+        self.message_type = message_type
+        self.reserved1 = reserved1
+        self.reserved2 = reserved2
+        self.time_family = time_family
+        self.time_count = time_count
+        self.content_length = content_length
+
+class Interpretation:
+    __slots__ = ("signal_id", "descriptor_type", "reserved", "value_length", "value")
+
+    def __init__(self, signal_id, descriptor_type, reserved, value_length, value):
+        self.signal_id = signal_id
+        self.descriptor_type = descriptor_type
+        self.reserved = reserved
+        self.value_length = value_length
+        self.value = value
+
+class InterpretationList:
+    __slots__ = ("interpretations",)
+
+    def __init__(self, interpretations):
+        self.interpretations = interpretations
+
+class QualityBlock:
+    __slots__ = ("signal_id", "validity", "reserved")
+
+    def __init__(self, signal_id, validity, reserved):
+        self.signal_id = signal_id
+        self.validity = validity
+        self.reserved = reserved
+
+class DataQuality:
+    __slots__ = ("number_of_signals", "qualities")
+
+    def __init__(self, number_of_signals, qualities):
+        self.number_of_signals = number_of_signals
+        self.qualities = qualities
+
+class SignalBlock:
+    __slots__ = ("signal_id", "number_of_values", "samples")
+
+    def __init__(self, signal_id, number_of_values, samples):
+        self.signal_id = signal_id
+        self.number_of_values = number_of_values
+        self.samples = samples
+
+class SignalData:
+    __slots__ = ("number_of_signals", "reserved", "signals")
+
+    def __init__(self, number_of_signals, reserved, signals):
+        self.number_of_signals = number_of_signals
+        self.reserved = reserved
+        self.signals = signals
+
+class Package:
+    __slots__ = ("header", "content")
+
+    def __init__(self, header, content):
+        self.header = header
+        self.content = content
+
+def parse_header(buffer, offset=0):
+    """
+    Parses the 28 byte header at offset in buffer
+    """
+    magic, header_length, message_type, reserved1, reserved2, k, l, m, n, time_count, content_length = header_struct.unpack_from(buffer, offset)
+    if magic != HEADER_MAGIC:
+        raise ValueError("Frame does not start with the OpenAPI magic")
+    return Header(magic, header_length, message_types.get(message_type, message_type), reserved1, reserved2,
+                  time_family(k, l, m, n), time_count, content_length)
+
+def read_u4(buffer, offset):
+    return u4_struct.unpack_from(buffer, offset)[0], 4
+
+def read_f8(buffer, offset):
+    return f8_struct.unpack_from(buffer, offset)[0], 8
+
+def read_time_stamp(buffer, offset):
+    k, l, m, n, stamp = time_stamp_struct.unpack_from(buffer, offset)
+    return TimeStamp(time_family(k, l, m, n), stamp), 12
+
+def read_string(buffer, offset):
+    count, = u2_struct.unpack_from(buffer, offset)
+    # Strings are padded to an even length, the padding is part of the data like in OpenapiStream.String
+    length = count + count % 2
+    return String(count, bytes(buffer[offset + 2:offset + 2 + length]).decode("utf8")), 2 + length
+
+value_readers = {
+    EDescriptorType.data_type: read_u4,
+    EDescriptorType.scale_factor: read_f8,
+    EDescriptorType.offset: read_f8,
+    EDescriptorType.period_time: read_time_stamp,
+    EDescriptorType.unit: read_string,
+    EDescriptorType.vector_length: read_u4,
+    EDescriptorType.channel_type: read_u4,
+}
+
+def parse_interpretations(buffer, start, end):
+    interpretations = []
+    offset = start
+    while offset < end:
+        signal_id, descriptor, reserved, value_length = interpretation_struct.unpack_from(buffer, offset)
+        offset += interpretation_struct.size
+        descriptor_type = descriptor_types.get(descriptor, descriptor)
+        reader = value_readers.get(descriptor_type)
+        if reader is None:
+            # Unknown descriptor, skip its value
+            value, size = None, value_length
+        else:
+            value, size = reader(buffer, offset)
+        offset += size
+        interpretations.append(Interpretation(signal_id, descriptor_type, reserved, value_length, value))
+    return InterpretationList(interpretations)
+
+def parse_data_quality(buffer, start, end):
+    number_of_signals, = u2_struct.unpack_from(buffer, start)
+    qualities = [QualityBlock(*quality_struct.unpack_from(buffer, start + 2 + i * quality_struct.size)) for i in range(number_of_signals)]
+    return DataQuality(number_of_signals, qualities)
+
+def parse_signal_data(buffer, start, end, signal_ids=None):
+    """
+    Parses signal data. If signal_ids is given, only those signals are decoded and the other blocks are skipped.
+    """
+    number_of_signals, reserved = signal_data_struct.unpack_from(buffer, start)
+    offset = start + signal_data_struct.size
+    signals = []
+    for i in range(number_of_signals):
+        signal_id, number_of_values = signal_block_struct.unpack_from(buffer, offset)
+        offset += signal_block_struct.size
+        if signal_ids is None or signal_id in signal_ids:
+            signals.append(SignalBlock(signal_id, number_of_values, int24_to_int32(buffer, number_of_values, offset)))
+        offset += number_of_values * 3
+    return SignalData(len(signals), reserved, signals)
+
+def parse_aux_sequence_data(buffer, start, end):
+    # Aux data has no fast path, the Kaitai parser is used. The nested Kaitai classes are looked up on OpenapiStream, so it is passed as root.
+    return OpenapiStream.AuxSequenceData(KaitaiStream(BytesIO(bytes(buffer[start:end]))), None, OpenapiStream)
+
+content_parsers = {
+    EMessageType.e_signal_data: parse_signal_data,
+    EMessageType.e_interpretation: parse_interpretations,
+    EMessageType.e_data_quality: parse_data_quality,
+    EMessageType.e_aux_sequence_data: parse_aux_sequence_data,
+}
+
+def parse_frame(buffer, offset=0):
+    """
+    Parses a whole frame at offset in buffer. The buffer can be bytes, bytearray or a memoryview, e.g. from FrameReader.
+    Returns a Package with header and content like OpenapiStream.from_bytes
+    """
+    header = parse_header(buffer, offset)
+    start = offset + HEADER_LENGTH
+    end = start + header.content_length
+    if len(buffer) < end:
+        raise ValueError("Frame is incomplete")
+    parser = content_parsers.get(header.message_type)
+    if parser is None:
+        return Package(header, bytes(buffer[start:end]))
+    return Package(header, parser(buffer, start, end))
+
+class FrameSelector:
+    def __init__(self, message_types=None, signal_ids=None):
+        """
+        Decodes only the frames and signals a consumer needs. Other frames are skipped by their message type
+        before anything is parsed, and blocks of other signals are skipped by their length.
+        Remember to select e_interpretation as well if the scale factors are needed.
+        Args:
+            message_types: message types to decode, e.g. {EMessageType.e_signal_data, EMessageType.e_interpretation}. None decodes all.
+            signal_ids: signal ids whose samples are decoded. None decodes all.
+        """
+        self.message_types = None if message_types is None else {getattr(message_type, "value", message_type) for message_type in message_types}
+        self.signal_ids = None if signal_ids is None else set(signal_ids)
+        self.skipped = 0
+
+    def wants(self, buffer, offset=0):
+        """
+        Returns True if the frame at offset has a selected message type
+        """
+        if self.message_types is None:
+            return True
+        return message_type_struct.unpack_from(buffer, offset + MESSAGE_TYPE_OFFSET)[0] in self.message_types
+
+    def parse(self, buffer, offset=0):
+        """
+        Parses the frame like parse_frame, or returns None if it is not selected
+        """
+        if not self.wants(buffer, offset):
+            self.skipped += 1
+            return None
+        if self.signal_ids is None:
+            return parse_frame(buffer, offset)
+        header = parse_header(buffer, offset)
+        if header.message_type != EMessageType.e_signal_data:
+            return parse_frame(buffer, offset)
+        start = offset + HEADER_LENGTH
+        end = start + header.content_length
+        if len(buffer) < end:
+            raise ValueError("Frame is incomplete")
+        return Package(header, parse_signal_data(buffer, start, end, self.signal_ids))
+
+class BatchResult:
+    __slots__ = ("signals", "interpretations", "frames", "consumed", "time_family", "time_count")
+
+    def __init__(self, signals, interpretations, frames, consumed, time_family, time_count):
+        self.signals = signals
+        self.interpretations = interpretations
+        self.frames = frames
+        self.consumed = consumed
+        self.time_family = time_family
+        self.time_count = time_count
+
+def parse_buffer(buffer, signal_ids=None):
+    """
+    Scans all complete frames in a large buffer, e.g. from one recv_into, and returns the signal samples of all frames
+    concatenated per signal. A partial frame at the end of the buffer is left for the next call.
+    Returns a BatchResult with:
+        signals: dict of signal_id and int32 samples
+        interpretations: interpretations found in the buffer, in the order they were received
+        frames: number of complete frames
+        consumed: number of bytes of the complete frames, remove these before the next call
+        time_family, time_count: time of the first sample of the first signal data frame, None if there was none
+    Args:
+        buffer: bytes, bytearray or memoryview
+        signal_ids: signal ids to decode. None decodes all.
+    """
+    length = len(buffer)
+    offset = 0
+    frames = 0
+    offsets = {}
+    counts = {}
+    interpretations = []
+    first_header = None
+    signal_data = EMessageType.e_signal_data.value
+    interpretation = EMessageType.e_interpretation.value
+    while offset + HEADER_LENGTH <= length:
+        magic, message_type, content_length = frame_struct.unpack_from(buffer, offset)
+        if magic != HEADER_MAGIC:
+            raise ValueError("Frame does not start with the OpenAPI magic")
+        start = offset + HEADER_LENGTH
+        end = start + content_length
+        if end > length:
+            break
+        if message_type == signal_data:
+            if first_header is None:
+                first_header = parse_header(buffer, offset)
+            number_of_signals, reserved = signal_data_struct.unpack_from(buffer, start)
+            position = start + signal_data_struct.size
+            for i in range(number_of_signals):
+                signal_id, number_of_values = signal_block_struct.unpack_from(buffer, position)
+                position += signal_block_struct.size
+                if signal_ids is None or signal_id in signal_ids:
+                    if signal_id not in offsets:
+                        offsets[signal_id] = []
+                        counts[signal_id] = []
+                    offsets[signal_id].append(position)
+                    counts[signal_id].append(number_of_values)
+                position += number_of_values * 3
+        elif message_type == interpretation:
+            interpretations += parse_interpretations(buffer, start, end).interpretations
+        offset = end
+        frames += 1
+    # All blocks of a signal are decoded in one go
+    signals = {signal_id: int24_blocks_to_int32(buffer, offsets[signal_id], counts[signal_id]) for signal_id in offsets}
+    if first_header is None:
+        return BatchResult(signals, interpretations, frames, offset, None, None)
+    return BatchResult(signals, interpretations, frames, offset, first_header.time_family, first_header.time_count)
@@ -0,0 +1,110 @@
+import struct
+from openapi.openapi_decode import int32_to_int24
+
+# Builds OpenAPI stream frames, e.g. for simulating a module or generating test data.
+# Message and descriptor types use the numbers of OpenapiStream.Header.EMessageType and OpenapiStream.Interpretation.EDescriptorType.
+
+header_struct = struct.Struct("<2sHHHIBBBBQI")
+HEADER_LENGTH = header_struct.size
+
+MESSAGE_SIGNAL_DATA = 1
+MESSAGE_DATA_QUALITY = 2
+MESSAGE_INTERPRETATION = 8
+MESSAGE_AUX_SEQUENCE_DATA = 11
+
+DATA_TYPE = 1
+SCALE_FACTOR = 2
+OFFSET = 3
+PERIOD_TIME = 4
+UNIT = 5
+VECTOR_LENGTH = 6
+CHANNEL_TYPE = 7
+
+def time_family_for(sample_rate):
+    """
+    Returns the time family (k, l, m, n) whose tick 2^-k * 3^-l * 5^-m * 7^-n seconds is one sample period.
+    Falls back to a 2^-32 seconds tick if the sample rate has other prime factors.
+    """
+    if sample_rate != int(sample_rate):
+        return (32, 0, 0, 0)
+    rate = int(sample_rate)
+    exponents = []
+    for prime in (2, 3, 5, 7):
+        exponent = 0
+        while rate % prime == 0:
+            rate //= prime
+            exponent += 1
+        exponents.append(exponent)
+    if rate != 1:
+        return (32, 0, 0, 0)
+    return tuple(exponents)
+
+def ticks_per_second(time_family):
+    k, l, m, n = time_family
+    return 2**k * 3**l * 5**m * 7**n
+
+def build_frame(message_type, content, time_family=(0, 0, 0, 0), time_count=0):
+    """
+    Returns a whole frame with header for the given content
+    """
+    header = header_struct.pack(b"BK", HEADER_LENGTH, message_type, 0, 0, *time_family, time_count, len(content))
+    return header + content
+
+def build_signal_data(signals):
+    """
+    Returns the content of a signal data message
+    Args:
+        signals: list of (signal_id, samples) where samples are int24 range integers
+    """
+    parts = [struct.pack("<hH", len(signals), 0)]
+    for signal_id, samples in signals:
+        parts.append(struct.pack("<hh", signal_id, len(samples)))
+        parts.append(int32_to_int24(samples))
+    return b"".join(parts)
+
+def build_interpretations(interpretations):
+    """
+    Returns the content of an interpretation message
+    Args:
+        interpretations: list of (signal_id, descriptor_type, value). The value of PERIOD_TIME is (time_family, stamp),
+                         the value of UNIT is a string.
+    """
+    parts = []
+    for signal_id, descriptor_type, value in interpretations:
+        if descriptor_type in (SCALE_FACTOR, OFFSET):
+            data = struct.pack("<d", value)
+        elif descriptor_type == PERIOD_TIME:
+            time_family, stamp = value
+            data = struct.pack("<BBBBQ", *time_family, stamp)
+        elif descriptor_type == UNIT:
+            text = value.encode("utf8")
+            data = struct.pack("<H", len(text)) + text + b"\x00" * (len(text) % 2)
+        else:
+            data = struct.pack("<I", value)
+        parts.append(struct.pack("<HHHH", signal_id, descriptor_type, 0, len(data)) + data)
+    return b"".join(parts)
+
+def build_data_quality(qualities):
+    """
+    Returns the content of a data quality message
+    Args:
+        qualities: list of (signal_id, validity)
+    """
+    parts = [struct.pack("<H", len(qualities))]
+    for signal_id, validity in qualities:
+        parts.append(struct.pack("<HHH", signal_id, validity, 0))
+    return b"".join(parts)
+
+def build_aux_sequence_data(signals):
+    """
+    Returns the content of an aux sequence data message with CAN messages
+    Args:
+        signals: list of (signal_id, messages) where messages is a list of
+                 (relative_time, status, can_message_info, can_data_size, can_message_id, can_data)
+    """
+    parts = [struct.pack("<HH", len(signals), 0)]
+    for signal_id, messages in signals:
+        parts.append(struct.pack("<HH", signal_id, len(messages)))
+        for relative_time, status, info, size, message_id, data in messages:
+            parts.append(struct.pack("<IBBBBIQ", relative_time, status, info, size, 0, message_id, data))
+    return b"".join(parts)
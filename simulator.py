@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Local LAN-XI simulator.
+Implements the /rest/rec/* endpoints used by the examples and serves a synthetic OpenAPI stream of int24 signal
+packages, so the examples can be run and load tested without a module. Set the ip in an example to the host of the
+simulator, e.g. 127.0.0.1. Several simulators can run at once on 127.0.0.2, 127.0.0.3 etc.
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+import numpy as np
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, time_family_for,
+                                    ticks_per_second, MESSAGE_SIGNAL_DATA, MESSAGE_INTERPRETATION, DATA_TYPE,
+                                    SCALE_FACTOR, OFFSET, PERIOD_TIME, UNIT, VECTOR_LENGTH, CHANNEL_TYPE)
+
+# Full scale of the simulated input range, an int24 value of 2**23 equals this value
+FULL_SCALE = 10.0
+INT24 = 3
+ANALOG_INPUT_CHANNEL = 1
+
+class RequestHandler(BaseHTTPRequestHandler):
+    # Keep connections open between requests like a module does. Headers and body are written separately,
+    # so Nagle's algorithm would hold the body back until the client acknowledges the headers.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        status, result = self.server.simulator.handle(self.command, urlsplit(self.path).path, body)
+        data = b"" if result is None else json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _respond
+    do_PUT = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        if self.server.simulator.verbose:
+            super().log_message(format, *args)
+
+class LanXISimulator:
+    def __init__(self, host="127.0.0.1", http_port=80, stream_port=0, channels=6, sample_rate=51200, block_size=512,
+                 teds_channels=None, serial=100000, pace=True, verbose=False):
+        """
+        Args:
+            host: address to serve REST and the stream on
+            http_port: port of the REST interface. The examples expect 80.
+            stream_port: port of the stream, 0 picks a free port. Clients get it from /rest/rec/destination/socket.
+            channels: number of input channels of the module
+            sample_rate: sample rate of the stream in Hz
+            block_size: samples per channel in each signal package
+            teds_channels: list of channel indexes with a TEDS microphone attached. All channels if not given.
+            serial: serial number reported in module info
+            pace: send data at the sample rate. If False the stream runs as fast as possible.
+            verbose: log every REST request
+        """
+        self.host = host
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.teds_channels = list(range(channels)) if teds_channels is None else teds_channels
+        self.serial = serial
+        self.pace = pace
+        self.verbose = verbose
+        self.time_family = time_family_for(sample_rate)
+        self.measuring = threading.Event()
+        self.stopped = threading.Event()
+        self.detection_until = 0
+        self.update_tag = 0
+        self.generator = None
+        self.setup = self.default_setup()
+
+        self.http = ThreadingHTTPServer((host, http_port), RequestHandler)
+        self.http.simulator = self
+        self.stream_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.stream_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.stream_socket.bind((host, stream_port))
+        self.stream_socket.listen()
+        self.stream_port = self.stream_socket.getsockname()[1]
+
+    def module_info(self):
+        return {
+            "moduleType": "3160-A-042",
+            "serialNumber": self.serial,
+            "firmwareVersion": "2.10.0.501",
+            "numberOfInputChannels": self.channels,
+            "supportedSampleRates": sorted({4096, 8192, 16384, 32768, 65536, 131072, self.sample_rate}),
+        }
+
+    def default_setup(self):
+        bandwidth = "%gkHz" % (self.sample_rate / 2000)
+        return {"channels": [{
+            "channel": channel + 1,
+            "name": "Channel " + str(channel + 1),
+            "enabled": True,
+            "bandwidth": bandwidth,
+            "ccld": False,
+            "filter": "DC",
+            "range": "10 Vpeak",
+            "destinations": ["sd"],
+            "transducer": None,
+        } for channel in range(self.channels)]}
+
+    def transducers(self):
+        return [{
+            "requiresCcld": True,
+            "sensitivity": 0.05,
+            "serialNumber": self.serial * 100 + channel,
+            "type": {"number": "4189", "prefix": "", "variation": ""},
+            "unit": "Pa",
+        } if channel in self.teds_channels else None for channel in range(self.channels)]
+
+    def handle(self, method, path, body):
+        """
+        Returns (status, json) for a REST request
+        """
+        route = (method, path)
+        if route in (("PUT", "/rest/rec/open"), ("PUT", "/rest/rec/create"), ("PUT", "/rest/rec/finish")):
+            return 200, None
+        if route == ("PUT", "/rest/rec/close"):
+            self.measuring.clear()
+            return 200, None
+        if route == ("GET", "/rest/rec/module/info"):
+            return 200, self.module_info()
+        if route == ("GET", "/rest/rec/channels/input/default"):
+            return 200, self.default_setup()
+        if route == ("PUT", "/rest/rec/channels/input"):
+            self.setup = body
+            return 200, None
+        if route == ("POST", "/rest/rec/channels/input/all/transducers/detect"):
+            self.detection_until = time.monotonic() + 0.5
+            self.update_tag += 1
+            return 200, None
+        if route == ("GET", "/rest/rec/channels/input/all/transducers"):
+            return 200, self.transducers()
+        if route == ("GET", "/rest/rec/onchange"):
+            return 200, {"transducerDetectionActive": time.monotonic() < self.detection_until,
+                         "lastUpdateTag": self.update_tag}
+        if route == ("GET", "/rest/rec/destination/socket"):
+            return 200, {"tcpPort": self.stream_port}
+        if route == ("POST", "/rest/rec/measurements"):
+            self.measuring.set()
+            return 200, None
+        if route == ("PUT", "/rest/rec/measurements/stop"):
+            self.measuring.clear()
+            return 200, None
+        if route == ("GET", "/rest/rec/generator/output/default"):
+            return 200, {"outputs": [{"number": 1, "gain": 1, "inputs": [
+                {"number": 1, "signalType": "sine", "frequency": 1000.0, "gain": 0.5}]}]}
+        if route == ("PUT", "/rest/rec/generator/output"):
+            self.generator = body["outputs"][0]["inputs"][0]
+            return 200, None
+        if method == "PUT" and path in ("/rest/rec/generator/prepare", "/rest/rec/generator/start",
+                                        "/rest/rec/generator/stop"):
+            return 200, None
+        return 404, {"error": "Unknown endpoint " + method + " " + path}
+
+    def enabled_channels(self):
+        return [index for index, channel in enumerate(self.setup["channels"]) if channel["enabled"]]
+
+    def interpretation_frame(self, enabled):
+        ticks_per_sample = ticks_per_second(self.time_family) // self.sample_rate
+        interpretations = []
+        for signal_id in range(1, len(enabled) + 1):
+            interpretations += [
+                (signal_id, DATA_TYPE, INT24),
+                (signal_id, SCALE_FACTOR, FULL_SCALE),
+                (signal_id, OFFSET, 0.0),
+                (signal_id, PERIOD_TIME, (self.time_family, ticks_per_sample)),
+                (signal_id, UNIT, "V"),
+                (signal_id, VECTOR_LENGTH, 1),
+                (signal_id, CHANNEL_TYPE, ANALOG_INPUT_CHANNEL),
+            ]
+        return build_frame(MESSAGE_INTERPRETATION, build_interpretations(interpretations))
+
+    def signal(self, enabled, first_sample):
+        """
+        Returns int24 range samples of all enabled channels as a (channels, block_size) array.
+        Channel n carries a sine of n kHz, channel 1 the generator signal when it has been configured.
+        """
+        t = (first_sample + np.arange(self.block_size)) / self.sample_rate
+        frequency = np.array([(channel + 1) * 1000.0 for channel in enabled])
+        amplitude = np.full(len(enabled), 1.0)
+        if self.generator is not None and enabled[0] == 0:
+            frequency[0] = self.generator["frequency"]
+            amplitude[0] = self.generator["gain"]
+        values = amplitude[:, np.newaxis] * np.sin(2 * np.pi * frequency[:, np.newaxis] * t)
+        values += 0.001 * np.random.standard_normal(values.shape)
+        return np.round(values / FULL_SCALE * 2**23).astype(np.int32)
+
+    def stream(self, connection):
+        """
+        Sends the stream to one client while the measurement runs
+        """
+        with connection:
+            while not self.measuring.wait(0.1):
+                if self.stopped.is_set():
+                    return
+            enabled = self.enabled_channels()
+            ticks = ticks_per_second(self.time_family)
+            first_sample = int(time.time() * self.sample_rate)
+            start = time.monotonic()
+            sent = 0
+            try:
+                connection.sendall(self.interpretation_frame(enabled))
+                while self.measuring.is_set() and not self.stopped.is_set():
+                    values = self.signal(enabled, first_sample + sent)
+                    content = build_signal_data([(signal_id + 1, values[signal_id]) for signal_id in range(len(enabled))])
+                    time_count = (first_sample + sent) * ticks // self.sample_rate
+                    connection.sendall(build_frame(MESSAGE_SIGNAL_DATA, content, self.time_family, time_count))
+                    sent += self.block_size
+                    if self.pace:
+                        ahead = sent / self.sample_rate - (time.monotonic() - start)
+                        if ahead > 0:
+                            time.sleep(ahead)
+            except (ConnectionError, OSError):
+                pass
+
+    def accept(self):
+        while not self.stopped.is_set():
+            try:
+                connection, address = self.stream_socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.stream, args=(connection,), daemon=True).start()
+
+    def start(self):
+        """
+        Serves REST and the stream in background threads
+        """
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        self.measuring.clear()
+        self.http.shutdown()
+        self.http.server_close()
+        self.stream_socket.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Local LAN-XI simulator')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to serve on')
+    parser.add_argument('--http-port', type=int, default=80, help='Port of the REST interface')
+    parser.add_argument('--stream-port', type=int, default=0, help='Port of the stream, 0 picks a free port')
+    parser.add_argument('--channels', type=int, default=6, help='Number of input channels')
+    parser.add_argument('--sample-rate', type=int, default=51200, help='Sample rate in Hz')
+    parser.add_argument('--block-size', type=int, default=512, help='Samples per channel in each package')
+    parser.add_argument('--teds', type=str, default=None, help='Comma-separated list of channels with TEDS, default all')
+    parser.add_argument('--serial', type=int, default=100000, help='Serial number of the module')
+    parser.add_argument('--no-pace', action='store_true', help='Stream as fast as possible instead of in real time')
+    parser.add_argument('--verbose', action='store_true', help='Log every REST request')
+    args = parser.parse_args()
+    teds = None if args.teds is None else [int(ch.strip()) for ch in args.teds.split(',') if ch.strip()]
+    simulator = LanXISimulator(args.host, args.http_port, args.stream_port, args.channels, args.sample_rate,
+                               args.block_size, teds, args.serial, not args.no_pace, args.verbose)
+    simulator.start()
+    print(f"Simulating a {args.channels} channel LAN-XI at {args.sample_rate} Hz on http://{args.host}:{args.http_port}, "
+          f"stream on port {simulator.stream_port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+if __name__ == "__main__":
+    main()
@@ -12,29 +12,29 @@
 # ### Opening recorder application
 # The first step is opening the recorder application on the device. This is done by sending an HTTP PUT request to the device
 
-import requests
+from HelpFunctions.Rest import RestClient
 
 ip = "169.254.213.171"
-host = "http://" + ip
+# All REST calls share one keep-alive connection to the module
+rest = RestClient(ip)
 
 # Open recorder application
-response = requests.put(host + "/rest/rec/open")
+response = rest.put("/rest/rec/open")
 
 # After this you can get information about the device, this is done with a GET request, the response will contain JSON that describes the module.
 
 # Get module info, this contains information such as type, and what kinds of functions it supports
-response = requests.get(host + "/rest/rec/module/info")
+response = rest.get("/rest/rec/module/info")
 module_info = response.json()
 print(module_info)
 
 # Start TEDS detection, we then check when it is done and read it out as JSON
 
 # Detect TEDS
-response = requests.post(host + "/rest/rec/channels/input/all/transducers/detect")
-while requests.get(host + "/rest/rec/onchange").json()["transducerDetectionActive"]:
-    pass
+response = rest.post("/rest/rec/channels/input/all/transducers/detect")
+rest.wait_onchange("transducerDetectionActive")
 # Get TEDS information
-response = requests.get(host + "/rest/rec/channels/input/all/transducers")
+response = rest.get("/rest/rec/channels/input/all/transducers")
 channels = response.json()
 print(channels)
 
@@ -42,9 +42,9 @@ print(channels)
 
 import HelpFunctions.utility as utility
 # Create a new recording
-response = requests.put(host + "/rest/rec/create")
+response = rest.put("/rest/rec/create")
 # Get Default setup for channels
-response = requests.get(host + "/rest/rec/channels/input/default")
+response = rest.get("/rest/rec/channels/input/default")
 setup = response.json()
 # Replace stream destination from default SD card to socket
 utility.update_value("destinations", ["socket"], setup)
@@ -67,13 +67,13 @@ if not any(channels):
 # Next we setup the input channels for streaming. We use the input setup we got previosly.
 
 # Create input channels with the setup
-response = requests.put(host + "/rest/rec/channels/input", json = setup)
+response = rest.put("/rest/rec/channels/input", json = setup)
 print(response.text)
 # Get streaming socket
-response = requests.get(host + "/rest/rec/destination/socket")
+response = rest.get("/rest/rec/destination/socket")
 inputport = response.json()["tcpPort"]
 print(response.json())
-response = requests.post(host + "/rest/rec/measurements")
+response = rest.post("/rest/rec/measurements")
 
 # We need the sample rate to correctly calculate FFTs, we get that by finding the closest sample rate in module info
 
@@ -94,48 +94,47 @@ import numpy as np
 
 from openapi.openapi_header import *
 from openapi.openapi_stream import *
+from openapi.openapi_fast import parse_frame
+from HelpFunctions.FrameReader import FrameReader
+from HelpFunctions.Interpretation import InterpretationRegistry
 
 N = sample_rate # Collect 5 seconds of samples
 array = np.array([])
-interpretations = [{},{},{},{},{},{}]
+# Scale factor, offset and unit of each signal, updated by every interpretation package
+interpretations = InterpretationRegistry()
 # Stream and parse data
 with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
     s.connect((ip, inputport))
+    reader = FrameReader(s)
     while array.size <= N:
-        # First get the header of the data
-        data = s.recv(28)
-        wstream = OpenapiHeader.from_bytes(data)
-        content_length = wstream.content_length + 28
-        # We use the header's content_length to collect the rest of a package
-        while len(data) < content_length:
-            packet = s.recv(content_length - len(data))
-            data += packet
-        # Here we parse the data into a StreamPackage
-        package = OpenapiStream.from_bytes(data)
+        # The frame reader uses the header's content_length to collect a whole package
+        data = reader.read_frame()
+        # The module closed the connection
+        if data is None:
+            break
+        # Here we parse the data into a StreamPackage, the fast parser decodes it exactly once
+        package = parse_frame(data)
         if(package.header.message_type == OpenapiStream.Header.EMessageType.e_interpretation):
-            for interpretation in package.content.interpretations:
-                interpretations[interpretation.signal_id - 1][interpretation.descriptor_type] = interpretation.value 
+            interpretations.update(package.content.interpretations)
         if(package.header.message_type == OpenapiStream.Header.EMessageType.e_signal_data): # If the data contains signal data
             for signal in package.content.signals: # For each signal in the package
                 if signal != None:
                     if channels[signal.signal_id - 1] != None:
-                        scale_factor = interpretations[signal.signal_id - 1][OpenapiStream.Interpretation.EDescriptorType.scale_factor]
+                        # Samples are converted to the unit of the transducer with its own scale factor and offset
                         # We append the data to an array and continue
-                        array = np.append(array, np.array(list(map(lambda x: x.calc_value, signal.values))))
-    response = requests.put(host + "/rest/rec/measurements/stop")
+                        array = np.append(array, interpretations.convert_signal(signal.signal_id, signal.samples))
+    response = rest.put("/rest/rec/measurements/stop")
     s.close()
-response = requests.put(host + "/rest/rec/finish")
-response = requests.put(host + "/rest/rec/close")
+response = rest.put("/rest/rec/finish")
+response = rest.put("/rest/rec/close")
 print(str(array.size) + " samples collected")
 
 
 # Create a plot of the data
 import matplotlib.pyplot as plt
 win = np.hamming(len(array))
-scale_factor = interpretations[0][OpenapiStream.Interpretation.EDescriptorType.scale_factor]
-unit = interpretations[0][OpenapiStream.Interpretation.EDescriptorType.unit]
-data = (array * scale_factor) / 2 ** 23
-freq, s_dbfs = utility.dbfft(data, sample_rate, win, ref = 20 * 10**(-6)) #Reference = 20uPa
+unit = interpretations.unit[0]
+freq, s_dbfs = utility.dbfft(array, sample_rate, win, ref = 20 * 10**(-6)) #Reference = 20uPa
 plt.plot(freq, s_dbfs)
 plt.grid(True)
 plt.xlabel('Frequency [Hz]')
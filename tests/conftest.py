@@ -0,0 +1,26 @@
+import os
+import sys
+import pytest
+
+# The examples import HelpFunctions and openapi from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def simulators():
+    """
+    Returns a function starting a LanXISimulator on port 80 of a host, like a module. The simulators are stopped
+    after the test, which is skipped if port 80 can not be bound.
+    """
+    from simulator import LanXISimulator
+    started = []
+    def start(host="127.0.0.1", **kwargs):
+        try:
+            simulator = LanXISimulator(host, 80, **kwargs)
+        except OSError as error:
+            pytest.skip("Simulator can not serve on " + host + ":80: " + str(error))
+        simulator.start()
+        started.append(simulator)
+        return simulator
+    yield start
+    for simulator in started:
+        simulator.stop()
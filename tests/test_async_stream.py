@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+from openapi.openapi_stream import OpenapiStream
+from openapi.openapi_fast import FrameSelector
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, build_data_quality,
+                                    MESSAGE_SIGNAL_DATA, MESSAGE_INTERPRETATION, MESSAGE_DATA_QUALITY, SCALE_FACTOR)
+from HelpFunctions.AsyncStream import StreamClient
+from HelpFunctions.Stream import streamHandler
+
+EMessageType = OpenapiStream.Header.EMessageType
+
+def stream_frames(channels=2, packages=10, values=64):
+    frames = [build_frame(MESSAGE_INTERPRETATION, build_interpretations([(signal_id, SCALE_FACTOR, 2.0**23)
+                                                                          for signal_id in range(1, channels + 1)]))]
+    for package in range(packages):
+        signals = [(signal_id, np.arange(values) + package * values) for signal_id in range(1, channels + 1)]
+        frames.append(build_frame(MESSAGE_SIGNAL_DATA, build_signal_data(signals), (16, 0, 0, 0), package * values))
+        frames.append(build_frame(MESSAGE_DATA_QUALITY, build_data_quality([(1, 0)])))
+    return frames
+
+async def serve(data, chunk=1000):
+    """
+    Starts a local server sending data in pieces of chunk bytes to each client, and closing the connection after it
+    """
+    async def send(reader, writer):
+        for offset in range(0, len(data), chunk):
+            writer.write(data[offset:offset + chunk])
+            await writer.drain()
+        writer.close()
+    server = await asyncio.start_server(send, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+def test_raw_frames():
+    frames = stream_frames()
+    async def run():
+        server, port = await serve(b"".join(frames), chunk=37)
+        async with server, StreamClient("127.0.0.1", port) as client:
+            return [frame async for frame in client.raw_frames()]
+    assert asyncio.run(run()) == frames
+
+def test_packages_with_selector():
+    async def run():
+        server, port = await serve(b"".join(stream_frames()))
+        selector = FrameSelector({EMessageType.e_signal_data})
+        async with server, StreamClient("127.0.0.1", port, selector=selector) as client:
+            return [package async for package in client], selector.skipped
+    packages, skipped = asyncio.run(run())
+    assert len(packages) == 10
+    assert all(package.header.message_type == EMessageType.e_signal_data for package in packages)
+    # The interpretation and the data quality frames
+    assert skipped == 11
+
+def test_stream_handler_runs_on_the_client():
+    lanxi = SimpleNamespace(ip="127.0.0.1", inputport=0, channels=[{}] * 2, sample_rate=65536)
+    handler = streamHandler(lanxi)
+    async def run():
+        server, handler.inputport = await serve(b"".join(stream_frames()))
+        async with server:
+            # Ends when the server closes the stream
+            await handler.runStream()
+    asyncio.run(run())
+    assert handler.samples_received == 2 * 640
+    np.testing.assert_array_equal(handler.buffer.getPart(640), [np.arange(640)] * 2)
+
+def test_read_frame_returns_none_on_partial_frame():
+    frame = stream_frames()[1]
+    async def run():
+        server, port = await serve(frame + frame[:50])
+        async with server, StreamClient("127.0.0.1", port) as client:
+            return await client.read_frame(), await client.read_frame()
+    first, second = asyncio.run(run())
+    assert first == frame
+    assert second is None
@@ -0,0 +1,102 @@
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from openapi.openapi_fast import parse_frame, parse_buffer
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, build_data_quality,
+                                    MESSAGE_SIGNAL_DATA, MESSAGE_INTERPRETATION, MESSAGE_DATA_QUALITY, SCALE_FACTOR)
+from HelpFunctions.AsyncStream import StreamClient
+from HelpFunctions.Stream import streamHandler
+
+TIME_FAMILY = (16, 0, 0, 0)
+
+def stream(packages=20, channels=3, values=50):
+    rng = np.random.default_rng(0)
+    interpretations = [(signal_id, SCALE_FACTOR, 4.0 * signal_id) for signal_id in range(1, channels + 1)]
+    frames = [build_frame(MESSAGE_INTERPRETATION, build_interpretations(interpretations))]
+    for package in range(packages):
+        signals = [(signal_id, rng.integers(-2**23, 2**23, values)) for signal_id in range(1, channels + 1)]
+        frames.append(build_frame(MESSAGE_SIGNAL_DATA, build_signal_data(signals), TIME_FAMILY, 1000 + package * values))
+        frames.append(build_frame(MESSAGE_DATA_QUALITY, build_data_quality([(1, 0)])))
+    return frames
+
+def per_frame(frames, signal_ids=None):
+    """
+    Returns the samples of each signal concatenated over all frames, parsed one frame at a time
+    """
+    signals = {}
+    for frame in frames:
+        package = parse_frame(frame)
+        if package.header.message_type.value == MESSAGE_SIGNAL_DATA:
+            for signal in package.content.signals:
+                if signal_ids is None or signal.signal_id in signal_ids:
+                    signals.setdefault(signal.signal_id, []).append(signal.samples)
+    return {signal_id: np.concatenate(samples) for signal_id, samples in signals.items()}
+
+def assert_same_signals(signals, expected):
+    assert sorted(signals) == sorted(expected)
+    for signal_id in expected:
+        np.testing.assert_array_equal(signals[signal_id], expected[signal_id])
+
+def test_parse_buffer_matches_parse_frame():
+    frames = stream()
+    result = parse_buffer(b"".join(frames))
+    assert result.frames == len(frames)
+    assert result.consumed == sum(map(len, frames))
+    assert result.time_count == 1000
+    assert result.time_family.k == 16
+    assert [interpretation.value for interpretation in result.interpretations] == [4.0, 8.0, 12.0]
+    assert_same_signals(result.signals, per_frame(frames))
+
+def test_parse_buffer_selected_signals():
+    frames = stream()
+    assert_same_signals(parse_buffer(b"".join(frames), {2}).signals, per_frame(frames, {2}))
+
+def test_parse_buffer_leaves_partial_frame():
+    frames = stream(packages=2)
+    result = parse_buffer(memoryview(b"".join(frames) + frames[1][:100]))
+    assert result.frames == len(frames)
+    assert result.consumed == sum(map(len, frames))
+
+def test_parse_buffer_without_signal_data():
+    result = parse_buffer(stream(packages=0)[0])
+    assert result.time_count is None
+    assert result.signals == {}
+
+def batches(data, chunk, size):
+    async def run():
+        client = StreamClient("127.0.0.1", 0)
+        client.reader = asyncio.StreamReader()
+        for offset in range(0, len(data), chunk):
+            client.reader.feed_data(data[offset:offset + chunk])
+        client.reader.feed_eof()
+        return [batch async for batch in client.batches(size=size)], client
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("chunk, size", [(1, 64), (100, 64), (999, 1000), (10**6, 2**20)])
+def test_batches_split_anywhere(chunk, size):
+    # Reads of size bytes, most of them end within a frame. With size 64 every frame is larger than the batch buffer.
+    frames = stream()
+    results, client = batches(b"".join(frames), chunk, size)
+    signals = {}
+    for result in results:
+        for signal_id, samples in result.signals.items():
+            signals.setdefault(signal_id, []).append(samples)
+    assert_same_signals({signal_id: np.concatenate(samples) for signal_id, samples in signals.items()}, per_frame(frames))
+    assert sum(result.frames for result in results) == client.frames == len(frames)
+    assert client.bytes == sum(map(len, frames))
+
+def test_batch_handler_matches_package_handler():
+    frames = stream()
+    lanxi = SimpleNamespace(ip="127.0.0.1", inputport=0, channels=[{}] * 3, sample_rate=65536)
+    by_frame, by_batch = streamHandler(lanxi), streamHandler(lanxi)
+    for frame in frames:
+        by_frame.PackageHandler(parse_frame(frame))
+    data = b"".join(frames)
+    first = parse_buffer(data[:len(data) // 2])
+    by_batch.BatchHandler(first)
+    # The second batch starts with the frame cut at the end of the first
+    by_batch.BatchHandler(parse_buffer(data[first.consumed:]))
+    np.testing.assert_array_equal(by_batch.buffer.get(), by_frame.buffer.get())
+    np.testing.assert_allclose(by_batch.end_time, by_frame.end_time)
+    assert by_batch.samples_received == by_frame.samples_received == 3 * 20 * 50
@@ -0,0 +1,35 @@
+import numpy as np
+import benchmark
+from openapi.openapi_fast import parse_frame
+
+def test_compare_counts_regressions(capsys):
+    baseline = {"a": 100.0, "b": 100.0, "c": 100.0}
+    assert benchmark.compare({"a": 79.0, "b": 81.0, "c": 200.0, "new": 1.0}, baseline, 0.2) == 1
+    assert "REGRESSION a" in capsys.readouterr().out
+
+def test_measure_returns_seconds_per_call():
+    seconds = benchmark.measure(lambda: None, min_time=0.01, repeat=2)
+    assert 0 < seconds < 0.01
+
+def test_frames():
+    package = parse_frame(benchmark.signal_frame(3, 16, time_count=5))
+    assert [signal.signal_id for signal in package.content.signals] == [1, 2, 3]
+    assert package.header.time_count == 5
+    assert len(parse_frame(benchmark.interpretation_frame(3)).content.interpretations) == 12
+
+def test_end_to_end():
+    results = {}
+    benchmark.bench_end_to_end(results, 2, 64, 51200, 0.001)
+    assert results["end to end [samples/s]"] > 0
+
+def test_stream_through_counts_all_samples():
+    for batched in (False, True):
+        handler = benchmark.handler_for(2, 51200)
+        rate = benchmark.stream_through(handler, 2, 64, 51200, 0.001, batched)
+        # One repeat of 64 frames
+        assert handler.samples_received == 64 * 2 * 64
+        assert rate > 0
+        np.testing.assert_allclose(handler.interpretations.scale_factor, [10.0, 10.0])
+
+def test_async_batches():
+    assert benchmark.async_batches(2, 64, chunk=1000, size=4096) > 0
@@ -0,0 +1,119 @@
+import threading
+import time
+import pytest
+from HelpFunctions.BringUp import BringUp
+from HelpFunctions.lanxi import LanXI
+
+class FakeRest:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.puts = []
+
+    def put(self, path):
+        if self.fail:
+            raise ConnectionError("unreachable")
+        self.puts.append(path)
+
+class FakeModule:
+    """
+    Runs the phases of LanXI, recording when each one ran. A phase can be slowed down or made to fail.
+    """
+    phases = LanXI.phases
+    log = []
+    lock = threading.Lock()
+
+    def __init__(self, ip, delays=None, error=None, fail_cleanup=False):
+        self.ip = ip
+        self.delays = delays or {}
+        self.error = error or {}
+        self.rest = FakeRest(fail_cleanup)
+        for name, method in self.phases:
+            setattr(self, method, self.phase(name))
+
+    def phase(self, name):
+        def run():
+            time.sleep(self.delays.get(name, 0))
+            if name in self.error:
+                raise self.error[name]
+            with self.lock:
+                self.log.append((self.ip, name))
+        return run
+
+@pytest.fixture(autouse=True)
+def clear_log():
+    del FakeModule.log[:]
+
+def test_runs_all_phases():
+    modules = [FakeModule("10.0.0.%d" % i) for i in range(3)]
+    bringup = BringUp(modules)
+    timings = bringup.run()
+    names = [name for name, method in LanXI.phases]
+    for module in modules:
+        assert [name for ip, name in FakeModule.log if ip == module.ip] == names
+        assert list(timings[module.ip]) == names
+        assert module.rest.puts == []
+    assert list(bringup.phase_times) == names
+    assert len(bringup.report().splitlines()) == 5
+
+def test_start_waits_for_all_modules():
+    modules = [FakeModule("10.0.0.1"), FakeModule("10.0.0.2", delays={"configure": 0.2})]
+    BringUp(modules).run()
+    phases = [name for ip, name in FakeModule.log]
+    # Both modules are configured before either starts
+    assert phases[:phases.index("start")].count("configure") == 2
+
+def test_phases_run_in_parallel():
+    modules = [FakeModule("10.0.0.%d" % i, delays={"teds": 0.3}) for i in range(4)]
+    start = time.perf_counter()
+    BringUp(modules).run()
+    assert time.perf_counter() - start < 0.9
+
+def test_failure_cleans_up_all_modules():
+    modules = [FakeModule("10.0.0.1"), FakeModule("10.0.0.2", delays={"teds": 0.1}, error={"teds": ValueError("no TEDS")})]
+    with pytest.raises(RuntimeError) as error:
+        BringUp(modules).run()
+    assert "1 module(s)" in str(error.value)
+    assert "10.0.0.2: ValueError('no TEDS')" in str(error.value)
+    assert isinstance(error.value.__cause__, ValueError)
+    # No module starts measuring
+    assert ("10.0.0.1", "start") not in FakeModule.log
+    # The recording of the first module was created, the failing one only opened the recorder
+    assert modules[0].rest.puts == ["/rest/rec/finish", "/rest/rec/close"]
+    assert modules[1].rest.puts == ["/rest/rec/close"]
+
+def test_failure_after_start_stops_measuring():
+    modules = [FakeModule("10.0.0.1"), FakeModule("10.0.0.2", error={"start": OSError("lost")})]
+    with pytest.raises(RuntimeError):
+        BringUp(modules).run()
+    assert modules[0].rest.puts == ["/rest/rec/measurements/stop", "/rest/rec/finish", "/rest/rec/close"]
+
+def test_all_errors_are_reported():
+    modules = [FakeModule("10.0.0.1", error={"info": ValueError("a")}),
+               FakeModule("10.0.0.2", error={"configure": SystemExit()}, fail_cleanup=True),
+               FakeModule("10.0.0.3", error={"open": ConnectionError("b")})]
+    with pytest.raises(RuntimeError) as error:
+        BringUp(modules).run()
+    message = str(error.value)
+    assert "3 module(s)" in message
+    assert "10.0.0.1: ValueError('a')" in message
+    assert "10.0.0.2: SystemExit()" in message
+    assert "10.0.0.3: ConnectionError('b')" in message
+    # The module which never opened its recorder is not cleaned up
+    assert modules[2].rest.puts == []
+
+def test_simulated_modules(simulators):
+    hosts = ["127.0.0.1", "127.0.0.2", "127.0.0.3"]
+    for serial, host in enumerate(hosts):
+        simulators(host, channels=2, serial=serial)
+    modules = [LanXI(host) for host in hosts]
+    bringup = BringUp(modules)
+    bringup.run()
+    try:
+        assert all(module.inputport for module in modules)
+        assert set(bringup.timings) == set(hosts)
+        # The TEDS detections of 0.5 s ran at the same time
+        assert bringup.total < 1.4
+    finally:
+        for module in modules:
+            for path in ("/rest/rec/measurements/stop", "/rest/rec/finish", "/rest/rec/close"):
+                module.rest.put(path)
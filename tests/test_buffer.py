@@ -0,0 +1,72 @@
+import threading
+import numpy as np
+from HelpFunctions.Buffer import buffer
+
+def test_get_before_full():
+    ring = buffer(8)
+    ring.append([1, 2, 3])
+    np.testing.assert_array_equal(ring.getPart(3), [1, 2, 3])
+    np.testing.assert_array_equal(ring.get(), [0, 0, 0, 0, 0, 1, 2, 3])
+
+def test_wraps():
+    ring = buffer(8)
+    data = np.arange(1, 30)
+    for start in range(0, len(data), 5):
+        ring.append(data[start:start + 5])
+    np.testing.assert_array_equal(ring.get(), data[-8:])
+    np.testing.assert_array_equal(ring.getPart(3), data[-3:])
+    assert ring.written == len(data)
+
+def test_block_larger_than_buffer():
+    ring = buffer(4)
+    ring.append([1, 2])
+    ring.append(np.arange(10))
+    np.testing.assert_array_equal(ring.get(), [6, 7, 8, 9])
+
+def test_block_filling_buffer_exactly():
+    ring = buffer(4)
+    ring.append([1, 2, 3])
+    ring.append([4])
+    np.testing.assert_array_equal(ring.get(), [1, 2, 3, 4])
+    ring.append([5])
+    np.testing.assert_array_equal(ring.get(), [2, 3, 4, 5])
+
+def test_part_larger_than_buffer():
+    ring = buffer(4)
+    ring.append(np.arange(6))
+    np.testing.assert_array_equal(ring.getPart(100), [2, 3, 4, 5])
+
+def test_matches_np_append():
+    rng = np.random.default_rng(0)
+    ring = buffer(100)
+    reference = np.zeros(100)
+    for _ in range(50):
+        block = rng.standard_normal(rng.integers(1, 40))
+        ring.append(block)
+        reference = np.append(reference, block)[-100:]
+    np.testing.assert_array_equal(ring.get(), reference)
+
+def test_threadsafe_read_is_a_copy():
+    ring = buffer(8, threadsafe=True)
+    ring.append(np.arange(4.0))
+    part = ring.getPart(4)
+    ring.append(np.full(8, -1.0))
+    np.testing.assert_array_equal(part, [0, 1, 2, 3])
+
+def test_threadsafe_reads_are_not_torn():
+    ring = buffer(1000, threadsafe=True)
+    stop = threading.Event()
+    def write():
+        value = 0
+        while not stop.is_set():
+            value += 1
+            ring.append(np.full(1000, value))
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(200):
+            part = ring.get()
+            assert np.all(part == part[0])
+    finally:
+        stop.set()
+        writer.join()
@@ -0,0 +1,79 @@
+import os
+import socket
+import threading
+import numpy as np
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, MESSAGE_SIGNAL_DATA,
+                                    MESSAGE_INTERPRETATION, SCALE_FACTOR)
+from HelpFunctions.Capture import FrameCapture, FrameReplay, index_dtype, index_path
+from HelpFunctions.FrameReader import FrameReader
+
+# One tick per sample at 1024 Hz
+TIME_FAMILY = (10, 0, 0, 0)
+
+def frames():
+    frames = [build_frame(MESSAGE_INTERPRETATION, build_interpretations([(1, SCALE_FACTOR, 1.0)]))]
+    frames += [build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(1, np.arange(256) + i)]), TIME_FAMILY, i * 256)
+               for i in range(8)]
+    return frames
+
+def capture(path, frames):
+    with FrameCapture(path) as capture:
+        for frame in frames:
+            capture.write(frame)
+
+def test_replay_round_trip(tmp_path):
+    path = str(tmp_path / "stream.bin")
+    expected = frames()
+    capture(path, expected)
+    replay = FrameReplay(path)
+    assert [bytes(frame) for frame in replay] == expected
+    assert replay.read_frame() is None
+    replay.close()
+
+def test_index(tmp_path):
+    path = str(tmp_path / "stream.bin")
+    capture(path, frames())
+    index = np.fromfile(index_path(path), dtype=index_dtype)
+    assert list(index["message_type"]) == [MESSAGE_INTERPRETATION] + [MESSAGE_SIGNAL_DATA] * 8
+    np.testing.assert_allclose(index["time"][1:], np.arange(8) * 0.25)
+    assert index["offset"][1] == index["length"][0]
+
+def test_seek(tmp_path):
+    path = str(tmp_path / "stream.bin")
+    expected = frames()
+    capture(path, expected)
+    replay = FrameReplay(path)
+    replay.seek(1.0)
+    assert bytes(replay.read_frame()) == expected[5]
+    replay.close()
+
+def test_rebuilds_missing_index_without_partial_frame(tmp_path):
+    path = str(tmp_path / "stream.bin")
+    expected = frames()
+    capture(path, expected)
+    os.remove(index_path(path))
+    # A capture which was cut off in the middle of a frame
+    with open(path, "ab") as f:
+        f.write(expected[1][:40])
+    replay = FrameReplay(path)
+    assert [bytes(frame) for frame in replay] == expected
+    replay.close()
+
+def test_capture_from_frame_reader(tmp_path):
+    path = str(tmp_path / "stream.bin")
+    expected = frames()
+    sender, receiver = socket.socketpair()
+    def send():
+        sender.sendall(b"".join(expected))
+        sender.close()
+    threading.Thread(target=send, daemon=True).start()
+    with FrameCapture(path) as capture:
+        reader = FrameReader(receiver, capture=capture)
+        while reader.read_frame() is not None:
+            pass
+    receiver.close()
+    with open(path, "rb") as f:
+        assert f.read() == b"".join(expected)
+    replay = FrameReplay(path)
+    assert len(replay.index) == len(expected)
+    replay.close()
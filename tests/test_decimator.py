@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from HelpFunctions.Decimator import Decimator, stage_factors
+
+def test_stage_factors():
+    assert stage_factors(1) == []
+    assert stage_factors(12) == [3, 2, 2]
+    assert stage_factors(10) == [5, 2]
+    assert stage_factors(7) == [7]
+
+def test_block_size_does_not_matter():
+    data = np.random.default_rng(0).standard_normal((2, 12000))
+    outputs = []
+    for block in (1, 7, 1000, 12000):
+        decimator = Decimator(12, channels=2)
+        outputs.append(np.concatenate([decimator.process(data[:, start:start + block])
+                                       for start in range(0, data.shape[1], block)], axis=1))
+    assert outputs[0].shape == (2, 1000)
+    for output in outputs[1:]:
+        np.testing.assert_allclose(output, outputs[0], atol=1e-12)
+
+def test_passes_low_and_removes_high_frequencies():
+    sample_rate = 48000
+    t = np.arange(sample_rate) / sample_rate
+    decimator = Decimator(4, sample_rate=sample_rate)
+    assert decimator.sample_rate == 12000
+    low = decimator.process(np.sin(2 * np.pi * 1000 * t))
+    assert low.ndim == 1 and len(low) == 12000
+    # After the filter has settled
+    assert np.max(np.abs(low[1000:])) == pytest.approx(1, abs=0.02)
+    high = Decimator(4).process(np.sin(2 * np.pi * 10000 * t))
+    assert np.max(np.abs(high[1000:])) < 1e-3
+
+def test_consumers_get_non_empty_blocks():
+    decimator = Decimator(4, channels=2)
+    blocks = []
+    decimator.addConsumer(blocks.append)
+    decimator.append(np.ones((2, 1)))
+    decimator.append(np.ones((2, 3)))
+    decimator.append(np.ones((2, 2)))
+    assert [block.shape for block in blocks] == [(2, 1), (2, 1)]
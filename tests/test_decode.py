@@ -0,0 +1,33 @@
+import numpy as np
+from openapi.openapi_decode import int24_to_int32, int32_to_int24, int24_blocks_to_int32
+
+def test_int24_round_trip():
+    samples = np.array([0, 1, -1, 2**23 - 1, -2**23, 123456, -654321])
+    decoded = int24_to_int32(int32_to_int24(samples))
+    assert decoded.dtype == np.int32
+    np.testing.assert_array_equal(decoded, samples)
+
+def test_int24_little_endian_sign_extension():
+    np.testing.assert_array_equal(int24_to_int32(b"\x01\x00\x00\xff\xff\xff\x00\x00\x80"), [1, -1, -2**23])
+
+def test_int24_offset_and_count():
+    buffer = b"\xaa\xbb" + int32_to_int24([5, -6, 7])
+    np.testing.assert_array_equal(int24_to_int32(buffer, 2, offset=2), [5, -6])
+    np.testing.assert_array_equal(int24_to_int32(buffer, offset=2), [5, -6, 7])
+
+def test_int32_to_int24_clips():
+    np.testing.assert_array_equal(int24_to_int32(int32_to_int24([2**24, -2**24])), [2**23 - 1, -2**23])
+
+def test_blocks_equal_spacing():
+    rng = np.random.default_rng(1)
+    blocks = [rng.integers(-2**23, 2**23, 16) for _ in range(4)]
+    # Each block is preceded by 10 bytes of other data, like a signal in a run of equal frames
+    buffer = b"".join(b"\x00" * 10 + int32_to_int24(block) for block in blocks)
+    offsets = [10 + i * (10 + 48) for i in range(4)]
+    np.testing.assert_array_equal(int24_blocks_to_int32(buffer, offsets, [16] * 4), np.concatenate(blocks))
+
+def test_blocks_irregular():
+    blocks = [np.arange(3), np.arange(-5, 0), np.array([2**23 - 1])]
+    buffer = int32_to_int24(blocks[0]) + b"\x00" + int32_to_int24(blocks[1]) + b"\x00\x00" + int32_to_int24(blocks[2])
+    offsets = [0, 10, 27]
+    np.testing.assert_array_equal(int24_blocks_to_int32(buffer, offsets, [3, 5, 1]), np.concatenate(blocks))
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from openapi.openapi_stream import OpenapiStream
+from openapi.openapi_fast import parse_frame, parse_header
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, build_data_quality,
+                                    build_aux_sequence_data, MESSAGE_SIGNAL_DATA, MESSAGE_INTERPRETATION,
+                                    MESSAGE_DATA_QUALITY, MESSAGE_AUX_SEQUENCE_DATA, DATA_TYPE, SCALE_FACTOR, OFFSET,
+                                    PERIOD_TIME, UNIT, VECTOR_LENGTH, CHANNEL_TYPE)
+
+def assert_same_header(fast, kaitai):
+    for name in ("header_length", "message_type", "reserved1", "reserved2", "time_count", "content_length"):
+        assert getattr(fast, name) == getattr(kaitai, name)
+    for name in ("k", "l", "m", "n"):
+        assert getattr(fast.time_family, name) == getattr(kaitai.time_family, name)
+
+def parse_both(frame):
+    fast = parse_frame(frame)
+    kaitai = OpenapiStream.from_bytes(frame)
+    assert_same_header(fast.header, kaitai.header)
+    return fast.content, kaitai.content
+
+def test_header():
+    frame = build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(1, [0])]), (11, 0, 2, 0), 123456789)
+    assert_same_header(parse_header(frame), OpenapiStream.from_bytes(frame).header)
+
+def test_signal_data():
+    rng = np.random.default_rng(0)
+    signals = [(1, rng.integers(-2**23, 2**23, 100)), (3, rng.integers(-2**23, 2**23, 7)), (4, [])]
+    fast, kaitai = parse_both(build_frame(MESSAGE_SIGNAL_DATA, build_signal_data(signals), (16, 0, 0, 0), 42))
+    assert fast.number_of_signals == kaitai.number_of_signals == 3
+    for fast_signal, kaitai_signal, (signal_id, samples) in zip(fast.signals, kaitai.signals, signals):
+        assert fast_signal.signal_id == kaitai_signal.signal_id == signal_id
+        assert fast_signal.number_of_values == kaitai_signal.number_of_values
+        np.testing.assert_array_equal(fast_signal.samples, [value.calc_value for value in kaitai_signal.values])
+        np.testing.assert_array_equal(fast_signal.samples, samples)
+
+def test_interpretations():
+    interpretations = [(1, DATA_TYPE, 3), (1, SCALE_FACTOR, 10.0), (1, OFFSET, -0.5), (1, PERIOD_TIME, ((16, 0, 0, 0), 1)),
+                       (1, UNIT, "Pa"), (2, UNIT, "m/s"), (1, VECTOR_LENGTH, 1), (1, CHANNEL_TYPE, 1)]
+    fast, kaitai = parse_both(build_frame(MESSAGE_INTERPRETATION, build_interpretations(interpretations)))
+    assert len(fast.interpretations) == len(kaitai.interpretations) == len(interpretations)
+    for fast_item, kaitai_item in zip(fast.interpretations, kaitai.interpretations):
+        assert fast_item.signal_id == kaitai_item.signal_id
+        assert fast_item.descriptor_type == kaitai_item.descriptor_type
+        assert fast_item.value_length == kaitai_item.value_length
+        if fast_item.descriptor_type == OpenapiStream.Interpretation.EDescriptorType.unit:
+            assert fast_item.value.data == kaitai_item.value.data
+        elif fast_item.descriptor_type == OpenapiStream.Interpretation.EDescriptorType.period_time:
+            assert fast_item.value.stamp == kaitai_item.value.stamp
+            assert fast_item.value.time_family.k == kaitai_item.value.time_family.k
+        else:
+            assert fast_item.value == kaitai_item.value
+
+def test_data_quality():
+    fast, kaitai = parse_both(build_frame(MESSAGE_DATA_QUALITY, build_data_quality([(1, 0), (2, 4)])))
+    assert [(quality.signal_id, quality.validity) for quality in fast.qualities] == \
+           [(quality.signal_id, quality.validity) for quality in kaitai.qualities] == [(1, 0), (2, 4)]
+
+def test_aux_sequence_data():
+    messages = [(i, 1, 2, 8, 0x100 + i, i * 1000) for i in range(3)]
+    fast, kaitai = parse_both(build_frame(MESSAGE_AUX_SEQUENCE_DATA, build_aux_sequence_data([(5, messages)])))
+    assert fast.signals[0].signal_id == kaitai.signals[0].signal_id == 5
+    assert [aux.values.can_message_id for aux in fast.signals[0].data] == [0x100, 0x101, 0x102]
+
+def test_frame_at_offset_in_memoryview():
+    frame = build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(2, [1, -1])]))
+    package = parse_frame(memoryview(b"\x00" * 5 + frame), offset=5)
+    assert package.content.signals[0].signal_id == 2
+    np.testing.assert_array_equal(package.content.signals[0].samples, [1, -1])
+
+def test_incomplete_frame():
+    frame = build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(1, np.arange(10))]))
+    with pytest.raises(ValueError):
+        parse_frame(frame[:-1])
+
+def test_bad_magic():
+    frame = build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(1, [0])]))
+    with pytest.raises(ValueError):
+        parse_header(b"XX" + frame[2:])
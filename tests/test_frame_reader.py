@@ -0,0 +1,67 @@
+import socket
+import threading
+import numpy as np
+import pytest
+from openapi.openapi_writer import build_frame, build_signal_data, MESSAGE_SIGNAL_DATA
+from HelpFunctions.FrameReader import FrameReader
+
+def frames(count, values=100):
+    return [build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(1, np.arange(values) + i)]), time_count=i)
+            for i in range(count)]
+
+def send(data, chunk):
+    """
+    Returns the reading end of a socket pair, the data is sent in pieces of chunk bytes from a thread and the socket then closed
+    """
+    sender, receiver = socket.socketpair()
+    def run():
+        for offset in range(0, len(data), chunk):
+            sender.sendall(data[offset:offset + chunk])
+        sender.close()
+    threading.Thread(target=run, daemon=True).start()
+    return receiver
+
+@pytest.mark.parametrize("chunk", [1, 7, 1000, 2**20])
+def test_read_frame_reassembles_chunks(chunk):
+    expected = frames(20)
+    receiver = send(b"".join(expected), chunk)
+    # A small buffer makes the reader move and grow it
+    reader = FrameReader(receiver, size=256)
+    received = [bytes(frame) for frame in reader]
+    receiver.close()
+    assert received == expected
+    assert reader.frames == 20
+
+def test_read_frame_returns_none_at_end():
+    receiver = send(frames(1)[0], 2**20)
+    reader = FrameReader(receiver)
+    assert reader.read_frame() is not None
+    assert reader.read_frame() is None
+    receiver.close()
+
+def test_read_frame_partial_frame_at_end():
+    frame = frames(1)[0]
+    receiver = send(frame + frame[:40], 2**20)
+    reader = FrameReader(receiver)
+    assert bytes(reader.read_frame()) == frame
+    assert reader.read_frame() is None
+    receiver.close()
+
+def test_read_frames_batches():
+    expected = frames(10)
+    receiver = send(b"".join(expected), 2**20)
+    reader = FrameReader(receiver)
+    received = b""
+    batch = reader.read_frames()
+    while batch is not None:
+        received += bytes(batch)
+        batch = reader.read_frames()
+    receiver.close()
+    assert received == b"".join(expected)
+    assert reader.frames == 10
+
+def test_out_of_sync():
+    receiver = send(b"XX" + frames(1)[0][2:], 2**20)
+    with pytest.raises(ValueError):
+        FrameReader(receiver).read_frame()
+    receiver.close()
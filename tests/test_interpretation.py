@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from openapi.openapi_stream import OpenapiStream
+from openapi.openapi_fast import parse_frame
+from openapi.openapi_writer import (build_frame, build_interpretations, MESSAGE_INTERPRETATION, DATA_TYPE, SCALE_FACTOR,
+                                    OFFSET, PERIOD_TIME, UNIT, VECTOR_LENGTH, CHANNEL_TYPE)
+from HelpFunctions.Interpretation import InterpretationRegistry, to_units, full_scales
+
+INTERPRETATIONS = [
+    (1, DATA_TYPE, 3), (1, SCALE_FACTOR, 10.0), (1, OFFSET, 0.0), (1, UNIT, "V"),
+    (2, DATA_TYPE, 3), (2, SCALE_FACTOR, 31.6), (2, OFFSET, -0.25), (2, UNIT, "Pa"),
+    (2, PERIOD_TIME, ((16, 0, 0, 0), 2)), (2, VECTOR_LENGTH, 1), (2, CHANNEL_TYPE, 1),
+]
+frame = build_frame(MESSAGE_INTERPRETATION, build_interpretations(INTERPRETATIONS))
+samples = np.random.default_rng(0).integers(-2**23, 2**23, (2, 100))
+
+@pytest.fixture(params=["fast", "kaitai"])
+def registry(request):
+    registry = InterpretationRegistry()
+    parsed = parse_frame(frame) if request.param == "fast" else OpenapiStream.from_bytes(frame)
+    registry.update(parsed.content.interpretations)
+    return registry
+
+def test_convert(registry):
+    expected = samples * np.array([[10.0], [31.6]]) / 2**23 + np.array([[0.0], [-0.25]])
+    np.testing.assert_allclose(registry.convert(samples), expected, rtol=1e-12)
+    np.testing.assert_allclose(registry.convert(samples[::-1], signal_ids=[2, 1]), expected[::-1], rtol=1e-12)
+    np.testing.assert_allclose(registry.convert_signal(2, samples[1]), expected[1], rtol=1e-12)
+
+def test_convert_in_place(registry):
+    block = samples.astype(np.float64)
+    result = registry.convert(block, out=block)
+    assert result is block
+    np.testing.assert_allclose(block[0], samples[0] * 10.0 / 2**23)
+
+def test_descriptors(registry):
+    assert len(registry) == 2
+    assert list(registry.unit) == ["V", "Pa"]
+    assert np.isnan(registry.period[0])
+    assert registry.period[1] == 2 / 2**16
+    assert registry.channel_type[1] == 1
+    assert registry.has_offset
+
+def test_coefficients(registry):
+    gain, offset = registry.coefficients([2])
+    np.testing.assert_allclose(gain, [31.6 / 2**23])
+    np.testing.assert_allclose(offset, [-0.25])
+    # Copies, so a batch keeps the coefficients it was sent with
+    gain[0] = 0
+    assert registry.gain[1] != 0
+
+def test_defaults_and_growth():
+    registry = InterpretationRegistry(1)
+    # Until interpreted, a signal is a 24 bit integer with scale factor 1
+    np.testing.assert_allclose(registry.convert(np.array([[2**22], [-2**23]])), [[0.5], [-1.0]])
+    assert len(registry) == 2
+    assert registry.coefficients()[1] is None
+    registry.update(parse_frame(build_frame(MESSAGE_INTERPRETATION, build_interpretations([(5, SCALE_FACTOR, 2.0)]))).content.interpretations)
+    assert len(registry) == 5
+    assert registry.gain[4] == 2.0 / 2**23
+
+def test_data_types():
+    registry = InterpretationRegistry()
+    interpretations = [(1, DATA_TYPE, 2), (2, DATA_TYPE, 6)]
+    registry.update(parse_frame(build_frame(MESSAGE_INTERPRETATION, build_interpretations(interpretations))).content.interpretations)
+    np.testing.assert_allclose(registry.full_scale, [full_scales[2], 1])
+    np.testing.assert_allclose(registry.convert(np.array([[2**14], [0.5]])), [[0.5], [0.5]])
+
+def test_later_interpretations_replace_earlier(registry):
+    registry.update(parse_frame(build_frame(MESSAGE_INTERPRETATION, build_interpretations([(2, OFFSET, 0.0)]))).content.interpretations)
+    assert not registry.has_offset
+    assert registry.coefficients()[1] is None
+
+def test_to_units():
+    gain, offset = np.array([2.0, 3.0]), np.array([1.0, -1.0])
+    np.testing.assert_array_equal(to_units(np.ones((2, 3)), gain, offset), [[3, 3, 3], [2, 2, 2]])
+    np.testing.assert_array_equal(to_units(np.ones((2, 3)), gain), [[2, 2, 2], [3, 3, 3]])
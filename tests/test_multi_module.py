@@ -0,0 +1,56 @@
+import time
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from HelpFunctions.Buffer import channelBuffer
+from HelpFunctions.MultiModule import MultiModuleAcquisition
+
+SAMPLE_RATE = 1000
+
+def fake_handler(ip, signal, end_sample, channels=2):
+    """
+    Returns a handler whose buffer holds signal up to end_sample on every channel
+    """
+    buffer = channelBuffer(channels, 100)
+    for channel in range(channels):
+        buffer.append(channel, signal[:end_sample] + channel)
+    return SimpleNamespace(ip=ip, buffer=buffer, end_time=np.full(channels, end_sample / SAMPLE_RATE),
+                           lanxi=SimpleNamespace(sample_rate=SAMPLE_RATE))
+
+def acquisition(handlers):
+    acquisition = MultiModuleAcquisition([handler.ip for handler in handlers])
+    acquisition.handlers = handlers
+    acquisition.channels = sum(handler.buffer.channels for handler in handlers)
+    return acquisition
+
+def test_aligns_modules_ahead():
+    signal = np.arange(1000.0)
+    merged = acquisition([fake_handler("127.0.0.1", signal, 500), fake_handler("127.0.0.2", signal, 507)]).getAligned(10)
+    expected = signal[490:500]
+    np.testing.assert_array_equal(merged, [expected, expected + 1, expected, expected + 1])
+
+def test_common_end_time():
+    signal = np.arange(1000.0)
+    assert acquisition([fake_handler("127.0.0.1", signal, 500), fake_handler("127.0.0.2", signal, 507)]).common_end_time() == 0.5
+
+def test_too_far_ahead():
+    signal = np.arange(1000.0)
+    with pytest.raises(ValueError):
+        acquisition([fake_handler("127.0.0.1", signal, 100), fake_handler("127.0.0.2", signal, 195)]).getAligned(10)
+
+def test_simulated_modules_are_aligned(simulators):
+    for host in ("127.0.0.1", "127.0.0.2"):
+        simulators(host, channels=2)
+    modules = MultiModuleAcquisition(["127.0.0.1", "127.0.0.2"])
+    modules.setup()
+    modules.start()
+    try:
+        time.sleep(1.5)
+        merged = modules.getAligned(4096)
+    finally:
+        modules.stop()
+    assert merged.shape == (4, 4096)
+    # Both simulators send the same sine per channel, against the same clock
+    assert np.max(np.abs(merged[0] - merged[2])) < 0.01
+    assert np.max(np.abs(merged[1] - merged[3])) < 0.01
+    assert np.max(np.abs(merged[0])) > 0.9
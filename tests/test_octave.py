@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from HelpFunctions.Octave import OctaveAnalyzer, band_centers
+
+SAMPLE_RATE = 48000
+
+def sine(frequency, seconds=1.0, amplitude=1.0):
+    return amplitude * np.sin(2 * np.pi * frequency * np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE)
+
+def test_band_centers():
+    thirds = band_centers(3, 19, 20000)
+    assert len(thirds) == 31
+    assert thirds[17] == pytest.approx(1000)
+    np.testing.assert_allclose(thirds[[0, 30]], [19.95, 19953], rtol=1e-3)
+    # Exact mid band frequencies, the nominal 20 Hz band is at 19.95 Hz
+    assert band_centers(3, 20, 20000)[0] == pytest.approx(25.12, abs=0.01)
+    np.testing.assert_allclose(band_centers(1, 20, 20000), 1000 * 10**(0.3 * np.arange(-5, 5)))
+
+@pytest.mark.parametrize("frequency", [100, 1000, 10000])
+def test_sine_level(frequency):
+    analyzer = OctaveAnalyzer(SAMPLE_RATE, fraction=3)
+    analyzer.append(sine(frequency, 2.0))
+    centers, levels = analyzer.levels()
+    band = np.argmin(np.abs(centers - frequency))
+    # A 1 V peak sine is 1/sqrt(2) V RMS
+    assert levels[0, band] == pytest.approx(-3.01, abs=0.1)
+    assert np.all(np.delete(levels[0], band) < levels[0, band] - 10)
+
+def test_block_size_does_not_matter():
+    data = np.vstack((sine(500), sine(2000, amplitude=0.1)))
+    levels = []
+    for block in (64, 1000, 48000):
+        analyzer = OctaveAnalyzer(SAMPLE_RATE, channels=2, fraction=1)
+        for start in range(0, data.shape[1], block):
+            analyzer.append(data[:, start:start + block])
+        levels.append(analyzer.levels()[1])
+    np.testing.assert_allclose(levels[0], levels[1], atol=1e-9)
+    np.testing.assert_allclose(levels[0], levels[2], atol=1e-9)
+
+def test_levels_after_integration_time():
+    analyzer = OctaveAnalyzer(SAMPLE_RATE, integration=0.5)
+    analyzer.append(sine(1000, 0.25))
+    assert np.all(np.isneginf(analyzer.levels()[1]))
+    analyzer.append(sine(1000, 0.25))
+    assert np.all(np.isfinite(analyzer.levels()[1]))
+
+def test_reference():
+    analyzer = OctaveAnalyzer(SAMPLE_RATE, fraction=1, ref=20e-6)
+    analyzer.append(sine(1000, amplitude=np.sqrt(2)))
+    centers, levels = analyzer.levels()
+    # 1 Pa RMS is 94 dB SPL
+    assert levels[0, np.argmin(np.abs(centers - 1000))] == pytest.approx(93.98, abs=0.1)
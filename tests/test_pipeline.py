@@ -0,0 +1,98 @@
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, MESSAGE_SIGNAL_DATA,
+                                    MESSAGE_INTERPRETATION, SCALE_FACTOR)
+from HelpFunctions.lanxi import LanXI
+from HelpFunctions.Pipeline import Pipeline, _decoder
+
+SLOT_SIZE = 2**12
+BLOCK_SIZE = 256
+
+def test_decoder():
+    """
+    Runs a decoder in this process on a full batch, a batch missing a channel and a batch without signal data
+    """
+    frames_memory = shared_memory.SharedMemory(create=True, size=3 * SLOT_SIZE)
+    blocks_memory = shared_memory.SharedMemory(create=True, size=2 * 2 * BLOCK_SIZE * 8)
+    try:
+        batches = [
+            build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(1, np.arange(100)), (2, -np.arange(100))]), (16, 0, 0, 0), 65536),
+            build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(1, np.arange(100))])),
+            build_frame(MESSAGE_INTERPRETATION, build_interpretations([(1, SCALE_FACTOR, 1.0)])),
+        ]
+        work, done, free_frames, free_blocks = queue.Queue(), queue.Queue(), queue.Queue(), queue.Queue()
+        free_blocks.put(1)
+        gain, offset = np.array([2.0, 4.0]), np.array([0.5, 0.0])
+        for sequence, batch in enumerate(batches):
+            frames_memory.buf[sequence * SLOT_SIZE:sequence * SLOT_SIZE + len(batch)] = batch
+            work.put((sequence, sequence, len(batch), (gain, offset)))
+        work.put(None)
+        counters = mp.Array('q', 4)
+        _decoder(2, frames_memory.name, blocks_memory.name, SLOT_SIZE, BLOCK_SIZE, free_frames, free_blocks, work, done, counters)
+        results = [done.get_nowait() for _ in range(4)]
+        assert results[0][:3] == (0, 1, 100)
+        assert results[0][3] == 1.0
+        assert results[1] == (1, None, 0, None)
+        assert results[2] == (2, None, 0, None)
+        assert results[3] is None
+        assert counters[:] == [0, 0, 0, 1]
+        assert sorted(free_frames.get_nowait() for _ in range(3)) == [0, 1, 2]
+        blocks = np.ndarray((2, 2, BLOCK_SIZE), np.float64, blocks_memory.buf)
+        np.testing.assert_array_equal(blocks[1, :, :100], [np.arange(100) * 2.0 + 0.5, -np.arange(100) * 4.0])
+        del blocks
+    finally:
+        for memory in (frames_memory, blocks_memory):
+            memory.close()
+            memory.unlink()
+
+def start(pipeline):
+    errors = []
+    def run():
+        try:
+            pipeline.startStream()
+        except RuntimeError as error:
+            errors.append(error)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, errors
+
+def test_stream(simulators):
+    simulators(channels=4, block_size=256)
+    module = LanXI("127.0.0.1")
+    module.setup_stream()
+    pipeline = Pipeline(module, decoders=2)
+    received = []
+    pipeline.addConsumer(lambda block: received.append(block.shape[1]))
+    thread, errors = start(pipeline)
+    time.sleep(1.5)
+    pipeline.stopStream()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert errors == []
+    stats = pipeline.stats()
+    assert stats["frames"] > 0
+    assert stats["samples"] == 4 * sum(received) > 0
+    # Channel 3 carries a 3 kHz sine at 1 V
+    data = pipeline.buffer.getChannel(2, 25600)
+    assert np.fft.rfftfreq(len(data), 1 / module.sample_rate)[np.argmax(np.abs(np.fft.rfft(data)))] == 3000
+    assert abs(np.max(np.abs(data)) - 1.0) < 0.01
+
+def test_dead_decoder_stops_the_pipeline(simulators):
+    simulators(channels=2)
+    module = LanXI("127.0.0.1")
+    module.setup_stream()
+    pipeline = Pipeline(module, decoders=2, timeout=0.2)
+    thread, errors = start(pipeline)
+    time.sleep(0.5)
+    os.kill(pipeline.processes[1].pid, signal.SIGKILL)
+    thread.join(10)
+    assert not thread.is_alive()
+    assert len(errors) == 1 and "exited with code" in str(errors[0])
+    assert not any(process.is_alive() for process in pipeline.processes)
+    module.rest.put("/rest/rec/measurements/stop")
@@ -0,0 +1,38 @@
+import time
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import custom_realtime_plot
+
+def test_acquisition_runs_independent_of_the_plot(simulators, monkeypatch, tmp_path):
+    simulators(channels=2)
+    monkeypatch.setattr(custom_realtime_plot.plt, "show", lambda: None)
+    acquisition = custom_realtime_plot.CustomDataAcquisition("127.0.0.1", [0], 51200)
+    acquisition.initialize_module()
+    plotter = custom_realtime_plot.RealTimePlotter(acquisition, save_path=str(tmp_path), chunk_size=2**13, queue_size=8)
+    try:
+        plotter.start_plotting()
+        plotter.on_key_press(type("Event", (), {"key": "s"})())
+        # The plot is not updated, so the queue overruns while the recording goes on
+        time.sleep(1.0)
+        assert plotter.overruns > 0
+        assert plotter.max_queue_depth == 8
+        # The acquisition thread ends with its next frame, so the queue is not refilled while the plot is drawn
+        plotter.running = False
+        plotter.acquisition.join()
+        plotter.update_plot(0)
+        assert plotter.queue.empty()
+        # Channel 1 carries a 1 kHz sine at 1 V
+        assert abs(np.max(plotter.buffer.get()) - 1.0) < 0.01
+    finally:
+        plotter.stop()
+        acquisition.cleanup()
+        custom_realtime_plot.plt.close(plotter.fig)
+    assert not plotter.acquisition.is_alive()
+    data = np.load(str(tmp_path / "data.npy"))
+    timestamps = np.load(str(tmp_path / "timestamps.npy"))
+    # Every block read was recorded as a row, also the ones dropped from the display
+    assert data.shape[1] == 512
+    assert data.shape[0] >= 80
+    assert timestamps.shape == (data.shape[0],)
+    assert np.all(np.diff(timestamps) >= 0)
@@ -0,0 +1,56 @@
+import numpy as np
+from HelpFunctions.Recorder import Recorder, read_blocks
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "recording.npy")
+    rng = np.random.default_rng(0)
+    blocks = [rng.standard_normal((3, n)) for n in (10, 1, 500, 77)]
+    with Recorder(path, channels=3) as recorder:
+        for block in blocks:
+            recorder.append(block)
+    data = np.load(path)
+    assert data.shape == (588, 3)
+    np.testing.assert_array_equal(data.T, np.concatenate(blocks, axis=1))
+
+def test_readable_while_recording(tmp_path):
+    path = str(tmp_path / "recording.npy")
+    recorder = Recorder(path, channels=2, dtype=np.float32, fsync_interval=None)
+    recorder.append(np.ones((2, 100)))
+    recorder.sync()
+    recorder.append(np.ones((2, 50)))
+    # Only the samples up to the last sync are in the header
+    data = np.load(path, mmap_mode='r')
+    assert data.shape == (100, 2)
+    assert data.dtype == np.float32
+    del data
+    recorder.close()
+    assert np.load(path).shape == (150, 2)
+
+def test_one_channel(tmp_path):
+    path = str(tmp_path / "recording.npy")
+    with Recorder(path, channels=1) as recorder:
+        recorder.append(np.arange(5.0))
+    np.testing.assert_array_equal(np.load(path)[:, 0], np.arange(5.0))
+
+def test_one_dimensional(tmp_path):
+    path = str(tmp_path / "timestamps.npy")
+    with Recorder(path, channels=None) as recorder:
+        recorder.append([1.0])
+        recorder.append([2.0, 3.0])
+    np.testing.assert_array_equal(np.load(path), [1.0, 2.0, 3.0])
+
+def test_creates_directory(tmp_path):
+    path = str(tmp_path / "a" / "b" / "recording.npy")
+    with Recorder(path, channels=1) as recorder:
+        recorder.append(np.zeros(1))
+    assert np.load(path).shape == (1, 1)
+
+def test_read_blocks(tmp_path):
+    path = str(tmp_path / "recording.npy")
+    data = np.arange(2 * 1000.0).reshape(2, 1000)
+    with Recorder(path, channels=2) as recorder:
+        recorder.append(data)
+    blocks = list(read_blocks(path, block_size=300))
+    assert [block.shape for block in blocks] == [(2, 300)] * 3 + [(2, 100)]
+    np.testing.assert_array_equal(np.concatenate(blocks, axis=1), data)
+    np.testing.assert_array_equal(np.concatenate(list(read_blocks(path, 300, channel=1))), data[1])
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pytest
+from matplotlib.backend_bases import ResizeEvent
+from HelpFunctions.Rendering import linear_edges, log_edges, minmax_envelope, envelope_x, reduce_max
+import custom_realtime_plot
+
+def test_linear_edges():
+    np.testing.assert_array_equal(linear_edges(10, 5), [0, 2, 4, 6, 8])
+    # Never more bins than values
+    np.testing.assert_array_equal(linear_edges(3, 100), [0, 1, 2])
+
+def test_log_edges():
+    edges = log_edges(4097, 500)
+    assert edges[0] == 1
+    assert np.all(np.diff(edges) > 0)
+    assert edges[-1] < 4097
+    assert len(edges) <= 500
+
+def test_minmax_envelope_keeps_extremes():
+    values = np.array([0, 5, -1, 2, 9, 3, -7, 1])
+    edges = linear_edges(len(values), 2)
+    np.testing.assert_array_equal(minmax_envelope(values, edges), [-1, 5, -7, 9])
+    np.testing.assert_array_equal(envelope_x(np.arange(8) * 0.5, edges), [0, 0, 2, 2])
+
+def test_reduce_max():
+    np.testing.assert_array_equal(reduce_max(np.array([1, 3, 2, 8, 4]), np.array([0, 2, 3])), [3, 2, 8])
+
+@pytest.fixture
+def plotter():
+    plotter = custom_realtime_plot.RealTimePlotter(SimpleNamespace(sample_rate=51200), chunk_size=2**13)
+    yield plotter
+    custom_realtime_plot.plt.close(plotter.fig)
+
+def test_traces_are_reduced_to_the_axes_width(plotter):
+    plotter.queue.put(np.sin(np.arange(2**14)))
+    plotter.update_plot(0)
+    width = int(plotter.ax1.get_window_extent().width)
+    assert len(plotter.line1.get_ydata()) == 2 * len(plotter.time_edges) <= 2 * width
+    assert len(plotter.line2.get_ydata()) == len(plotter.freq_edges)
+    assert np.max(plotter.line1.get_ydata()) == pytest.approx(1, abs=1e-3)
+
+def test_resize_recomputes_edges(plotter):
+    edges = len(plotter.time_edges)
+    plotter.fig.set_size_inches(2 * plotter.fig.get_size_inches())
+    ResizeEvent("resize_event", plotter.fig.canvas)._process()
+    assert len(plotter.time_edges) > edges
+    plotter.queue.put(np.zeros(2**13))
+    plotter.update_plot(0)
+    assert len(plotter.line1.get_ydata()) == len(plotter.line1.get_xdata()) == 2 * len(plotter.time_edges)
@@ -0,0 +1,42 @@
+import time
+import pytest
+import requests
+import simulator
+from HelpFunctions.Rest import RestClient
+
+def test_requests_share_one_connection(simulators, monkeypatch):
+    simulators(channels=2)
+    clients = []
+    respond = simulator.RequestHandler._respond
+    def record(handler):
+        clients.append(handler.client_address)
+        respond(handler)
+    for method in ("do_GET", "do_PUT", "do_POST"):
+        monkeypatch.setattr(simulator.RequestHandler, method, record)
+    with RestClient("127.0.0.1") as rest:
+        assert rest.put("/rest/rec/open").status_code == 200
+        assert rest.get("/rest/rec/module/info").json()["numberOfInputChannels"] == 2
+        assert rest.post("/rest/rec/channels/input/all/transducers/detect").status_code == 200
+        setup = rest.get("/rest/rec/channels/input/default").json()
+        assert rest.put("/rest/rec/channels/input", json=setup).status_code == 200
+    assert len(clients) == 5
+    assert len(set(clients)) == 1
+
+def test_wait_onchange(simulators):
+    simulators(channels=1)
+    rest = RestClient("127.0.0.1")
+    rest.post("/rest/rec/channels/input/all/transducers/detect")
+    start = time.monotonic()
+    onchange = rest.wait_onchange("transducerDetectionActive")
+    # The simulated detection takes 0.5 s, the poll interval is at most 0.5 s
+    assert 0.4 < time.monotonic() - start < 1.2
+    assert onchange["transducerDetectionActive"] is False
+    with pytest.raises(TimeoutError):
+        rest.wait_onchange("transducerDetectionActive", value=True, timeout=0.1)
+    rest.close()
+
+def test_connection_refused():
+    # Nothing listens on this address
+    rest = RestClient("127.0.0.9", timeout=1.0, retries=1, backoff=0.01)
+    with pytest.raises(requests.ConnectionError):
+        rest.get("/rest/rec/module/info")
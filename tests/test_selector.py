@@ -0,0 +1,42 @@
+import numpy as np
+from openapi.openapi_stream import OpenapiStream
+from openapi.openapi_fast import FrameSelector
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, build_aux_sequence_data,
+                                    MESSAGE_SIGNAL_DATA, MESSAGE_INTERPRETATION, MESSAGE_AUX_SEQUENCE_DATA, SCALE_FACTOR)
+
+EMessageType = OpenapiStream.Header.EMessageType
+
+signal_frame = build_frame(MESSAGE_SIGNAL_DATA, build_signal_data([(signal_id, np.full(8, signal_id)) for signal_id in (1, 2, 3)]))
+interpretation_frame = build_frame(MESSAGE_INTERPRETATION, build_interpretations([(1, SCALE_FACTOR, 2.0)]))
+aux_frame = build_frame(MESSAGE_AUX_SEQUENCE_DATA, build_aux_sequence_data([(1, [(0, 0, 0, 8, 1, 2)])]))
+
+def test_selects_all_by_default():
+    selector = FrameSelector()
+    assert all(selector.parse(frame) is not None for frame in (signal_frame, interpretation_frame, aux_frame))
+    assert selector.skipped == 0
+
+def test_skips_other_message_types():
+    selector = FrameSelector({EMessageType.e_signal_data, EMessageType.e_interpretation})
+    assert selector.parse(aux_frame) is None
+    assert selector.parse(interpretation_frame).header.message_type == EMessageType.e_interpretation
+    assert selector.parse(signal_frame).content.number_of_signals == 3
+    assert selector.skipped == 1
+
+def test_accepts_message_type_numbers():
+    selector = FrameSelector({MESSAGE_SIGNAL_DATA})
+    assert selector.wants(signal_frame)
+    assert not selector.wants(interpretation_frame)
+
+def test_selects_signals():
+    selector = FrameSelector({EMessageType.e_signal_data, EMessageType.e_interpretation}, {2, 3})
+    signals = selector.parse(signal_frame).content.signals
+    assert [signal.signal_id for signal in signals] == [2, 3]
+    np.testing.assert_array_equal(signals[1].samples, np.full(8, 3))
+    # Interpretations of all signals are kept
+    assert len(selector.parse(interpretation_frame).content.interpretations) == 1
+
+def test_frame_at_offset():
+    selector = FrameSelector({EMessageType.e_signal_data}, {1})
+    buffer = interpretation_frame + signal_frame
+    assert selector.parse(buffer) is None
+    assert selector.parse(buffer, len(interpretation_frame)).content.signals[0].signal_id == 1
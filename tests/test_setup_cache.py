@@ -0,0 +1,113 @@
+import json
+import time
+import simulator
+from HelpFunctions.lanxi import LanXI
+from HelpFunctions.SetupCache import SetupCache
+
+MODULE_INFO = {"serialNumber": 100, "firmwareVersion": "2.10"}
+TRANSDUCERS = [{"type": {"number": "4189"}, "serialNumber": 1}, None]
+
+def test_store_and_load(tmp_path):
+    cache = SetupCache(str(tmp_path))
+    cache.store("10.0.0.1", MODULE_INFO, {"channels": []}, TRANSDUCERS)
+    entry = cache.load(SetupCache.key(MODULE_INFO))
+    assert entry["module_info"] == MODULE_INFO
+    assert entry["transducers"] == TRANSDUCERS
+    assert cache.lookup("10.0.0.1") == entry
+    assert cache.lookup("10.0.0.2") is None
+    # Another cache on the same folder, e.g. the next run
+    assert SetupCache(str(tmp_path)).lookup("10.0.0.1") == entry
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_key_changes_with_firmware():
+    assert SetupCache.key(MODULE_INFO) == "100_2.10"
+    assert SetupCache.key(dict(MODULE_INFO, firmwareVersion="2.11")) != SetupCache.key(MODULE_INFO)
+
+def test_identities():
+    assert SetupCache.identities(TRANSDUCERS) == [["4189", 1], None]
+
+def test_expired(tmp_path):
+    cache = SetupCache(str(tmp_path), max_age=-1)
+    cache.store("10.0.0.1", MODULE_INFO, {}, TRANSDUCERS)
+    assert cache.lookup("10.0.0.1") is None
+    assert SetupCache(str(tmp_path), max_age=None).lookup("10.0.0.1") is not None
+
+def test_invalidate(tmp_path):
+    cache = SetupCache(str(tmp_path))
+    cache.store("10.0.0.1", MODULE_INFO, {}, TRANSDUCERS)
+    cache.invalidate("10.0.0.1")
+    assert cache.lookup("10.0.0.1") is None
+    assert cache.load(SetupCache.key(MODULE_INFO)) is None
+    cache.invalidate("10.0.0.1")
+
+def test_corrupt_file_is_a_miss(tmp_path):
+    cache = SetupCache(str(tmp_path))
+    (tmp_path / "index.json").write_text("{")
+    assert cache.lookup("10.0.0.1") is None
+
+def requests_made(monkeypatch):
+    """
+    Returns the list which every (method, path) served by the simulators is added to
+    """
+    requests = []
+    respond = simulator.RequestHandler._respond
+    def record(handler):
+        requests.append((handler.command, handler.path))
+        respond(handler)
+    for method in ("do_GET", "do_PUT", "do_POST"):
+        monkeypatch.setattr(simulator.RequestHandler, method, record)
+    return requests
+
+def setup_module_stream(cache, trust_cache=False):
+    module = LanXI("127.0.0.1", cache, trust_cache)
+    module.setup_stream()
+    module.rest.put("/rest/rec/measurements/stop")
+    module.rest.put("/rest/rec/finish")
+    module.rest.put("/rest/rec/close")
+    return module
+
+def test_lanxi_skips_detection_with_cache(simulators, monkeypatch, tmp_path):
+    simulators(channels=2, teds_channels=[1])
+    requests = requests_made(monkeypatch)
+    cache = SetupCache(str(tmp_path))
+    first = setup_module_stream(cache)
+    assert ("POST", "/rest/rec/channels/input/all/transducers/detect") in requests
+    del requests[:]
+    second = setup_module_stream(cache)
+    assert ("POST", "/rest/rec/channels/input/all/transducers/detect") not in requests
+    assert ("GET", "/rest/rec/channels/input/default") not in requests
+    assert ("GET", "/rest/rec/module/info") in requests
+    assert second.channels == first.channels
+    assert second.sample_rate == first.sample_rate
+    del requests[:]
+    setup_module_stream(cache, trust_cache=True)
+    assert [path for method, path in requests if method == "GET"] == ["/rest/rec/destination/socket"]
+
+def test_lanxi_detects_when_reported_transducers_differ(simulators, monkeypatch, tmp_path):
+    cache = SetupCache(str(tmp_path))
+    simulators(channels=2, teds_channels=[1])
+    setup_module_stream(cache)
+    # The entry holds another microphone than the one the module reports
+    entry = cache.lookup("127.0.0.1")
+    entry["transducers"][1]["serialNumber"] += 1
+    with open(str(tmp_path / (SetupCache.key(entry["module_info"]) + ".json")), "w") as f:
+        json.dump(entry, f)
+    requests = requests_made(monkeypatch)
+    setup_module_stream(cache)
+    assert ("POST", "/rest/rec/channels/input/all/transducers/detect") in requests
+
+def test_lanxi_entry_expires_after_it_was_fetched(simulators, monkeypatch, tmp_path):
+    cache = SetupCache(str(tmp_path), max_age=1)
+    simulators(channels=2, teds_channels=[1])
+    setup_module_stream(cache)
+    saved = cache.lookup("127.0.0.1")["saved"]
+    requests = requests_made(monkeypatch)
+    setup_module_stream(cache)
+    assert ("POST", "/rest/rec/channels/input/all/transducers/detect") not in requests
+    # Using the entry does not renew it
+    assert cache.lookup("127.0.0.1")["saved"] == saved
+    time.sleep(max(0, saved + 1.1 - time.time()))
+    del requests[:]
+    setup_module_stream(cache)
+    assert ("POST", "/rest/rec/channels/input/all/transducers/detect") in requests
+    assert ("GET", "/rest/rec/channels/input/default") in requests
@@ -0,0 +1,54 @@
+import socket
+import numpy as np
+import requests
+from openapi.openapi_fast import parse_frame
+from openapi.openapi_stream import OpenapiStream
+from HelpFunctions.FrameReader import FrameReader
+from HelpFunctions.lanxi import LanXI
+
+EMessageType = OpenapiStream.Header.EMessageType
+EDescriptorType = OpenapiStream.Interpretation.EDescriptorType
+
+def test_rest(simulators):
+    simulator = simulators(channels=4, teds_channels=[0, 2], serial=1234)
+    host = "http://127.0.0.1"
+    info = requests.get(host + "/rest/rec/module/info").json()
+    assert info["serialNumber"] == 1234
+    assert info["numberOfInputChannels"] == 4
+    transducers = requests.get(host + "/rest/rec/channels/input/all/transducers").json()
+    assert [transducer is not None for transducer in transducers] == [True, False, True, False]
+    assert len(requests.get(host + "/rest/rec/channels/input/default").json()["channels"]) == 4
+    assert requests.get(host + "/rest/rec/destination/socket").json()["tcpPort"] == simulator.stream_port
+    assert requests.get(host + "/rest/rec/unknown").status_code == 404
+
+def test_stream(simulators):
+    simulators(channels=2, sample_rate=51200, block_size=256, pace=False)
+    module = LanXI("127.0.0.1")
+    module.setup_stream()
+    assert module.sample_rate == 51200
+    sock = socket.create_connection(("127.0.0.1", module.inputport))
+    reader = FrameReader(sock)
+    package = parse_frame(reader.read_frame())
+    assert package.header.message_type == EMessageType.e_interpretation
+    scale_factors = [interpretation.value for interpretation in package.content.interpretations
+                     if interpretation.descriptor_type == EDescriptorType.scale_factor]
+    assert scale_factors == [10.0, 10.0]
+    samples = {1: [], 2: []}
+    time_counts = []
+    for _ in range(40):
+        package = parse_frame(reader.read_frame())
+        assert package.header.message_type == EMessageType.e_signal_data
+        time_counts.append(package.header.time_count)
+        for signal in package.content.signals:
+            samples[signal.signal_id].append(signal.samples)
+    sock.close()
+    module.rest.put("/rest/rec/measurements/stop")
+    # Packages follow each other without gaps
+    assert len(set(np.diff(time_counts))) == 1
+    # Channel n carries a sine of n kHz at 1 V, full scale is 10 V
+    for signal_id, frequency in ((1, 1000), (2, 2000)):
+        volts = np.concatenate(samples[signal_id]) * 10.0 / 2**23
+        spectrum = np.abs(np.fft.rfft(volts)) / len(volts) * 2
+        freq = np.fft.rfftfreq(len(volts), 1 / 51200)
+        assert freq[np.argmax(spectrum)] == frequency
+        assert abs(np.max(spectrum) - 1.0) < 0.01
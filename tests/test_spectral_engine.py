@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from scipy.signal import periodogram, get_window
+from fft_utils import SpectralEngine, spectral_engine, window_functions
+
+rng = np.random.default_rng(0)
+
+@pytest.mark.parametrize("window", sorted(window_functions))
+@pytest.mark.parametrize("scaling", ["power", "density"])
+def test_matches_scipy_periodogram(window, scaling):
+    block = rng.standard_normal((2, 1024))
+    engine = SpectralEngine(2048, 1024, window, scaling)
+    expected_freq, expected = periodogram(block, fs=2048, window=window_functions[window], detrend=False,
+                                          scaling='spectrum' if scaling == 'power' else 'density', axis=-1)
+    np.testing.assert_allclose(engine.freq, expected_freq)
+    np.testing.assert_allclose(engine.spectrum(block), expected, rtol=1e-10)
+
+def test_windows_are_periodic():
+    engine = SpectralEngine(1000, 8, 'hanning')
+    np.testing.assert_allclose(engine.window, get_window('hann', 8))
+    assert engine.window[0] == 0 and engine.window[-1] != 0
+    # Equivalent noise bandwidth of the Hann window
+    assert engine.enbw == pytest.approx(1.5)
+
+@pytest.mark.parametrize("window, numpy_window", [("hamming", np.hamming), ("hanning", np.hanning),
+                                                  ("blackman", np.blackman)])
+def test_symmetric_windows_match_numpy(window, numpy_window):
+    np.testing.assert_allclose(SpectralEngine(1000, 9, window, sym=True).window, numpy_window(9), atol=1e-15)
+
+def test_compute_fft_keeps_symmetric_windows():
+    from fft_analyzer import compute_fft
+    block = rng.standard_normal(1000)
+    freq, fft_db = compute_fft(block, 1000, 'hanning')
+    np.testing.assert_allclose(freq, np.fft.rfftfreq(1000, 1 / 1000))
+    np.testing.assert_allclose(fft_db, 20 * np.log10(np.abs(np.fft.rfft(block * np.hanning(1000)))))
+    with pytest.raises(ValueError):
+        compute_fft(block, 1000, 'kaiser')
+
+def test_amplitude_of_sine():
+    t = np.arange(4096) / 4096
+    engine = SpectralEngine(4096, 4096, 'hann', 'amplitude')
+    freq, spectrum_db = engine.spectrum_db(np.sqrt(2) * np.sin(2 * np.pi * 512 * t))
+    # RMS amplitude of a 1 V RMS sine on a bin
+    assert freq[np.argmax(spectrum_db)] == 512
+    assert abs(np.max(spectrum_db)) < 1e-6
+
+def test_batched_channels_match_single():
+    block = rng.standard_normal((4, 256))
+    engine = SpectralEngine(1000, 256)
+    batched = engine.spectrum(block)
+    for channel in range(4):
+        np.testing.assert_allclose(batched[channel], engine.spectrum(block[channel]))
+
+def test_single_precision():
+    block = rng.standard_normal(512)
+    spectrum = SpectralEngine(1000, 512, dtype=np.float32).spectrum(block)
+    assert spectrum.dtype == np.float32
+    np.testing.assert_allclose(spectrum, SpectralEngine(1000, 512).spectrum(block), rtol=1e-4, atol=1e-6)
+
+def test_window_array():
+    window = np.ones(16)
+    engine = SpectralEngine(1000, 16, window, 'none')
+    np.testing.assert_allclose(engine.spectrum(np.ones(16)), [16] + [0] * 8, atol=1e-12)
+    with pytest.raises(ValueError):
+        SpectralEngine(1000, 32, window)
+
+def test_unsupported_arguments():
+    with pytest.raises(ValueError):
+        SpectralEngine(1000, 16, 'kaiser')
+    with pytest.raises(ValueError):
+        SpectralEngine(1000, 16, scaling='magnitude')
+
+def test_engines_are_shared():
+    assert spectral_engine(1000, 64, 'hann') is spectral_engine(1000, 64, 'hann')
+    assert spectral_engine(1000, 64, 'hann') is not spectral_engine(1000, 128, 'hann')
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from scipy.signal import spectrogram
+from fft_utils import StreamingSTFT
+
+rng = np.random.default_rng(0)
+data = rng.standard_normal(10000)
+
+def columns(stft, block):
+    return np.concatenate([stft.append(data[start:start + block]) for start in range(0, len(data), block)])
+
+def expected():
+    return spectrogram(data, fs=1000, window='hamming', nperseg=256, noverlap=128, detrend=False, scaling='spectrum')
+
+@pytest.mark.parametrize("block", [1, 100, 256, 10000])
+def test_matches_scipy_spectrogram(block):
+    stft = StreamingSTFT(1000, nfft=256, dtype=np.float64)
+    result = columns(stft, block)
+    freq, times, spectra = expected()
+    np.testing.assert_allclose(stft.freq, freq)
+    np.testing.assert_allclose(result, spectra.T, rtol=1e-10)
+    np.testing.assert_allclose(stft.times(), times)
+
+def test_keeps_one_segment():
+    stft = StreamingSTFT(1000, nfft=256)
+    columns(stft, 333)
+    assert len(stft.tail) < 256
+    assert stft.dtype == np.float32 and stft.pending.dtype == np.float32
+
+@pytest.mark.parametrize("reduction", ["mean", "max"])
+def test_reduce(reduction):
+    stft = StreamingSTFT(1000, nfft=256, reduce=4, reduction=reduction, dtype=np.float64)
+    result = columns(stft, 1000)
+    spectra = expected()[2].T
+    groups = spectra[:len(spectra) // 4 * 4].reshape(-1, 4, spectra.shape[1])
+    np.testing.assert_allclose(result, groups.mean(axis=1) if reduction == "mean" else groups.max(axis=1), rtol=1e-10)
+    # Centers of the combined columns
+    np.testing.assert_allclose(stft.times(), expected()[1][:len(groups) * 4].reshape(-1, 4).mean(axis=1))
+
+def test_record(tmp_path):
+    path = str(tmp_path / "spectrogram.npy")
+    stft = StreamingSTFT(1000, nfft=256)
+    count = stft.record((data[start:start + 500] for start in range(0, len(data), 500)), path)
+    recorded = np.load(path)
+    assert recorded.shape == (count, 129)
+    np.testing.assert_allclose(recorded, expected()[2].T, rtol=1e-4)
+
+def test_stream():
+    stft = StreamingSTFT(1000, nfft=256, dtype=np.float64)
+    result = list(stft.stream(data[start:start + 700] for start in range(0, len(data), 700)))
+    np.testing.assert_allclose(result, expected()[2].T, rtol=1e-10)
+
+def test_unsupported_reduction():
+    with pytest.raises(ValueError):
+        StreamingSTFT(1000, reduction='median')
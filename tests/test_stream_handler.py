@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+import numpy as np
+from openapi.openapi_fast import parse_frame
+from openapi.openapi_writer import (build_frame, build_signal_data, build_interpretations, MESSAGE_SIGNAL_DATA,
+                                    MESSAGE_INTERPRETATION, SCALE_FACTOR, OFFSET)
+from HelpFunctions.Buffer import channelBuffer
+from HelpFunctions.Stream import streamHandler
+
+SAMPLE_RATE = 65536
+# Time family of one tick per sample at 65536 Hz
+TIME_FAMILY = (16, 0, 0, 0)
+
+def handler_for(channels):
+    lanxi = SimpleNamespace(ip="127.0.0.1", inputport=0, channels=[{}] * channels, sample_rate=SAMPLE_RATE)
+    return streamHandler(lanxi)
+
+def signal_package(signals, time_count=0):
+    return parse_frame(build_frame(MESSAGE_SIGNAL_DATA, build_signal_data(signals), TIME_FAMILY, time_count))
+
+def test_channel_buffer_rows():
+    buffers = channelBuffer(3, 8)
+    for channel in range(3):
+        buffers.append(channel, np.arange(10) + 100 * channel)
+    np.testing.assert_array_equal(buffers.getPart(4), [[6, 7, 8, 9], [106, 107, 108, 109], [206, 207, 208, 209]])
+    np.testing.assert_array_equal(buffers.getChannel(1, 2), [108, 109])
+
+def test_channel_buffer_uneven_channels():
+    buffers = channelBuffer(2, 8, threadsafe=True)
+    buffers.append(0, np.arange(5))
+    buffers.append(1, np.arange(3))
+    np.testing.assert_array_equal(buffers.getPart(3), [[2, 3, 4], [0, 1, 2]])
+
+def test_package_handler_demultiplexes_channels():
+    handler = handler_for(2)
+    interpretations = [(1, SCALE_FACTOR, 2.0**23), (2, SCALE_FACTOR, 2.0**24), (2, OFFSET, 1.0)]
+    handler.PackageHandler(parse_frame(build_frame(MESSAGE_INTERPRETATION, build_interpretations(interpretations))))
+    handler.PackageHandler(signal_package([(1, np.arange(4)), (2, np.arange(4) * 10)], time_count=100))
+    np.testing.assert_array_equal(handler.buffer.getChannel(0, 4), [0, 1, 2, 3])
+    np.testing.assert_array_equal(handler.buffer.getChannel(1, 4), [1, 21, 41, 61])
+    np.testing.assert_allclose(handler.end_time, (100 + 4) / SAMPLE_RATE)
+    assert handler.samples_received == 8
+
+def test_package_handler_ignores_extra_signals():
+    handler = handler_for(1)
+    handler.PackageHandler(signal_package([(1, np.arange(4)), (2, np.arange(4))]))
+    assert handler.samples_received == 4
+
+def test_consumers_get_channels_as_one_block():
+    handler = handler_for(2)
+    blocks = []
+    handler.addConsumer(blocks.append)
+    handler.PackageHandler(signal_package([(1, np.full(6, 2**22)), (2, np.full(6, -2**22))]))
+    assert len(blocks) == 1
+    np.testing.assert_allclose(blocks[0], [[0.5] * 6, [-0.5] * 6])
+
+def test_channels_with_different_lengths():
+    handler = handler_for(2)
+    blocks = []
+    handler.addConsumer(blocks.append)
+    handler.PackageHandler(signal_package([(1, np.arange(4)), (2, np.arange(2))]))
+    # Consumers only get blocks where all channels line up, the buffers get everything
+    assert blocks == []
+    assert handler.samples_received == 6
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from scipy.signal import welch
+from fft_utils import WelchAccumulator
+
+rng = np.random.default_rng(0)
+
+@pytest.mark.parametrize("block", [1, 100, 1000, 20000])
+def test_matches_scipy_welch_for_any_block_size(block):
+    data = rng.standard_normal(20000)
+    accumulator = WelchAccumulator(1000, nperseg=256)
+    for start in range(0, len(data), block):
+        accumulator.append(data[start:start + block])
+    freq, psd = accumulator.psd()
+    expected_freq, expected = welch(data, fs=1000, nperseg=256)
+    np.testing.assert_allclose(freq, expected_freq)
+    np.testing.assert_allclose(psd, expected, rtol=1e-10)
+
+def test_channels_and_spectrum_scaling():
+    data = rng.standard_normal((3, 5000))
+    accumulator = WelchAccumulator(48000, nperseg=512, noverlap=128, channels=3, window='hamming', scaling='spectrum')
+    accumulator.append(data[:, :2222])
+    accumulator.append(data[:, 2222:])
+    freq, psd = accumulator.psd()
+    assert psd.shape == (3, 257)
+    expected = welch(data, fs=48000, nperseg=512, noverlap=128, window='hamming', scaling='spectrum', axis=-1)[1]
+    np.testing.assert_allclose(psd, expected, rtol=1e-10)
+
+def test_sine_power():
+    t = np.arange(2**16) / 1024
+    accumulator = WelchAccumulator(1024, nperseg=1024, scaling='spectrum')
+    accumulator.append(np.sqrt(2) * np.sin(2 * np.pi * 100 * t))
+    freq, psd_db = accumulator.psd_db()
+    # Power of a 1 V RMS sine, all in its bin
+    assert freq[np.argmax(psd_db)] == 100
+    assert abs(np.max(psd_db)) < 0.01
+
+def test_exponential_averaging_follows_changes():
+    accumulator = WelchAccumulator(1000, nperseg=100, noverlap=0, averaging='exponential', averages=4)
+    accumulator.append(rng.standard_normal(100 * 50))
+    quiet = np.mean(accumulator.psd()[1])
+    accumulator.append(10 * rng.standard_normal(100 * 50))
+    # After many time constants the average is the one of the new level
+    assert np.mean(accumulator.psd()[1]) / quiet == pytest.approx(100, rel=0.3)
+
+def test_reset():
+    accumulator = WelchAccumulator(1000, nperseg=64)
+    accumulator.append(rng.standard_normal(1000))
+    accumulator.reset()
+    assert accumulator.segments == 0
+    assert not np.any(accumulator.psd()[1])
+
+def test_unsupported_arguments():
+    with pytest.raises(ValueError):
+        WelchAccumulator(1000, averaging='median')
+    with pytest.raises(ValueError):
+        WelchAccumulator(1000, scaling='magnitude')